@@ -175,6 +175,55 @@ class BenchmarkAnalyzer:
         return df_w_mean
 
 
+class PerformanceAnalyzer:
+    """
+    Compare the timing breakdown (saved by `FactorImplementEval.save_timing`) across benchmark runs.
+    """
+
+    STAGES = ["generation_time", "llm_latency", "execution_time", "evaluation_time"]
+
+    def __init__(self, regression_threshold: float = 1.2):
+        """
+        regression_threshold: a stage of a factor is flagged as a regression when it is
+            `regression_threshold` times slower than the baseline.
+        """
+        self.regression_threshold = regression_threshold
+
+    def load_timing(self, path) -> pd.DataFrame:
+        df = pd.read_parquet(path)
+        stages = [s for s in self.STAGES if s in df.columns]
+        df = df.groupby("factor_name")[stages].median()
+        df["total_time"] = df[[s for s in stages if s != "llm_latency"]].sum(axis=1)
+        return df
+
+    def compare(self, paths: dict) -> pd.DataFrame:
+        """
+        paths: {run name: timing parquet path}; the first run is the baseline.
+
+        Returns a frame indexed by factor with one column group per run containing the median stage times,
+        the speedup against the baseline and the regression flag.
+        """
+        runs = {name: self.load_timing(path) for name, path in paths.items()}
+        baseline_name, baseline = next(iter(runs.items()))
+        res = {}
+        for name, df in runs.items():
+            df = df.reindex(baseline.index)
+            if name != baseline_name:
+                speedup = baseline / df.where(df > 0)
+                df = pd.concat(
+                    [
+                        df,
+                        speedup.add_prefix("speedup_"),
+                        (speedup < 1 / self.regression_threshold).add_prefix("regression_"),
+                    ],
+                    axis=1,
+                )
+            res[name] = df
+        report = pd.concat(res, axis=1)
+        print(report)
+        return report
+
+
 class Plotter:
     @staticmethod
     def change_fs(font_size):
@@ -206,7 +255,26 @@ def main(
     round=1,
     title="Comparison of Different Methods",
     only_correct_format=False,
+    timing_paths=None,
+    regression_threshold=1.2,
 ):
+    """
+    timing_paths: timing parquet files of several runs (the first one is the baseline).
+        If given, a speedup/regression report across the runs is printed and saved as `./perf_comparison.csv`.
+    """
+    if timing_paths:
+        if isinstance(timing_paths, str):
+            timing_paths = timing_paths.split(",")
+        report = PerformanceAnalyzer(regression_threshold=regression_threshold).compare(
+            {Path(p).stem: p for p in timing_paths}
+        )
+        report.to_csv("./perf_comparison.csv")
+        regressions = report.filter(like="regression_").any(axis=1)
+        if regressions.any():
+            print(f"Performance regressions found in: {list(regressions[regressions].index)}")
+        if path is None:
+            return
+
     settings = BenchmarkSettings()
     benchmark = BenchmarkAnalyzer(settings, only_correct_format=only_correct_format)
     results = {
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from rdagent.app.qlib_rd_loop.conf import FACTOR_PROP_SETTING
 from rdagent.components.benchmark.conf import BenchmarkSettings
 from rdagent.components.benchmark.eval_method import FactorImplementEval
@@ -26,6 +28,7 @@ if __name__ == "__main__":
         scen=scen,
         catch_eval_except=True,
         test_round=bs.bench_test_round,
+        n_workers=bs.bench_eval_workers,
     )
 
     # 5.run the eval
@@ -33,3 +36,5 @@ if __name__ == "__main__":
 
     # 6.save the result
     logger.log_object(res)
+    timing_path = eval_method.save_timing(bs.bench_result_path / f"timing_{datetime.now():%Y%m%d-%H%M%S}.parquet")
+    logger.info(f"Timing breakdown saved to {timing_path}")
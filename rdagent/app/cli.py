@@ -30,6 +30,7 @@ from rdagent.app.qlib_rd_loop.quant import main as fin_quant
 from rdagent.app.utils.health_check import health_check
 from rdagent.app.utils.info import collect_info
 from rdagent.log.mle_summary import grade_summary as grade_summary
+from rdagent.log.storage import convert_file_storage
 
 app = typer.Typer()
 
@@ -61,6 +62,14 @@ def server_ui(port=19899):
     subprocess.run(["python", "rdagent/log/server/app.py", f"--port={port}"])
 
 
+def convert_log(log_dir: str, output_dir: str):
+    """
+    convert a log folder written by FileStorage into the append-only segment format of SegmentStorage.
+    """
+    n_messages = convert_file_storage(log_dir, output_dir)
+    print(f"Converted {n_messages} messages from {log_dir} to {output_dir}")
+
+
 app.command(name="fin_factor")(fin_factor)
 app.command(name="fin_model")(fin_model)
 app.command(name="fin_quant")(fin_quant)
@@ -72,6 +81,7 @@ app.command(name="ui")(ui)
 app.command(name="server_ui")(server_ui)
 app.command(name="health_check")(health_check)
 app.command(name="collect_info")(collect_info)
+app.command(name="convert_log")(convert_log)
 
 
 if __name__ == "__main__":
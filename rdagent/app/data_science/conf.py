@@ -60,6 +60,17 @@ class DataScienceBasePropSetting(KaggleBasePropSetting):
     enable_doc_dev: bool = False
     model_dump_check_level: Literal["medium", "high"] = "medium"
 
+    #### stage cache
+    enable_stage_cache: bool = False
+    """Provide the pipeline with a cache for the outputs of its data loading and feature engineering stages
+    (see `rdagent/components/coder/data_science/share/stage_cache.py`)"""
+
+    #### runtime estimate
+    runtime_reject_ratio: float | None = 1.5
+    """Do not run a solution on the full data if its full run, estimated from its debug run, would take longer than
+    this ratio of the remaining budget (the full timeout, or the remaining time of the session if it is shorter) or
+    exceed the memory limit of the environment; None disables the check (the estimates are still logged)"""
+
     ### knowledge base
     enable_knowledge_base: bool = False
     knowledge_base_version: str = "v1"
@@ -70,7 +81,7 @@ class DataScienceBasePropSetting(KaggleBasePropSetting):
     enable_log_archive: bool = True
     log_archive_path: str | None = None
     log_archive_temp_path: str | None = (
-        None  # This is to store the mid tar file since writing the tar file is preferred in local storage then copy to target storage
+        None  # This is to store the new archive segments since writing them is preferred in local storage then move to target storage
     )
 
     #### Evaluation on Test related
@@ -83,6 +94,8 @@ class DataScienceBasePropSetting(KaggleBasePropSetting):
     ### multi-trace related
     max_trace_num: int = 3
     """The maximum number of traces to grow before merging"""
+    trace_scheduler_name: str = "rdagent.scenarios.data_science.proposal.exp_gen.trace_scheduler.RoundRobinScheduler"
+    """The policy deciding which trace to expand next (RoundRobinScheduler, UCBScheduler or ShortestRuntimeScheduler)"""
 
     #### multi-trace:checkpoint selector
     selector_name: str = "rdagent.scenarios.data_science.proposal.exp_gen.select.expand.LatestCKPSelector"
@@ -11,7 +11,6 @@ from rdagent.components.document_reader.document_reader import (
     extract_first_page_screenshot_from_pdf,
     load_and_process_pdfs_by_langchain,
 )
-from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.proposal import Hypothesis
 from rdagent.log import rdagent_logger as logger
 from rdagent.oai.llm_utils import APIBackend
@@ -111,25 +110,24 @@ class FactorReportLoop(FactorRDLoop, metaclass=LoopMeta):
 
     async def direct_exp_gen(self, prev_out: dict[str, Any]):
         while True:
-            if self.get_unfinished_loop_cnt(self.loop_idx) < RD_AGENT_SETTINGS.get_max_parallel():
-                report_file_path = self.judge_pdf_data_items[self.loop_idx + self.shift_report]
-                logger.info(f"Processing number {self.loop_idx} report: {report_file_path}")
-                exp = extract_hypothesis_and_exp_from_reports(str(report_file_path))
-                if exp is None:
-                    self.shift_report += 1
-                    self.loop_n -= 1
-                    if self.loop_n < 0:  # NOTE: on every step, we self.loop_n -= 1 at first.
-                        raise self.LoopTerminationError("Reach stop criterion and stop loop")
-                    continue
-                exp.based_experiments = [QlibFactorExperiment(sub_tasks=[], hypothesis=exp.hypothesis)] + [
-                    t[0] for t in self.trace.hist if t[1]
-                ]
-                exp.sub_workspace_list = exp.sub_workspace_list[: FACTOR_FROM_REPORT_PROP_SETTING.max_factors_per_exp]
-                exp.sub_tasks = exp.sub_tasks[: FACTOR_FROM_REPORT_PROP_SETTING.max_factors_per_exp]
-                logger.log_object(exp.hypothesis, tag="hypothesis generation")
-                logger.log_object(exp.sub_tasks, tag="experiment generation")
-                return exp
-            await asyncio.sleep(1)
+            await self.wait_for_free_slot()
+            report_file_path = self.judge_pdf_data_items[self.loop_idx + self.shift_report]
+            logger.info(f"Processing number {self.loop_idx} report: {report_file_path}")
+            exp = extract_hypothesis_and_exp_from_reports(str(report_file_path))
+            if exp is None:
+                self.shift_report += 1
+                self.loop_n -= 1
+                if self.loop_n < 0:  # NOTE: on every step, we self.loop_n -= 1 at first.
+                    raise self.LoopTerminationError("Reach stop criterion and stop loop")
+                continue
+            exp.based_experiments = [QlibFactorExperiment(sub_tasks=[], hypothesis=exp.hypothesis)] + [
+                t[0] for t in self.trace.hist if t[1]
+            ]
+            exp.sub_workspace_list = exp.sub_workspace_list[: FACTOR_FROM_REPORT_PROP_SETTING.max_factors_per_exp]
+            exp.sub_tasks = exp.sub_tasks[: FACTOR_FROM_REPORT_PROP_SETTING.max_factors_per_exp]
+            logger.log_object(exp.hypothesis, tag="hypothesis generation")
+            logger.log_object(exp.sub_tasks, tag="experiment generation")
+            return exp
 
     def coding(self, prev_out: dict[str, Any]):
         exp = self.coder.develop(prev_out["direct_exp_gen"])
@@ -31,3 +31,6 @@ class BenchmarkSettings(ExtendedBaseSettings):
 
     bench_result_path: Path = DIRNAME / "result"
     """result save path"""
+
+    bench_eval_workers: Optional[int] = None
+    """how many processes to evaluate the generated factors; `multi_proc_n` is used if not given"""
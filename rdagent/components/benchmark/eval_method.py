@@ -1,3 +1,4 @@
+import time
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Tuple, Union
@@ -21,6 +22,7 @@ from rdagent.core.exception import CoderError
 from rdagent.core.experiment import Experiment, Task, Workspace
 from rdagent.core.scenario import Scenario
 from rdagent.core.utils import multiprocessing_wrapper
+from rdagent.log.timer import RD_Agent_TIMER_wrapper
 
 EVAL_RES = Dict[
     str,
@@ -136,6 +138,61 @@ class BaseEval:
                     raise e
         return eval_res
 
+    def timed_eval_case(
+        self,
+        case_gt: Workspace,
+        case_gen: Workspace,
+    ) -> Tuple[List[Union[Tuple[FactorEvaluator, object], Exception]], dict]:
+        """
+        Same as `eval_case` but also returns the timing breakdown of the evaluation.
+
+        The `execute` calls of the generated workspace are timed separately from the evaluators,
+        so `evaluation_time` only contains the time spent outside the generated code.
+
+        Returns
+        -------
+        Tuple[results of `eval_case`, dict]
+            the dict contains `execution_time`, `execute_calls`, `evaluation_time` and `gt_cache_hit`.
+        """
+        gt_cache_hit = False
+        if RD_AGENT_SETTINGS.cache_with_pickle and hasattr(case_gt, "hash_func"):
+            gt_hash = case_gt.hash_func()
+            gt_cache_hit = (
+                gt_hash is not None
+                and (
+                    Path(RD_AGENT_SETTINGS.pickle_cache_folder_path_str)
+                    / f"{type(case_gt).execute.__module__}.execute"
+                    / f"{gt_hash}.pkl"
+                ).exists()
+            )
+
+        execute_durations = []
+        if case_gen is not None:
+            original_execute = case_gen.execute
+
+            def timed_execute(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original_execute(*args, **kwargs)
+                finally:
+                    execute_durations.append(time.perf_counter() - start)
+
+            case_gen.execute = timed_execute
+        start = time.perf_counter()
+        try:
+            eval_res = self.eval_case(case_gt, case_gen)
+        finally:
+            total = time.perf_counter() - start
+            if case_gen is not None:
+                # remove the instance attribute so the workspace stays picklable
+                del case_gen.execute
+        return eval_res, {
+            "execution_time": sum(execute_durations),
+            "execute_calls": len(execute_durations),
+            "evaluation_time": total - sum(execute_durations),
+            "gt_cache_hit": gt_cache_hit,
+        }
+
 
 class FactorImplementEval(BaseEval):
     def __init__(
@@ -145,8 +202,16 @@ class FactorImplementEval(BaseEval):
         *args,
         scen: Scenario,
         test_round: int = 10,
+        n_workers: int | None = None,
         **kwargs,
     ):
+        """
+        Parameters
+        ----------
+        n_workers : int, optional
+            Number of processes to evaluate the generated factors concurrently.
+            `RD_AGENT_SETTINGS.multi_proc_n` is used if not given.
+        """
         online_evaluator_l = [
             FactorSingleColumnEvaluator(scen),
             FactorRowCountEvaluator(scen),
@@ -156,19 +221,27 @@ class FactorImplementEval(BaseEval):
         ]
         super().__init__(online_evaluator_l, test_cases, method, *args, **kwargs)
         self.test_round = test_round
+        self.n_workers = RD_AGENT_SETTINGS.multi_proc_n if n_workers is None else n_workers
+        # one record per (round, factor); filled by `develop` and `eval`. See `timing_df`
+        self.timing_records: list[dict] = []
 
     def develop(self):
         gen_factor_l_all_rounds = []
+        self.timing_records = []
         for _ in tqdm(range(self.test_round), desc="Rounds of Eval"):
             print("\n========================================================")
             print(f"Eval {_}-th times...")
             print("========================================================\n")
+            api_count = RD_Agent_TIMER_wrapper.api_call_count
+            api_duration = RD_Agent_TIMER_wrapper.api_call_duration
+            start = time.perf_counter()
             try:
                 gen_factor_l = self.generate_method.develop(self.test_cases.get_exp())
             except KeyboardInterrupt:
                 # TODO: Why still need to save result after KeyboardInterrupt?
                 print("Manually interrupted the evaluation. Saving existing results")
                 break
+            round_time = time.perf_counter() - start
 
             if len(gen_factor_l.sub_workspace_list) != len(self.test_cases.ground_truth):
                 raise ValueError(
@@ -176,6 +249,21 @@ class FactorImplementEval(BaseEval):
                 )
             gen_factor_l_all_rounds.extend(gen_factor_l.sub_workspace_list)
 
+            # The tasks of one round are developed together, so the round cost is shared evenly.
+            # LLM calls made in subprocesses (`multi_proc_n > 1`) are not visible here.
+            n_tasks = len(gen_factor_l.sub_workspace_list)
+            for task in self.test_cases.target_task:
+                self.timing_records.append(
+                    {
+                        "round": _,
+                        "factor_name": task.factor_name,
+                        "generation_time": round_time / n_tasks,
+                        "llm_calls": (RD_Agent_TIMER_wrapper.api_call_count - api_count) / n_tasks,
+                        "llm_latency": (RD_Agent_TIMER_wrapper.api_call_duration - api_duration).total_seconds()
+                        / n_tasks,
+                    }
+                )
+
         return gen_factor_l_all_rounds
 
     def eval(self, gen_factor_l_all_rounds):
@@ -185,17 +273,40 @@ class FactorImplementEval(BaseEval):
             test_cases_all_rounds.extend(self.test_cases.ground_truth)
         eval_res_list = multiprocessing_wrapper(
             [
-                (self.eval_case, (gt_case, gen_factor))
+                (self.timed_eval_case, (gt_case, gen_factor))
                 for gt_case, gen_factor in zip(test_cases_all_rounds, gen_factor_l_all_rounds)
             ],
-            n=RD_AGENT_SETTINGS.multi_proc_n,
+            n=self.n_workers,
         )
 
-        for gt_case, eval_res, gen_factor in tqdm(zip(test_cases_all_rounds, eval_res_list, gen_factor_l_all_rounds)):
+        for i, (gt_case, (eval_res, timing), gen_factor) in enumerate(
+            tqdm(zip(test_cases_all_rounds, eval_res_list, gen_factor_l_all_rounds))
+        ):
             res[gt_case.target_task.factor_name].append((gen_factor, eval_res))
+            if i < len(self.timing_records):
+                self.timing_records[i].update(timing)
+            else:
+                self.timing_records.append(
+                    {"round": i // len(self.test_cases), "factor_name": gt_case.target_task.factor_name, **timing}
+                )
 
         return res
 
+    def timing_df(self) -> pd.DataFrame:
+        """
+        The per-task timing breakdown of the last `develop` and `eval`.
+
+        Columns: round, factor_name, generation_time, llm_calls, llm_latency, execution_time,
+        execute_calls, evaluation_time, gt_cache_hit. Times are in seconds.
+        """
+        return pd.DataFrame(self.timing_records)
+
+    def save_timing(self, path: Union[Path, str]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.timing_df().to_parquet(path, index=False)
+        return path
+
     @staticmethod
     def summarize_res(res: EVAL_RES) -> pd.DataFrame:
         # None: indicate that it raises exception and get no results
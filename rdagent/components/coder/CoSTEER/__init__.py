@@ -11,6 +11,7 @@ from rdagent.components.coder.CoSTEER.knowledge_management import (
     CoSTEERRAGStrategyV1,
     CoSTEERRAGStrategyV2,
 )
+from rdagent.components.knowledge_management.graph_store import GraphStore
 from rdagent.core.developer import Developer
 from rdagent.core.evaluation import Evaluator, Feedback
 from rdagent.core.evolving_agent import EvolvingStrategy, RAGEvoAgent
@@ -66,7 +67,16 @@ class CoSTEER(Developer[Experiment]):
         )
 
     def load_or_init_knowledge_base(self, former_knowledge_base_path: Path = None, component_init_list: list = []):
-        if former_knowledge_base_path is not None and former_knowledge_base_path.exists():
+        if (
+            self.evolving_version == 2
+            and GraphStore.is_store(former_knowledge_base_path)
+            and former_knowledge_base_path.exists()
+        ):
+            knowledge_base = CoSTEERKnowledgeBaseV2(
+                init_component_list=component_init_list,
+                path=former_knowledge_base_path,
+            )
+        elif former_knowledge_base_path is not None and former_knowledge_base_path.exists():
             knowledge_base = pickle.load(open(former_knowledge_base_path, "rb"))
             if self.evolving_version == 1 and not isinstance(knowledge_base, CoSTEERKnowledgeBaseV1):
                 raise ValueError("The former knowledge base is not compatible with the current version")
@@ -117,8 +127,15 @@ class CoSTEER(Developer[Experiment]):
 
         # save new knowledge base
         if self.new_knowledge_base_path is not None:
-            with self.new_knowledge_base_path.open("wb") as f:
-                pickle.dump(self.knowledge_base, f)
+            if isinstance(self.knowledge_base, CoSTEERKnowledgeBaseV2) and GraphStore.is_store(
+                self.new_knowledge_base_path
+            ):
+                # folder: only the knowledge added since the last save is appended
+                self.knowledge_base.path = self.new_knowledge_base_path
+                self.knowledge_base.dump()
+            else:
+                with self.new_knowledge_base_path.open("wb") as f:
+                    pickle.dump(self.knowledge_base, f)
             logger.info(f"New knowledge base saved to {self.new_knowledge_base_path}")
         exp.sub_workspace_list = evo_exp.sub_workspace_list
         exp.experiment_workspace = evo_exp.experiment_workspace
@@ -28,10 +28,10 @@ class CoSTEERSettings(ExtendedBaseSettings):
     v2_knowledge_sampler: float = 1.0
 
     knowledge_base_path: Union[str, None] = None
-    """Path to the knowledge base"""
+    """Path to the knowledge base. A path without suffix is a folder written by `GraphStore` (V2 only)"""
 
     new_knowledge_base_path: Union[str, None] = None
-    """Path to the new knowledge base"""
+    """Path to the new knowledge base. A path without suffix is saved incrementally as a `GraphStore` folder"""
 
     max_seconds: int = 10**6
 
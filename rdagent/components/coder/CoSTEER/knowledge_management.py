@@ -4,16 +4,21 @@ import copy
 import json
 import random
 import re
+import time
 from itertools import combinations
 from pathlib import Path
-from typing import List, Union
+from typing import Callable, List, Union
+
+import numpy as np
 
 from rdagent.components.coder.CoSTEER.config import CoSTEERSettings
 from rdagent.components.coder.CoSTEER.evaluators import CoSTEERSingleFeedback
+from rdagent.components.knowledge_management.cluster import normalize_rows
 from rdagent.components.knowledge_management.graph import (
     UndirectedGraph,
     UndirectedNode,
 )
+from rdagent.components.knowledge_management.graph_store import GraphStore
 from rdagent.core.evolving_agent import Feedback
 from rdagent.core.evolving_framework import (
     EvolvableSubjects,
@@ -213,6 +218,66 @@ class CoSTEERQueriedKnowledgeV2(CoSTEERQueriedKnowledgeV1):
         )
 
 
+class CoSTEERRetrievalCache:
+    """
+    Cached retrieval data of `CoSTEERKnowledgeBaseV2`.
+
+    - The normalized embeddings of the successful tasks, in the insertion order of
+      `success_task_to_knowledge_dict`. The dict only grows, so only the new tasks are embedded.
+    - The embeddings of every task description seen so far, successful or queried.
+    - The results of graph queries, keyed by the query parameters. They are dropped as soon as the version
+      of the graph changes, i.e. after any node or edge is added.
+    """
+
+    def __init__(self) -> None:
+        self.success_tasks: list[str] = []
+        self.success_embeddings = np.zeros((0, 0), dtype=np.float32)
+        self.embeddings: dict[str, np.ndarray] = {}
+        self.graph_version = -1
+        self.graph_results: dict[tuple, list] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_success_tasks(self, success_tasks: list[str]) -> None:
+        n = len(self.success_tasks)
+        if success_tasks[:n] != self.success_tasks:
+            # not an append-only change: start over
+            self.success_tasks, self.success_embeddings, n = [], np.zeros((0, 0), dtype=np.float32), 0
+        new_tasks = success_tasks[n:]
+        if not new_tasks:
+            return
+        new_embeddings = self._embed(new_tasks)
+        self.success_embeddings = np.vstack([self.success_embeddings, new_embeddings]) if n else new_embeddings
+        self.success_tasks = self.success_tasks + new_tasks
+
+    def _embed(self, contents: list[str]) -> np.ndarray:
+        missing = list(dict.fromkeys(c for c in contents if c not in self.embeddings))
+        if missing:
+            embeddings = normalize_rows(APIBackend().create_embedding(input_content=missing))
+            self.embeddings.update(zip(missing, embeddings))
+        return np.stack([self.embeddings[c] for c in contents])
+
+    def similar_success_tasks(self, task_information: str, success_tasks: list[str]) -> list[str]:
+        """Successful tasks sorted by the cosine similarity of their description to `task_information`."""
+        if not success_tasks:
+            return []
+        self._sync_success_tasks(success_tasks)
+        scores = self.success_embeddings @ self._embed([task_information])[0]
+        return [self.success_tasks[i] for i in np.argsort(-scores, kind="stable")]
+
+    def graph_query(self, key: tuple, graph_version: int, compute: Callable[[], list]) -> list:
+        """Return the memoized result of a graph query, computing it on a miss. A copy is returned."""
+        if graph_version != self.graph_version:
+            self.graph_results = {}
+            self.graph_version = graph_version
+        if key in self.graph_results:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.graph_results[key] = compute()
+        return list(self.graph_results[key])
+
+
 class CoSTEERRAGStrategyV2(RAGStrategy):
     def __init__(self, knowledgebase: CoSTEERKnowledgeBaseV2, settings: CoSTEERSettings) -> None:
         super().__init__(knowledgebase)
@@ -290,24 +355,35 @@ class CoSTEERRAGStrategyV2(RAGStrategy):
             success_task_to_knowledge_dict=self.knowledgebase.success_task_to_knowledge_dict,
         )
 
+        cache = self.knowledgebase.retrieval_cache
+        hits, misses = cache.hits, cache.misses
+        start = time.perf_counter()
         queried_knowledge_v2 = self.former_trace_query(
             evo,
             queried_knowledge_v2,
             self.settings.v2_query_former_trace_limit,
             self.settings.v2_add_fail_attempt_to_latest_successful_execution,
         )
+        former_trace_end = time.perf_counter()
         queried_knowledge_v2 = self.component_query(
             evo,
             queried_knowledge_v2,
             self.settings.v2_query_component_limit,
             knowledge_sampler=conf_knowledge_sampler,
         )
+        component_end = time.perf_counter()
         queried_knowledge_v2 = self.error_query(
             evo,
             queried_knowledge_v2,
             self.settings.v2_query_error_limit,
             knowledge_sampler=conf_knowledge_sampler,
         )
+        logger.info(
+            f"CoSTEER knowledge query took {time.perf_counter() - start:.3f}s "
+            f"(former trace {former_trace_end - start:.3f}s, component {component_end - former_trace_end:.3f}s, "
+            f"error {time.perf_counter() - component_end:.3f}s); "
+            f"graph query cache: {cache.hits - hits} hits, {cache.misses - misses} misses",
+        )
         return queried_knowledge_v2
 
     def analyze_component(
@@ -517,20 +593,9 @@ class CoSTEERRAGStrategyV2(RAGStrategy):
                             ].append(target_knowledge)
 
                 # finally add embedding related knowledge
-                knowledge_base_success_task_list = list(self.knowledgebase.success_task_to_knowledge_dict)
-
-                similarity = calculate_embedding_distance_between_str_list(
-                    [target_task_information],
-                    knowledge_base_success_task_list,
-                )[0]
-                similar_indexes = sorted(
-                    range(len(similarity)),
-                    key=lambda i: similarity[i],
-                    reverse=True,
-                )
                 embedding_similar_successful_knowledge = [
-                    self.knowledgebase.success_task_to_knowledge_dict[knowledge_base_success_task_list[index]]
-                    for index in similar_indexes
+                    self.knowledgebase.success_task_to_knowledge_dict[task_information]
+                    for task_information in self.knowledgebase.similar_success_tasks(target_task_information)
                 ]
                 for knowledge in embedding_similar_successful_knowledge:
                     if (
@@ -708,15 +773,10 @@ class CoSTEERKnowledgeBaseV2(EvolvingKnowledgeBase):
     def __init__(self, init_component_list=None, path: str | Path = None) -> None:
         """
         Load knowledge, offer brief information of knowledge and common handle interfaces
+
+        When `path` is a folder (no suffix), the knowledge base is loaded from and dumped to a `GraphStore`.
         """
         self.graph: UndirectedGraph = UndirectedGraph(Path.cwd() / "graph.pkl")
-        logger.info(f"CoSTEER Knowledge Graph loaded, size={self.graph.size()}")
-
-        if init_component_list:
-            for component in init_component_list:
-                exist_node = self.graph.get_node_by_content(content=component)
-                node = exist_node if exist_node else UndirectedNode(content=component, label="component")
-                self.graph.add_nodes(node=node, neighbors=[])
 
         # A dict containing all working trace until they fail or succeed
         self.working_trace_knowledge = {}
@@ -733,6 +793,41 @@ class CoSTEERKnowledgeBaseV2(EvolvingKnowledgeBase):
         # store the task description to component nodes
         self.task_to_component_nodes = {}
 
+        self.retrieval_cache = CoSTEERRetrievalCache()
+
+        self.path = Path(path) if path else None
+        if GraphStore.is_store(self.path) and self.path.exists():
+            self.load()
+        logger.info(f"CoSTEER Knowledge Graph loaded, size={self.graph.size()}")
+
+        if init_component_list:
+            for component in init_component_list:
+                exist_node = self.graph.get_node_by_content(content=component)
+                node = exist_node if exist_node else UndirectedNode(content=component, label="component")
+                self.graph.add_nodes(node=node, neighbors=[])
+
+    def load(self) -> None:
+        if GraphStore.is_store(self.path):
+            self.__dict__.update(GraphStore(self.path).load(self.graph))
+        else:
+            super().load()
+
+    def dump(self) -> None:
+        if GraphStore.is_store(self.path):
+            # only the entries added since the last dump are appended to the node and edge tables
+            state = {k: v for k, v in self.__dict__.items() if k not in ("graph", "path")}
+            GraphStore(self.path).save(self.graph, state)
+        else:
+            super().dump()
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        # knowledge bases pickled before the retrieval cache existed
+        self.__dict__.setdefault("retrieval_cache", CoSTEERRetrievalCache())
+
+    def similar_success_tasks(self, task_information: str) -> list[str]:
+        return self.retrieval_cache.similar_success_tasks(task_information, list(self.success_task_to_knowledge_dict))
+
     def get_all_nodes_by_label(self, label: str) -> list[UndirectedNode]:
         return self.graph.get_all_nodes_by_label(label)
 
@@ -851,15 +946,21 @@ class CoSTEERKnowledgeBaseV2(EvolvingKnowledgeBase):
         A list of nodes
 
         """
-        nodes = self.graph.query_by_node(
-            node=node,
-            step=step,
-            constraint_labels=constraint_labels,
-            constraint_node=constraint_node,
-            constraint_distance=constraint_distance,
-            block=block,
-        )
-        return nodes
+
+        def compute() -> list[UndirectedNode]:
+            return self.graph.query_by_node(
+                node=node,
+                step=step,
+                constraint_labels=constraint_labels,
+                constraint_node=constraint_node,
+                constraint_distance=constraint_distance,
+                block=block,
+            )
+
+        if constraint_node is not None:
+            return compute()
+        key = ("node", node.id, step, tuple(constraint_labels or ()), block)
+        return self.retrieval_cache.graph_query(key, self.graph.version, compute)
 
     def graph_query_by_intersection(
         self,
@@ -884,6 +985,22 @@ class CoSTEERKnowledgeBaseV2(EvolvingKnowledgeBase):
         """
         node_count = len(nodes)
         assert node_count >= 2, "nodes length must >=2"
+        node_ids = tuple(node.id for node in nodes)
+        key = ("intersection", node_ids, steps, tuple(constraint_labels or ()), output_intersection_origin)
+        return self.retrieval_cache.graph_query(
+            key,
+            self.graph.version,
+            lambda: self._graph_query_by_intersection(nodes, steps, constraint_labels, output_intersection_origin),
+        )
+
+    def _graph_query_by_intersection(
+        self,
+        nodes: list[UndirectedNode],
+        steps: int,
+        constraint_labels: list[str] | None,
+        output_intersection_origin: bool,
+    ) -> list[UndirectedNode] | list[list[list[UndirectedNode], UndirectedNode]]:
+        node_count = len(nodes)
         intersection_node_list = []
         if output_intersection_origin:
             origin_list = []
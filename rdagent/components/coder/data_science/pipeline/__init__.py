@@ -88,6 +88,7 @@ class PipelineMultiProcessEvolvingStrategy(MultiProcessEvolvingStrategy):
             runtime_environment=self.scen.get_runtime_environment(),
             package_info=target_task.package_info,
             enable_model_dump=DS_RD_SETTING.enable_model_dump,
+            enable_stage_cache=DS_RD_SETTING.enable_stage_cache,
             enable_debug_mode=DS_RD_SETTING.sample_data_by_LLM,
         )
         user_prompt = T(".prompts:pipeline_coder.user").r(
@@ -1,7 +1,6 @@
 # tess successfully running.
 # (GPT) if it aligns with the spec & rationality of the spec.
 import json
-import re
 from pathlib import Path
 
 import pandas as pd
@@ -16,9 +15,21 @@ from rdagent.components.coder.CoSTEER.knowledge_management import (
     CoSTEERQueriedKnowledgeV2,
 )
 from rdagent.components.coder.data_science.conf import get_clear_ws_cmd, get_ds_env
-from rdagent.components.coder.data_science.utils import remove_eda_part
+from rdagent.components.coder.data_science.utils import (
+    inject_stage_cache,
+    read_peak_memory_mb,
+    remove_eda_part,
+    stage_cache_report,
+    usage_tracked_cmd,
+)
 from rdagent.core.experiment import FBWorkspace, Task
+from rdagent.log import rdagent_logger as logger
+from rdagent.scenarios.data_science.dev.runtime_estimator import (
+    DebugProfile,
+    input_data_size,
+)
 from rdagent.scenarios.data_science.test_eval import get_test_eval
+from rdagent.utils import md5_hash
 from rdagent.utils.agent.tpl import T
 from rdagent.utils.agent.workflow import build_cls_from_json_with_retry
 
@@ -57,14 +68,17 @@ class PipelineCoSTEEREvaluator(CoSTEEREvaluator):
 
         stdout = ""
         implementation.execute(env=env, entry=get_clear_ws_cmd())
+        if DS_RD_SETTING.enable_stage_cache:
+            inject_stage_cache(implementation)
         if DS_RD_SETTING.sample_data_by_LLM:
             # Because coder runs on full data, we need to run debug mode in advance to save time
+            # (the usage tracker measures the peak memory for the runtime estimate)
             result = implementation.run(
-                env=env, entry=f"strace -e trace=file -f -o trace.log python -m coverage run main.py --debug"
+                env=env, entry=f"strace -e trace=file -f -o trace.log {usage_tracked_cmd(implementation)} --debug"
             )
         else:
             result = implementation.run(
-                env=env, entry=f"strace -e trace=file -f -o trace.log python -m coverage run main.py"
+                env=env, entry=f"strace -e trace=file -f -o trace.log python main.py"
             )
 
         sample_submission_check = True
@@ -87,15 +101,22 @@ class PipelineCoSTEEREvaluator(CoSTEEREvaluator):
         else:
             stdout += f"Code ran successfully.\n Following the stdout of the debug mode run:\n{result.stdout.strip()}\n"
         if DS_RD_SETTING.sample_data_by_LLM:
-            debug_time, full_estimated_time = None, None
-            if match := re.search(r"debug_time:\s*(\d+(?:.\d+)?)", result.stdout, re.DOTALL):
-                debug_time = float(match.group(1))
-            if match := re.search(r"estimated_time:\s*(\d+(?:.\d+)?)", result.stdout, re.DOTALL):
-                full_estimated_time = float(match.group(1))
-            if debug_time is not None and full_estimated_time is not None:
-                stdout += f"Debug mode ran in {debug_time:.2f} seconds, estimated full run time is {full_estimated_time:.2f} seconds. The estimated time is {full_estimated_time / env.conf.running_timeout_period * 100:.2f}% the debug time."
+            # the runner estimates the full run from the profile before running it
+            profile = DebugProfile.parse(
+                result.stdout,
+                code_md5=md5_hash(implementation.all_codes),
+                wall_time=result.running_time,
+                data_size=input_data_size(self.scen.debug_path),
+                peak_memory_mb=read_peak_memory_mb(implementation.workspace_path),
+            )
+            implementation.running_info.debug_profile = profile
+            if profile is not None and profile.estimated_time is not None:
+                stdout += f"Debug mode ran in {profile.debug_time:.2f} seconds, estimated full run time is {profile.estimated_time:.2f} seconds. The estimated time is {profile.estimated_time / env.conf.running_timeout_period * 100:.2f}% the debug time."
             else:
                 stdout += "Debug mode did not provide debug_time or estimated_time, it's a buggy implementation.\n"
+        if (cache_report := stage_cache_report(implementation.workspace_path)) is not None:
+            logger.info(cache_report)
+            stdout += f"\n{cache_report}\n"
 
         score_fp = implementation.workspace_path / "scores.csv"
         score_ret_code = 0
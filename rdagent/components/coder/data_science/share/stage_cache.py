@@ -0,0 +1,191 @@
+"""
+Stage cache for the data science pipelines.
+
+This file is a runtime library which is injected into the workspace as `stage_cache.py`, so it must only depend on
+the standard library. The pipeline opts in by decorating its expensive stages:
+
+    from stage_cache import cached_stage
+
+    @cached_stage
+    def load_data(): ...
+
+    @cached_stage
+    def feat_eng(X, y, X_test): ...
+
+The output of a stage is stored in the cache folder, which is shared by the workspaces of the same competition, and
+reused when the stage is called again with
+- the same source (the function and the functions, classes and constants of its module which it refers to);
+- the same input data (the path, size and mtime of the files in the input folder);
+- the same arguments: outputs of a previous cached stage are identified by that stage, so they are not hashed
+  (they must not be modified in place before being passed on); other arguments are hashed by pickling them;
+- the same command line arguments (e.g. `--debug`).
+
+Each call is reported on stdout and recorded in `stage_cache.json` in the working directory.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+import types
+from pathlib import Path
+from typing import Any, Callable
+
+CACHE_DIR = os.environ.get("STAGE_CACHE_DIR", "./workspace_cache/stage_cache")
+INPUT_DIR = os.environ.get("STAGE_CACHE_INPUT_DIR", "./workspace_input/")
+STATS_FILE = "stage_cache.json"
+
+_CONSTANT_TYPES = (bool, int, float, complex, str, bytes, type(None))
+
+# id of an output of a cached stage -> (output, token identifying it); the output is kept so that its id is not reused
+_outputs: dict[int, tuple[Any, str]] = {}
+
+
+class _HashWriter:
+    def __init__(self) -> None:
+        self.md5 = hashlib.md5()
+
+    def write(self, data: bytes) -> None:
+        self.md5.update(data)
+
+
+@functools.lru_cache(maxsize=None)
+def input_fingerprint(input_dir: str = INPUT_DIR) -> str:
+    """Identify the input data by the path, size and mtime of its files; the files are not read."""
+    md5 = hashlib.md5()
+    for root, dirs, files in os.walk(input_dir, followlinks=True):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            md5.update(f"{os.path.relpath(path, input_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return md5.hexdigest()
+
+
+def _referred_names(code: types.CodeType) -> set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _referred_names(const)
+    return names
+
+
+def _codes(obj: Any) -> list[types.CodeType]:
+    if inspect.isclass(obj):
+        members = [inspect.unwrap(m) for m in vars(obj).values() if not isinstance(m, type)]
+        return [c for m in members for c in _codes(getattr(m, "__func__", m))]
+    code = getattr(obj, "__code__", None)
+    return [code] if code is not None else []
+
+
+def source_fingerprint(func: Callable) -> str:
+    """Hash the source of `func` and of the functions, classes and constants of its module which it refers to."""
+    func = inspect.unwrap(func)
+    namespace, module = func.__globals__, func.__module__
+    md5 = hashlib.md5()
+    todo, seen = [func], {id(func)}
+    while todo:
+        obj = todo.pop(0)
+        try:
+            md5.update(inspect.getsource(obj).encode())
+        except (OSError, TypeError):
+            md5.update(repr(obj).encode())
+        for name in sorted(set().union(*map(_referred_names, _codes(obj)))):
+            value = namespace.get(name)
+            if isinstance(value, _CONSTANT_TYPES) or isinstance(value, (tuple, frozenset)):
+                md5.update(f"{name}={value!r}\n".encode())
+                continue
+            value = inspect.unwrap(value) if inspect.isfunction(value) else value
+            if (
+                (inspect.isfunction(value) or inspect.isclass(value))
+                and value.__module__ == module
+                and id(value) not in seen
+            ):
+                seen.add(id(value))
+                todo.append(value)
+    return md5.hexdigest()
+
+
+def _arg_token(arg: Any) -> str:
+    known = _outputs.get(id(arg))
+    if known is not None and known[0] is arg:
+        return known[1]
+    writer = _HashWriter()
+    pickle.Pickler(writer, protocol=4).dump(arg)
+    return writer.md5.hexdigest()
+
+
+def _register_outputs(result: Any, key: str) -> None:
+    _outputs[id(result)] = (result, key)
+    if isinstance(result, (tuple, list)):
+        for i, item in enumerate(result):
+            _outputs[id(item)] = (item, f"{key}[{i}]")
+
+
+def _record(stage: str, hit: bool, seconds: float, saved_seconds: float | None = None) -> None:
+    record = {"stage": stage, "hit": hit, "seconds": round(seconds, 3)}
+    if hit:
+        record["saved_seconds"] = round(saved_seconds, 3)
+        print(f"[stage_cache] {stage}: hit, loaded in {seconds:.1f}s instead of computing in {saved_seconds:.1f}s")
+    else:
+        print(f"[stage_cache] {stage}: miss, computed in {seconds:.1f}s")
+    try:
+        records = json.loads(Path(STATS_FILE).read_text()) if Path(STATS_FILE).exists() else []
+        Path(STATS_FILE).write_text(json.dumps(records + [record]))
+    except (OSError, ValueError):
+        pass
+
+
+def cached_stage(func: Callable) -> Callable:
+    """Cache the output of a pipeline stage (e.g. `load_data`, `feat_eng`) on disk."""
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        stage = func.__name__
+        begin = time.perf_counter()
+        try:
+            parts = [source_fingerprint(func), json.dumps(sys.argv[1:])]
+            parts += [_arg_token(arg) for arg in args]
+            parts += [f"{name}={_arg_token(value)}" for name, value in sorted(kwargs.items())]
+        except Exception as e:  # e.g. arguments which can not be pickled
+            print(f"[stage_cache] {stage}: not cached ({e})")
+            return func(*args, **kwargs)
+        key = hashlib.md5("\n".join(parts).encode()).hexdigest()
+        path = Path(CACHE_DIR) / input_fingerprint() / f"{stage}-{key}.pkl"
+
+        if path.exists():
+            try:
+                with path.open("rb") as f:
+                    compute_seconds, result = pickle.load(f)
+            except Exception as e:
+                print(f"[stage_cache] {stage}: failed to load the cache ({e})")
+            else:
+                _register_outputs(result, key)
+                _record(stage, True, time.perf_counter() - begin, compute_seconds)
+                return result
+
+        result = func(*args, **kwargs)
+        compute_seconds = time.perf_counter() - begin
+        tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp.open("wb") as f:
+                pickle.dump((compute_seconds, result), f, protocol=4)
+            os.replace(tmp, path)  # the workspaces sharing the cache never read a partial file
+        except Exception as e:  # e.g. outputs which can not be pickled or a full disk
+            print(f"[stage_cache] {stage}: failed to store the cache ({e})")
+            tmp.unlink(missing_ok=True)
+        _register_outputs(result, key)
+        _record(stage, False, compute_seconds)
+        return result
+
+    return wrapper
@@ -0,0 +1,76 @@
+"""
+Track which files of the workspace a script uses.
+
+This file is a runtime library which is injected into the workspace, so it must only depend on the standard library.
+
+    python test/usage_tracker.py main.py [args ...]
+
+runs `main.py` like `python main.py [args ...]` and writes the workspace files whose code was executed (imported
+modules, the script itself and files run with `exec`/`runpy`) to `used_files.json` at exit:
+
+    {"files": ["main.py", "load_data.py", ...]}
+
+Executed code is noticed through the "exec" audit event, which is raised once per module (or `exec` call) and not
+per function call or line, so the script runs at full speed unlike under a line tracer such as `coverage run`.
+The manifest also records the peak memory of the script and of the processes it waited for in "peak_memory_mb".
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import resource
+import runpy
+import sys
+
+MANIFEST_FILE = "used_files.json"
+
+_executed: set[str] = set()
+
+
+def _audit_hook(event: str, args: tuple) -> None:
+    if event == "exec":
+        filename = getattr(args[0], "co_filename", None)
+        if filename is not None:
+            _executed.add(filename)
+
+
+def used_files(root: str) -> list[str]:
+    """The executed files under `root`, relative to it."""
+    root = os.path.realpath(root)
+    files = set()
+    for filename in _executed:
+        path = os.path.realpath(filename)
+        if os.path.isfile(path) and os.path.commonpath([root, path]) == root:
+            files.add(os.path.relpath(path, root).replace(os.sep, "/"))
+    return sorted(files)
+
+
+def peak_memory_mb() -> float:
+    """The maximum resident set size of this process and its waited children; Linux reports it in KiB."""
+    max_rss = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    return max_rss / 1024
+
+
+def write_manifest(root: str, manifest_path: str) -> None:
+    with open(manifest_path, "w") as f:
+        json.dump({"files": used_files(root), "peak_memory_mb": peak_memory_mb()}, f)
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        sys.exit(f"usage: python {sys.argv[0]} <script> [args ...]")
+    script = os.path.abspath(sys.argv[1])
+    root = os.path.dirname(script)
+    manifest_path = os.path.join(os.getcwd(), MANIFEST_FILE)
+    sys.argv = sys.argv[1:]
+    sys.path[0] = root  # as if the script was run directly
+    _executed.add(script)
+    sys.addaudithook(_audit_hook)
+    atexit.register(write_manifest, root, manifest_path)
+    runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
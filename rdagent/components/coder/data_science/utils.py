@@ -1,6 +1,78 @@
+import json
 import re
+from pathlib import Path
+
+from rdagent.core.experiment import FBWorkspace
+
+STAGE_CACHE_FILE = "stage_cache.py"
+USAGE_TRACKER_FILE = "test/usage_tracker.py"
 
 
 def remove_eda_part(stdout: str) -> str:
     """Data Science scenario have a LLM-based EDA feature. We can remove it when current task does not involve EDA"""
     return re.sub(r"=== Start of EDA part ===(.*)=== End of EDA part ===", "", stdout, flags=re.DOTALL)
+
+
+def inject_stage_cache(implementation: FBWorkspace) -> None:
+    """
+    Provide the stage cache runtime library (`share/stage_cache.py`) to the pipeline.
+    It is written before each run so that the pipeline always uses the current version. It is not registered in
+    `file_dict`, so it is neither part of the code shown to the LLM (`all_codes`) nor of the code hashes.
+    """
+    implementation.prepare()
+    code = (Path(__file__).parent / "share" / STAGE_CACHE_FILE).read_text()
+    (implementation.workspace_path / STAGE_CACHE_FILE).write_text(code)
+
+
+def usage_tracked_cmd(implementation: FBWorkspace, script: str = "main.py") -> str:
+    """
+    Inject the usage tracker (`share/usage_tracker.py`) and return the command running the script under it.
+    The files used by the script are then read with `read_used_files`.
+    """
+    code = (Path(__file__).parent / "share" / Path(USAGE_TRACKER_FILE).name).read_text()
+    implementation.inject_files(**{USAGE_TRACKER_FILE: code})
+    return f"python {USAGE_TRACKER_FILE} {script}"
+
+
+def read_usage_manifest(workspace_path: Path) -> dict | None:
+    """The manifest written by the last run of `usage_tracked_cmd`; None if the run did not write it."""
+    manifest_fp = workspace_path / "used_files.json"
+    if not manifest_fp.exists():
+        return None
+    try:
+        return json.loads(manifest_fp.read_text())
+    except ValueError:
+        return None
+
+
+def read_peak_memory_mb(workspace_path: Path) -> float | None:
+    """The peak memory of the last run of `usage_tracked_cmd`; None if the run did not record it."""
+    manifest = read_usage_manifest(workspace_path)
+    return manifest.get("peak_memory_mb") if manifest is not None else None
+
+
+def read_used_files(workspace_path: Path) -> set[str] | None:
+    """The workspace files used by the last run of `usage_tracked_cmd`; None if the run did not record them."""
+    manifest = read_usage_manifest(workspace_path)
+    (workspace_path / "used_files.json").unlink(missing_ok=True)
+    if manifest is None or "files" not in manifest:
+        return None
+    return set(manifest["files"])
+
+
+def stage_cache_report(workspace_path: Path) -> str | None:
+    """Summarize the cache hits recorded by the stage cache during the last run."""
+    stats_fp = workspace_path / "stage_cache.json"
+    if not stats_fp.exists():
+        return None
+    try:
+        records = json.loads(stats_fp.read_text())
+    except ValueError:
+        return None
+    parts = []
+    for r in records:
+        if r["hit"]:
+            parts.append(f"{r['stage']} hit (loaded in {r['seconds']:.1f}s, saved {r['saved_seconds']:.1f}s)")
+        else:
+            parts.append(f"{r['stage']} miss (computed in {r['seconds']:.1f}s)")
+    return "Stage cache: " + "; ".join(parts) + "." if parts else None
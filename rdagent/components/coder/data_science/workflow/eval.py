@@ -1,4 +1,3 @@
-import json
 import re
 from pathlib import Path
 
@@ -11,7 +10,11 @@ from rdagent.components.coder.CoSTEER.evaluators import (
     CoSTEERSingleFeedback,
 )
 from rdagent.components.coder.data_science.conf import get_clear_ws_cmd, get_ds_env
-from rdagent.components.coder.data_science.utils import remove_eda_part
+from rdagent.components.coder.data_science.utils import (
+    read_used_files,
+    remove_eda_part,
+    usage_tracked_cmd,
+)
 from rdagent.core.evolving_framework import QueriedKnowledge
 from rdagent.core.experiment import FBWorkspace, Task
 from rdagent.log import rdagent_logger as logger
@@ -68,7 +71,7 @@ class WorkflowGeneralCaseSpecEvaluator(CoSTEEREvaluator):
         # Clean the scores.csv & submission.csv.
         implementation.execute(env=env, entry=get_clear_ws_cmd())
 
-        stdout = implementation.execute(env=env, entry=f"python -m coverage run main.py")
+        stdout = implementation.execute(env=env, entry=usage_tracked_cmd(implementation))
 
         # remove EDA part
         stdout = remove_eda_part(stdout)
@@ -80,11 +83,8 @@ class WorkflowGeneralCaseSpecEvaluator(CoSTEEREvaluator):
         if not score_fp.exists():
             score_check_text = "[Error] Metrics file (scores.csv) is not generated!"
             score_ret_code = 1
-            implementation.execute(env=env, entry="python -m coverage json -o coverage.json")
-            coverage_report_path = implementation.workspace_path / "coverage.json"
-            if coverage_report_path.exists():
-                used_files = set(json.loads(coverage_report_path.read_text())["files"].keys())
-                coverage_report_path.unlink()
+            used_files = read_used_files(implementation.workspace_path)
+            if used_files is not None:
                 logger.info(f"All used scripts: {used_files}")
                 if len(used_files) == 1:
                     score_check_text += f"\n[Error] The only used script is {used_files}.\nPlease check if you have implemented entry point in 'main.py'."
@@ -0,0 +1,201 @@
+"""
+Approximate nearest neighbour index for normalized embeddings, implemented with NumPy only.
+
+`IVFIndex` partitions the vectors with a coarse spherical k-means quantizer (inverted file) and only scans the
+`nprobe` lists closest to the query. Optionally the residuals to the coarse centroids are product quantized,
+so the candidates can be scored from uint8 codes with lookup tables and only the best ones are re-ranked exactly.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from rdagent.components.knowledge_management.cluster import (
+    assign_to_centroids,
+    spherical_minibatch_kmeans,
+)
+
+
+def _euclidean_kmeans(x: np.ndarray, k: int, n_iter: int, rng: np.random.Generator) -> np.ndarray:
+    """Plain Lloyd iterations; used to train the product quantizer codebooks."""
+    k = min(k, x.shape[0])
+    centroids = x[rng.choice(x.shape[0], size=k, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = _nearest_euclidean(x, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, x)
+        counts = np.bincount(labels, minlength=k)
+        non_empty = counts > 0
+        centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+    return centroids
+
+
+def _nearest_euclidean(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # argmin ||x - c||^2 == argmin ||c||^2 - 2 x.c
+    return np.argmin((centroids**2).sum(axis=1)[None, :] - 2 * x @ centroids.T, axis=1)
+
+
+class IVFIndex:
+    """
+    Inverted file index with optional product quantized residuals.
+
+    Parameters
+    ----------
+    nlist : int, optional
+        Number of coarse clusters. Defaults to sqrt(n) at training time.
+    nprobe : int
+        Number of clusters scanned per query; the recall/latency knob.
+    pq_m : int
+        Number of product quantizer sub-spaces; 0 disables PQ and candidates are scored exactly.
+    pq_ksub : int
+        Centroids per sub-space (at most 256 so that codes fit in uint8).
+    rerank : int
+        With PQ, the best `rerank * k` candidates are re-scored exactly when the vectors are given.
+    """
+
+    def __init__(
+        self,
+        nlist: int | None = None,
+        nprobe: int = 8,
+        pq_m: int = 0,
+        pq_ksub: int = 256,
+        rerank: int = 8,
+        seed: int = 42,
+    ) -> None:
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.pq_m = pq_m
+        self.pq_ksub = min(pq_ksub, 256)
+        self.rerank = rerank
+        self.seed = seed
+
+        self.centroids: np.ndarray | None = None
+        self.codebooks: np.ndarray | None = None  # (pq_m, pq_ksub, dsub)
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.codes = np.zeros((0, max(pq_m, 0)), dtype=np.uint8)
+        self.n_trained = 0
+        # CSR view of the inverted lists, rebuilt lazily after inserts
+        self._order: np.ndarray | None = None
+        self._offsets: np.ndarray | None = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return int(self.assign.shape[0])
+
+    def train(self, x: np.ndarray) -> None:
+        """Train the quantizers on `x` (row-normalized) and index all its rows."""
+        rng = np.random.default_rng(self.seed)
+        nlist = self.nlist or max(1, int(np.sqrt(x.shape[0])))
+        self.centroids, labels = spherical_minibatch_kmeans(x, nlist, seed=self.seed)
+        if self.pq_m:
+            if x.shape[1] % self.pq_m:
+                raise ValueError(f"The dimension {x.shape[1]} is not divisible by pq_m={self.pq_m}.")
+            residual = x - self.centroids[labels]
+            sample = residual[rng.choice(x.shape[0], size=min(x.shape[0], 20000), replace=False)]
+            self.codebooks = np.stack(
+                [
+                    _euclidean_kmeans(sub, self.pq_ksub, n_iter=15, rng=rng)
+                    for sub in np.split(sample, self.pq_m, axis=1)
+                ]
+            )
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.codes = np.zeros((0, self.pq_m), dtype=np.uint8)
+        self.n_trained = x.shape[0]
+        self.add(x, labels=labels)
+
+    def _encode(self, x: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        residual = x - self.centroids[labels]
+        subs = np.split(residual, self.pq_m, axis=1)
+        return np.stack(
+            [_nearest_euclidean(sub, codebook) for sub, codebook in zip(subs, self.codebooks)], axis=1
+        ).astype(np.uint8)
+
+    def add(self, x: np.ndarray, labels: np.ndarray | None = None) -> None:
+        """Append rows; their ids continue after the existing ones."""
+        if not self.is_trained:
+            raise RuntimeError("The index must be trained before adding vectors.")
+        if x.shape[0] == 0:
+            return
+        labels = assign_to_centroids(x, self.centroids) if labels is None else labels
+        self.assign = np.concatenate([self.assign, labels.astype(np.int32)])
+        if self.pq_m:
+            self.codes = np.concatenate([self.codes, self._encode(x, labels)])
+        self._order = None
+
+    def _lists(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._order is None:
+            self._order = np.argsort(self.assign, kind="stable")
+            counts = np.bincount(self.assign, minlength=self.centroids.shape[0])
+            self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        return self._order, self._offsets
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        nprobe: int | None = None,
+        vectors: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the ids and scores (inner products) of the approximate `k` nearest rows of one normalized query.
+
+        `vectors` are the indexed rows. They are required without PQ, and used for exact re-ranking with PQ.
+        """
+        nprobe = min(nprobe or self.nprobe, self.centroids.shape[0])
+        order, offsets = self._lists()
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        candidates = np.concatenate([order[offsets[p] : offsets[p + 1]] for p in probes])
+        if candidates.size == 0:
+            return candidates, np.zeros(0, dtype=np.float32)
+
+        if self.pq_m:
+            tables = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.pq_m, -1))
+            scores = centroid_scores[self.assign[candidates]] + tables[
+                np.arange(self.pq_m), self.codes[candidates]
+            ].sum(axis=1)
+            if vectors is not None:
+                keep = min(candidates.size, self.rerank * k)
+                top = np.argpartition(-scores, keep - 1)[:keep]
+                candidates = candidates[top]
+                scores = vectors[candidates] @ query
+        else:
+            if vectors is None:
+                raise ValueError("vectors are required when product quantization is disabled.")
+            scores = vectors[candidates] @ query
+
+        if k < candidates.size:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        best = np.argsort(-scores, kind="stable")
+        return candidates[best], scores[best]
+
+    def save(self, path: str | Path) -> None:
+        arrays = {
+            "params": np.array(
+                [self.nlist or 0, self.nprobe, self.pq_m, self.pq_ksub, self.rerank, self.seed, self.n_trained]
+            ),
+            "centroids": self.centroids,
+            "assign": self.assign,
+            "codes": self.codes,
+        }
+        if self.codebooks is not None:
+            arrays["codebooks"] = self.codebooks
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str | Path) -> IVFIndex:
+        data = np.load(path)
+        nlist, nprobe, pq_m, pq_ksub, rerank, seed, n_trained = (int(v) for v in data["params"])
+        index = cls(nlist=nlist or None, nprobe=nprobe, pq_m=pq_m, pq_ksub=pq_ksub, rerank=rerank, seed=seed)
+        index.centroids = data["centroids"]
+        index.assign = data["assign"]
+        index.codes = data["codes"]
+        index.codebooks = data["codebooks"] if "codebooks" in data else None
+        index.n_trained = n_trained
+        return index
@@ -0,0 +1,308 @@
+"""
+Clustering utilities for embedding based deduplication.
+
+All functions work on cosine similarity. The input embeddings are normalized once and the
+k-means variants keep unit-norm centroids (spherical k-means), so every assignment is a
+single matrix product instead of a pairwise distance computation.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from rdagent.log import rdagent_logger as logger
+from rdagent.oai.llm_conf import LLM_SETTINGS
+from rdagent.oai.llm_utils import APIBackend
+
+
+def normalize_rows(x: np.ndarray | list) -> np.ndarray:
+    """L2-normalize every row of `x` and return it as a float32 matrix. Zero rows are kept as zero."""
+    x = np.asarray(x, dtype=np.float32)
+    if x.ndim == 1:
+        x = x.reshape(1, -1)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def embed_contents(contents: list[str], batch_size: int | None = None) -> np.ndarray:
+    """
+    Embed all contents once and return the normalized embedding matrix.
+
+    The contents are sent in batches of `batch_size` (`LLM_SETTINGS.embedding_max_str_num` by default)
+    so that the embedding cache of the API backend is used and the request size stays bounded.
+    """
+    if not contents:
+        return np.zeros((0, 0), dtype=np.float32)
+    batch_size = LLM_SETTINGS.embedding_max_str_num if batch_size is None else batch_size
+    embeddings: list[list[float]] = []
+    for i in range(0, len(contents), batch_size):
+        embeddings.extend(APIBackend().create_embedding(input_content=contents[i : i + batch_size]))
+    return normalize_rows(embeddings)
+
+
+def assign_to_centroids(x: np.ndarray, centroids: np.ndarray, block_size: int = 4096) -> np.ndarray:
+    """Assign each row of `x` to its most similar centroid, processing `block_size` rows at a time."""
+    labels = np.empty(x.shape[0], dtype=np.int64)
+    for start in range(0, x.shape[0], block_size):
+        labels[start : start + block_size] = np.argmax(x[start : start + block_size] @ centroids.T, axis=1)
+    return labels
+
+
+def _kmeans_plus_plus(x: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding with cosine distance."""
+    chosen = [int(rng.integers(x.shape[0]))]
+    best_similarity = x @ x[chosen[0]]
+    for _ in range(1, k):
+        distance = np.clip(1 - best_similarity, 0, None)
+        total = distance.sum()
+        idx = int(rng.choice(x.shape[0], p=distance / total)) if total > 0 else int(rng.integers(x.shape[0]))
+        chosen.append(idx)
+        best_similarity = np.maximum(best_similarity, x @ x[idx])
+    return x[chosen].copy()
+
+
+def _grow_centroids(
+    x: np.ndarray,
+    centroids: np.ndarray,
+    labels: np.ndarray,
+    k: int,
+) -> np.ndarray:
+    """
+    Warm start for a larger `k`: keep the existing centroids and split the largest clusters.
+
+    Each new centroid is the member of a large cluster that is least similar to its current centroid.
+    """
+    n_new = k - centroids.shape[0]
+    if n_new <= 0:
+        return centroids[:k]
+    own_similarity = np.einsum("ij,ij->i", x, centroids[labels])
+    sizes = np.bincount(labels, minlength=centroids.shape[0])
+    new_centroids = []
+    used: set[int] = set()
+    for cluster in np.argsort(-sizes, kind="stable"):
+        if len(new_centroids) >= n_new:
+            break
+        members = np.flatnonzero(labels == cluster)
+        if members.size < 2:
+            continue
+        farthest = int(members[np.argmin(own_similarity[members])])
+        if farthest not in used:
+            used.add(farthest)
+            new_centroids.append(x[farthest])
+    # Fewer splittable clusters than required: fall back to the globally least represented points.
+    for idx in np.argsort(own_similarity, kind="stable"):
+        if len(new_centroids) >= n_new:
+            break
+        if int(idx) not in used:
+            used.add(int(idx))
+            new_centroids.append(x[idx])
+    return np.vstack([centroids, np.asarray(new_centroids, dtype=centroids.dtype).reshape(-1, x.shape[1])])
+
+
+def spherical_minibatch_kmeans(
+    x: np.ndarray,
+    k: int,
+    init_centroids: np.ndarray | None = None,
+    batch_size: int = 1024,
+    max_iter: int = 100,
+    tol: float = 1e-4,
+    seed: int = 42,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mini-batch k-means on the unit sphere.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Row-normalized data.
+    k : int
+        Number of clusters (capped at the number of rows).
+    init_centroids : np.ndarray, optional
+        Centroids of a previous run. When fewer than `k` are given, the largest clusters are split,
+        so consecutive runs with increasing `k` reuse the previous solution.
+    batch_size : int
+        Rows per update. When the data is not larger than a batch, full Lloyd iterations are used.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The normalized centroids and the label of every row.
+    """
+    n = x.shape[0]
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+    if init_centroids is None:
+        centroids = _kmeans_plus_plus(x, k, rng)
+    else:
+        centroids = _grow_centroids(x, init_centroids, assign_to_centroids(x, init_centroids), k)
+
+    full_batch = n <= batch_size
+    counts = np.zeros(k, dtype=np.float64)
+    for _ in range(max_iter):
+        batch = x if full_batch else x[rng.choice(n, size=batch_size, replace=False)]
+        batch_labels = np.argmax(batch @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, batch_labels, batch)
+        batch_counts = np.bincount(batch_labels, minlength=k).astype(np.float64)
+        non_empty = batch_counts > 0
+
+        new_centroids = centroids.copy()
+        if full_batch:
+            new_centroids[non_empty] = sums[non_empty]
+        else:
+            counts += batch_counts
+            eta = np.zeros(k)
+            eta[non_empty] = batch_counts[non_empty] / counts[non_empty]
+            means = np.zeros_like(centroids)
+            means[non_empty] = sums[non_empty] / batch_counts[non_empty, None]
+            new_centroids = (1 - eta[:, None]) * centroids + eta[:, None] * means
+        new_centroids = normalize_rows(new_centroids)
+
+        shift = float(np.max(1 - np.einsum("ij,ij->i", new_centroids, centroids)))
+        centroids = new_centroids
+        if shift < tol:
+            break
+    return centroids, assign_to_centroids(x, centroids)
+
+
+def labels_to_groups(labels: np.ndarray) -> list[list[int]]:
+    """Convert labels into index groups sorted by group size, largest first."""
+    groups: dict[int, list[int]] = {}
+    for index, label in enumerate(labels.tolist()):
+        groups.setdefault(label, []).append(index)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def kmeans_groups_with_max_size(
+    x: np.ndarray,
+    max_group_size: int,
+    k_min: int = 1,
+    k_max: int | None = None,
+    seed: int = 42,
+) -> list[list[int]]:
+    """
+    Find the smallest `k` in [k_min, k_max) whose largest cluster has fewer than `max_group_size` members.
+
+    Every `k` is warm started from the centroids of `k - 1`, so the search costs roughly one k-means
+    run plus a few refinement iterations per step instead of a fresh run for each candidate.
+    If no `k` satisfies the constraint, the groups of the last tried `k` are returned.
+    """
+    n = x.shape[0]
+    if n == 0:
+        return []
+    if n < max_group_size:
+        return [list(range(n))]
+    k_min = max(1, k_min)
+    k_max = n if k_max is None else min(k_max, n)
+    centroids = None
+    groups = [list(range(n))]
+    for k in range(k_min, max(k_min + 1, k_max)):
+        centroids, labels = spherical_minibatch_kmeans(x, k, init_centroids=centroids, seed=seed)
+        groups = labels_to_groups(labels)
+        if len(groups[0]) < max_group_size:
+            logger.info(f"K-means group number: {k}")
+            break
+    return groups
+
+
+def sampled_silhouette_score(
+    x: np.ndarray,
+    labels: np.ndarray,
+    sample_size: int = 1000,
+    seed: int = 42,
+) -> float:
+    """
+    Cosine silhouette score estimated on at most `sample_size` rows.
+
+    The sampled rows are compared against all rows, so the cost is O(sample_size * n) instead of O(n^2).
+    """
+    n = x.shape[0]
+    unique_labels, compact_labels = np.unique(labels, return_inverse=True)
+    if unique_labels.size < 2 or unique_labels.size >= n:
+        return 0.0
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(n, size=min(sample_size, n), replace=False)
+
+    order = np.argsort(compact_labels, kind="stable")
+    sizes = np.bincount(compact_labels)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    distances = 1 - x[sample] @ x[order].T
+    cluster_sums = np.add.reduceat(distances, starts, axis=1)
+
+    own = compact_labels[sample]
+    own_sizes = sizes[own]
+    a = cluster_sums[np.arange(sample.size), own] / np.maximum(own_sizes - 1, 1)
+    mean_to_cluster = cluster_sums / sizes[None, :]
+    mean_to_cluster[np.arange(sample.size), own] = np.inf
+    b = mean_to_cluster.min(axis=1)
+    s = np.where(own_sizes > 1, (b - a) / np.maximum(np.maximum(a, b), 1e-12), 0.0)
+    return float(s.mean())
+
+
+def select_k_by_silhouette(
+    x: np.ndarray,
+    candidate_ks: list[int],
+    sample_size: int = 1000,
+    seed: int = 42,
+) -> tuple[int, np.ndarray]:
+    """
+    Run warm-started k-means over increasing `candidate_ks` and return the `k` with the best sampled silhouette.
+    """
+    best_k, best_labels, best_score = 1, np.zeros(x.shape[0], dtype=np.int64), -np.inf
+    centroids = None
+    for k in sorted(set(candidate_ks)):
+        if k < 2 or k >= x.shape[0]:
+            continue
+        centroids, labels = spherical_minibatch_kmeans(x, k, init_centroids=centroids, seed=seed)
+        score = sampled_silhouette_score(x, labels, sample_size=sample_size, seed=seed)
+        if score > best_score:
+            best_k, best_labels, best_score = k, labels, score
+    return best_k, best_labels
+
+
+class _UnionFind:
+    def __init__(self, n: int) -> None:
+        self.parent = np.arange(n)
+
+    def find(self, i: int) -> int:
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return int(root)
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def threshold_groups(
+    x: np.ndarray,
+    similarity_threshold: float = 0.9,
+    topk: int = 10,
+    block_size: int = 1024,
+) -> list[list[int]]:
+    """
+    Group near-duplicate rows with union-find over a top-k nearest neighbour graph.
+
+    Two rows are linked when one is among the `topk` most similar rows of the other and their cosine similarity
+    is at least `similarity_threshold`. Groups are the connected components, sorted by size, largest first.
+    """
+    n = x.shape[0]
+    uf = _UnionFind(n)
+    kth = min(topk + 1, n)
+    for start in range(0, n, block_size):
+        sims = x[start : start + block_size] @ x.T
+        rows = np.arange(sims.shape[0])
+        sims[rows, rows + start] = -np.inf
+        if kth < n:
+            neighbors = np.argpartition(-sims, kth - 1, axis=1)[:, :kth]
+        else:
+            neighbors = np.broadcast_to(np.arange(n), (sims.shape[0], n))
+        for row, cols in zip(rows, neighbors):
+            for col in cols[sims[row, cols] >= similarity_threshold]:
+                uf.union(start + int(row), int(col))
+    return labels_to_groups(np.array([uf.find(i) for i in range(n)]))
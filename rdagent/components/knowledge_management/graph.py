@@ -2,15 +2,17 @@ from __future__ import annotations
 
 import pickle
 import random
-from collections import deque
 from pathlib import Path
 from typing import Any, NoReturn
 
+import numpy as np
+from scipy.spatial.distance import cosine
+
+from rdagent.components.knowledge_management.graph_store import GraphStore
 from rdagent.components.knowledge_management.vector_base import (
     KnowledgeMetaData,
     PDVectorBase,
     VectorBase,
-    cosine,
 )
 from rdagent.core.knowledge_base import KnowledgeBase
 from rdagent.log import rdagent_logger as logger
@@ -54,12 +56,59 @@ class UndirectedNode(Node):
 class Graph(KnowledgeBase):
     """
     base Graph class for Knowledge Graph Search
+
+    Besides `nodes` (id -> node), the graph keeps hash indexes on (content, label), content and label
+    so that exact lookups do not scan all the nodes. The indexes are derived data: they are rebuilt
+    whenever the graph is loaded or unpickled, so old pickles keep working.
+
+    `version` is increased by every mutation (new node, new edge, clear), so query results can be
+    cached by callers with the version as part of the key.
     """
 
     def __init__(self, path: str | Path | None = None) -> None:
         self.nodes = {}
+        self.version = 0
+        self._pending_nodes: list[Node] = []  # nodes waiting for their embedding, see `flush`
+        self._init_index()
         super().__init__(path=path)
 
+    def _init_index(self) -> None:
+        self._content_label_index: dict[tuple[str, str], str] = {}
+        self._content_index: dict[str, str] = {}
+        self._label_index: dict[str, dict[str, None]] = {}  # label -> ordered set of node ids
+        # compact integer ids, in insertion order, used by the adjacency arrays
+        self._int_ids: dict[str, int] = {}
+        self._id_list: list[str] = []
+
+    def _index_node(self, node: Node) -> None:
+        if node.id not in self._int_ids:
+            self._int_ids[node.id] = len(self._id_list)
+            self._id_list.append(node.id)
+        # setdefault keeps the first inserted node, as the former linear scans did
+        self._content_label_index.setdefault((node.content, node.label), node.id)
+        self._content_index.setdefault(node.content, node.id)
+        self._label_index.setdefault(node.label, {})[node.id] = None
+
+    def _rebuild_index(self) -> None:
+        self.__dict__.setdefault("_pending_nodes", [])
+        self.__dict__.setdefault("version", 0)
+        self._init_index()
+        for node in self.nodes.values():
+            self._index_node(node)
+
+    def _register_node(self, node: Node) -> None:
+        self.version += 1
+        self.nodes[node.id] = node
+        self._index_node(node)
+
+    def load(self) -> None:
+        super().load()
+        self._rebuild_index()
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._rebuild_index()
+
     def size(self) -> int:
         return len(self.nodes)
 
@@ -73,17 +122,20 @@ class Graph(KnowledgeBase):
         return list(self.nodes.values())
 
     def get_all_nodes_by_label_list(self, label_list: list[str]) -> list[Node]:
+        if len(label_list) == 1:
+            return [self.nodes[node_id] for node_id in self._label_index.get(label_list[0], {})]
+        # keep the insertion order of the nodes across labels
         return [node for node in self.nodes.values() if node.label in label_list]
 
     def find_node(self, content: str, label: str) -> Node | None:
-        for node in self.nodes.values():
-            if node.content == content and node.label == label:
-                return node
-        return None
+        node_id = self._content_label_index.get((content, label))
+        return None if node_id is None else self.nodes.get(node_id)
 
     @staticmethod
     def batch_embedding(nodes: list[Node]) -> list[Node]:
-        contents = [node.content for node in nodes]
+        """Create the embeddings of the nodes which do not have one yet, in bulk calls."""
+        to_embed = [node for node in nodes if node.embedding is None]
+        contents = [node.content for node in to_embed]
         # openai create embedding API input's max length is 16
         size = 16
         embeddings = []
@@ -96,8 +148,8 @@ class Graph(KnowledgeBase):
                 APIBackend().create_embedding(input_content=contents[i : i + size]),
             )
 
-        assert len(nodes) == len(embeddings), "nodes' length must equals embeddings' length"
-        for node, embedding in zip(nodes, embeddings):
+        assert len(to_embed) == len(embeddings), "nodes' length must equals embeddings' length"
+        for node, embedding in zip(to_embed, embeddings):
             node.embedding = embedding
         return nodes
 
@@ -108,8 +160,33 @@ class Graph(KnowledgeBase):
 class UndirectedGraph(Graph):
     """
     Undirected Graph which edges have no relationship
+
+    When `path` has no suffix, the graph is stored in a folder by `GraphStore` (node and edge tables plus an
+    embedding matrix, saved incrementally); otherwise the whole object is pickled. Loading a pickle and dumping
+    it to a folder path migrates it.
     """
 
+    # attributes stored as tables by `GraphStore` or derived from them
+    _STORED_AS_TABLES = frozenset(
+        {
+            "path",
+            "nodes",
+            "vector_base",
+            "_pending_nodes",
+            "_content_label_index",
+            "_content_index",
+            "_label_index",
+            "_int_ids",
+            "_id_list",
+            "_indptr",
+            "_indices",
+            "_delta_adjacency",
+            "_n_delta_edges",
+            "_edges",
+            "_stored",
+        }
+    )
+
     def __init__(self, path: str | Path | None = None) -> None:
         self.vector_base: VectorBase = PDVectorBase()
         super().__init__(path=path)
@@ -117,6 +194,140 @@ class UndirectedGraph(Graph):
     def __str__(self) -> str:
         return f"UndirectedGraph(nodes={self.nodes})"
 
+    def _init_index(self) -> None:
+        super()._init_index()
+        # CSR adjacency over the integer ids, built lazily from the nodes' neighbor sets. The neighbors of each
+        # node are sorted by content so that traversals are deterministic. Edges added after the last build
+        # are kept in a small delta buffer until the next rebuild.
+        self._indptr: np.ndarray | None = None
+        self._indices: np.ndarray | None = None
+        self._delta_adjacency: dict[int, list[int]] = {}
+        self._n_delta_edges = 0
+        # edges as integer id pairs in insertion order, and what is already saved in a `GraphStore`
+        self._edges: list[tuple[int, int]] = []
+        self._stored: tuple[str, int, int] | None = None
+
+    def _rebuild_index(self) -> None:
+        super()._rebuild_index()
+        for i, node_id in enumerate(self._id_list):
+            for neighbor in self.nodes[node_id].neighbors:
+                j = self._int_ids.get(neighbor.id)
+                if j is not None and i < j:
+                    self._edges.append((i, j))
+
+    def _add_edge(self, node: UndirectedNode, neighbor: UndirectedNode) -> None:
+        if neighbor in node.neighbors:
+            return
+        node.add_neighbor(neighbor)
+        self.version += 1
+        i, j = self._int_ids[node.id], self._int_ids[neighbor.id]
+        self._edges.append((i, j))
+        if self._indptr is not None:
+            self._delta_adjacency.setdefault(i, []).append(j)
+            self._delta_adjacency.setdefault(j, []).append(i)
+            self._n_delta_edges += 1
+
+    def _adjacency(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._indptr is None or self._n_delta_edges > max(1024, self._indices.size // 8):
+            n = len(self._id_list)
+            contents = [self.nodes[node_id].content for node_id in self._id_list]
+            rank = np.empty(n, dtype=np.int64)
+            rank[sorted(range(n), key=lambda i: (contents[i], i))] = np.arange(n)
+            src, dst = [], []
+            for i, node_id in enumerate(self._id_list):
+                for neighbor in self.nodes[node_id].neighbors:
+                    j = self._int_ids.get(neighbor.id)
+                    if j is not None:
+                        src.append(i)
+                        dst.append(j)
+            src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+            order = np.lexsort((rank[dst], src))
+            self._indices = dst[order]
+            self._indptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))])
+            self._delta_adjacency = {}
+            self._n_delta_edges = 0
+        return self._indptr, self._indices
+
+    def _neighbor_ids(self, i: int, indptr: np.ndarray, indices: np.ndarray) -> list[int]:
+        neighbors = indices[indptr[i] : indptr[i + 1]].tolist() if i + 1 < indptr.size else []
+        if i in self._delta_adjacency:
+            neighbors = sorted(
+                set(neighbors).union(self._delta_adjacency[i]),
+                key=lambda j: (self.nodes[self._id_list[j]].content, j),
+            )
+        return neighbors
+
+    def _reachable_ids(
+        self,
+        start: int,
+        steps: int,
+        allowed_labels: list[str] | None = None,
+    ) -> list[int]:
+        """
+        Level-synchronous BFS over the adjacency arrays; ids are returned in visiting order, start included.
+
+        With `allowed_labels`, the search only flows through nodes whose label is in it.
+        """
+        indptr, indices = self._adjacency()
+        label_allowed: dict[str, bool] = {}
+
+        def allowed(j: int) -> bool:
+            label = self.nodes[self._id_list[j]].label
+            if label not in label_allowed:
+                label_allowed[label] = label in allowed_labels
+            return label_allowed[label]
+
+        visited = {start}
+        order = [start]
+        frontier = [start]
+        for _ in range(steps):
+            next_frontier = []
+            for i in frontier:
+                for j in self._neighbor_ids(i, indptr, indices):
+                    if j not in visited and (allowed_labels is None or allowed(j)):
+                        visited.add(j)
+                        next_frontier.append(j)
+            if not next_frontier:
+                break
+            order.extend(next_frontier)
+            frontier = next_frontier
+        return order
+
+    def _insert(self, node: UndirectedNode) -> None:
+        """Register a new node; its embedding is deferred to the next `flush`."""
+        self._register_node(node)
+        self._pending_nodes.append(node)
+
+    def flush(self) -> None:
+        """
+        Embed the nodes added since the last flush in bulk calls and add them to the vector base.
+
+        It is called before every operation that needs the embeddings (semantic search, dump), so the nodes
+        inserted during one evolving step are embedded together instead of one round-trip per node.
+        """
+        if not self._pending_nodes:
+            return
+        pending, self._pending_nodes = self._pending_nodes, []
+        self.batch_embedding(pending)
+        self.vector_base.add(document=pending)
+
+    def stored_state(self) -> dict:
+        """The attributes which are not stored as node/edge/embedding tables by `GraphStore`."""
+        return {k: v for k, v in self.__dict__.items() if k not in self._STORED_AS_TABLES}
+
+    def load(self) -> None:
+        if GraphStore.is_store(self.path) and self.path.exists():
+            GraphStore(self.path).load(self)
+        else:
+            super().load()
+
+    def dump(self) -> None:
+        self.flush()
+        if GraphStore.is_store(self.path):
+            GraphStore(self.path).save(self)
+        else:
+            super().dump()
+
     def add_node(
         self,
         node: UndirectedNode,
@@ -145,9 +356,7 @@ class UndirectedGraph(Graph):
             # if len(same_node):
             #     node = same_node[0]
             # else:
-            node.create_embedding()
-            self.vector_base.add(document=node)
-            self.nodes.update({node.id: node})
+            self._insert(node)
 
         if neighbor is not None:
             if self.get_node(neighbor.id):
@@ -160,11 +369,9 @@ class UndirectedGraph(Graph):
                 # if len(same_node):
                 #     neighbor = same_node[0]
                 # else:
-                neighbor.create_embedding()
-                self.vector_base.add(document=neighbor)
-                self.nodes.update({neighbor.id: neighbor})
+                self._insert(neighbor)
 
-            node.add_neighbor(neighbor)
+            self._add_edge(node, neighbor)
 
     def add_nodes(self, node: UndirectedNode, neighbors: list[UndirectedNode]) -> None:
         if not neighbors:
@@ -178,21 +385,13 @@ class UndirectedGraph(Graph):
 
     def get_node_by_content(self, content: str) -> UndirectedNode | None:
         """
-        Get node by semantic distance
-        Parameters
-        ----------
-        content
-
-        Returns
-        -------
+        Get the first inserted node whose content is exactly `content`, whatever its label.
 
+        It used to be a semantic search with a 0.999 similarity threshold; the content index gives the same
+        exact matches without embedding the query.
         """
-        if content == "Model":
-            pass
-        match = self.semantic_search(node=content, similarity_threshold=0.999)
-        if match:
-            return match[0]
-        return None
+        node_id = self._content_index.get(content)
+        return None if node_id is None else self.nodes.get(node_id)
 
     def get_nodes_within_steps(
         self,
@@ -205,31 +404,13 @@ class UndirectedGraph(Graph):
         """
         Returns the nodes in the graph whose distance from node is less than or equal to step
         """
-        visited = set()
-        queue = deque([(start_node, 0)])
-        result = []
-
-        while queue:
-            node, current_steps = queue.popleft()
-
-            if current_steps > steps:
-                break
-
-            if node not in visited:
-                visited.add(node)
-                result.append(node)
-
-                for neighbor in sorted(
-                    self.get_node(node.id).neighbors,
-                    key=lambda x: x.content,
-                ):  # to make sure the result is deterministic
-                    if neighbor not in visited and not (block and neighbor.label not in constraint_labels):
-                        queue.append((neighbor, current_steps + 1))
-
+        start = self._int_ids.get(start_node.id)
+        if start is None:
+            return []
+        ids = self._reachable_ids(start, steps, allowed_labels=constraint_labels if block else None)
+        result = [self.nodes[self._id_list[i]] for i in ids[1:]]
         if constraint_labels:
             result = [node for node in result if node.label in constraint_labels]
-        if start_node in result:
-            result.remove(start_node)
         return result
 
     def get_nodes_intersection(
@@ -249,26 +430,17 @@ class UndirectedGraph(Graph):
 
         Returns
         -------
-
+        The nodes reachable from every node, in the order they are reached from the first one.
         """
         min_nodes_count = 2
         assert len(nodes) >= min_nodes_count, "nodes length must >=2"
-        intersection = None
-
-        for node in nodes:
-            if intersection is None:
-                intersection = self.get_nodes_within_steps(
-                    node,
-                    steps=steps,
-                    constraint_labels=constraint_labels,
-                )
+        intersection = self.get_nodes_within_steps(nodes[0], steps=steps, constraint_labels=constraint_labels)
+        for node in nodes[1:]:
+            if not intersection:
+                break
             intersection = self.intersection(
                 nodes1=intersection,
-                nodes2=self.get_nodes_within_steps(
-                    node,
-                    steps=steps,
-                    constraint_labels=constraint_labels,
-                ),
+                nodes2=self.get_nodes_within_steps(node, steps=steps, constraint_labels=constraint_labels),
             )
         return intersection
 
@@ -303,6 +475,7 @@ class UndirectedGraph(Graph):
         # Question: why do we need to convert to Node object first?
         if isinstance(node, str):
             node = UndirectedNode(content=node)
+        self.flush()
         docs, scores = self.vector_base.search(
             content=node.content,
             topk_k=topk_k,
@@ -312,7 +485,10 @@ class UndirectedGraph(Graph):
         return [self.get_node(doc.id) for doc in docs]
 
     def clear(self) -> None:
+        self.version += 1
         self.nodes.clear()
+        self._pending_nodes = []
+        self._init_index()
         self.vector_base: VectorBase = PDVectorBase()
 
     def query_by_node(
@@ -347,6 +523,7 @@ class UndirectedGraph(Graph):
             block=block,
         )
         if constraint_node is not None:
+            self.flush()
             for n in nodes:
                 if self.cal_distance(n, constraint_node) > constraint_distance:
                     return nodes
@@ -428,7 +605,8 @@ class UndirectedGraph(Graph):
 
     @staticmethod
     def intersection(nodes1: list[UndirectedNode], nodes2: list[UndirectedNode]) -> list[UndirectedNode]:
-        return [node for node in nodes1 if node in nodes2]
+        nodes2_set = set(nodes2)
+        return [node for node in nodes1 if node in nodes2_set]
 
     @staticmethod
     def different(nodes1: list[UndirectedNode], nodes2: list[UndirectedNode]) -> list[UndirectedNode]:
@@ -0,0 +1,201 @@
+"""
+Columnar on-disk storage for `UndirectedGraph` based knowledge bases.
+
+Instead of dill-dumping the whole object, a knowledge base is stored in a folder:
+
+.. code-block:: text
+
+    manifest.json          counts, embedding dimension and the list of parts
+    nodes/00000.parquet    id, content, label and appendix of the nodes, one part per save
+    edges/00000.parquet    (src, dst) positions of the nodes in the node table, one part per save
+    embedding.f32          raw float32 embeddings, one row per node, append-only
+    state.pkl              every other attribute (dill), nodes are referenced by id
+
+Saving only appends the nodes and edges added since the last save (or load) of the same folder, then
+rewrites the small `state.pkl` and the manifest. The manifest is replaced last, so an interrupted save
+leaves the previous version readable. On load the embeddings are memory-mapped, so they are only read
+from disk when a search touches them.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+import dill as pickle  # type: ignore[import-untyped]
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from rdagent.components.knowledge_management.graph import UndirectedGraph
+
+
+class _NodeRefPickler(pickle.Pickler):
+    """Pickle the nodes of `graph` as references, so the state does not duplicate the graph."""
+
+    def __init__(self, file: IO[bytes], graph: UndirectedGraph) -> None:
+        super().__init__(file)
+        self.graph = graph
+
+    def persistent_id(self, obj: Any) -> str | None:
+        node_id = getattr(obj, "id", None)
+        if isinstance(node_id, str) and self.graph.nodes.get(node_id) is obj:
+            return node_id
+        return None
+
+
+class _NodeRefUnpickler(pickle.Unpickler):
+    def __init__(self, file: IO[bytes], graph: UndirectedGraph) -> None:
+        super().__init__(file)
+        self.graph = graph
+
+    def persistent_load(self, pid: str) -> Any:
+        return self.graph.nodes[pid]
+
+
+class GraphStore:
+    MANIFEST_FILE = "manifest.json"
+    EMBEDDING_FILE = "embedding.f32"
+    STATE_FILE = "state.pkl"
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    @staticmethod
+    def is_store(path: str | Path | None) -> bool:
+        """Paths without a suffix are stored as folders; paths with one (e.g. `.pkl`) are pickles."""
+        return path is not None and Path(path).suffix == ""
+
+    def _read_manifest(self) -> dict | None:
+        manifest_path = self.path / self.MANIFEST_FILE
+        return json.loads(manifest_path.read_text()) if manifest_path.exists() else None
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp = self.path / f"{self.MANIFEST_FILE}.tmp"
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, self.path / self.MANIFEST_FILE)
+
+    def save(self, graph: UndirectedGraph, extra_state: dict | None = None) -> None:
+        """
+        Save `graph` and `extra_state` (attributes of an object holding the graph, e.g. a CoSTEER knowledge base).
+
+        The nodes of the graph found in `extra_state` are stored as references.
+        """
+        graph.flush()
+        manifest = self._read_manifest()
+        n_nodes = len(graph._id_list)
+        appendable = (
+            manifest is not None
+            and graph._stored == (str(self.path.resolve()), manifest["n_nodes"], manifest["n_edges"])
+            and manifest["n_nodes"] <= n_nodes
+        )
+        if not appendable:
+            for sub in ["nodes", "edges"]:
+                shutil.rmtree(self.path / sub, ignore_errors=True)
+            (self.path / self.EMBEDDING_FILE).unlink(missing_ok=True)
+            manifest = {"n_nodes": 0, "n_edges": 0, "dim": 0, "node_parts": [], "edge_parts": []}
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        new_nodes = [graph.nodes[node_id] for node_id in graph._id_list[manifest["n_nodes"] :]]
+        new_edges = graph._edges[manifest["n_edges"] :]
+        if new_nodes:
+            part = f"{len(manifest['node_parts']):05d}.parquet"
+            (self.path / "nodes").mkdir(exist_ok=True)
+            pd.DataFrame(
+                {
+                    "id": [node.id for node in new_nodes],
+                    "content": [node.content for node in new_nodes],
+                    "label": [node.label for node in new_nodes],
+                    "appendix": [
+                        None if getattr(node, "appendix", None) is None else pickle.dumps(node.appendix)
+                        for node in new_nodes
+                    ],
+                }
+            ).to_parquet(self.path / "nodes" / part)
+            manifest["node_parts"].append(part)
+            self._append_embeddings(new_nodes, manifest)
+        if new_edges:
+            part = f"{len(manifest['edge_parts']):05d}.parquet"
+            (self.path / "edges").mkdir(exist_ok=True)
+            pd.DataFrame(np.asarray(new_edges, dtype=np.int64), columns=["src", "dst"]).to_parquet(
+                self.path / "edges" / part
+            )
+            manifest["edge_parts"].append(part)
+        manifest["n_nodes"], manifest["n_edges"] = n_nodes, len(graph._edges)
+
+        buffer = io.BytesIO()
+        _NodeRefPickler(buffer, graph).dump({"graph": graph.stored_state(), "extra": extra_state or {}})
+        tmp = self.path / f"{self.STATE_FILE}.tmp"
+        tmp.write_bytes(buffer.getvalue())
+        os.replace(tmp, self.path / self.STATE_FILE)
+        self._write_manifest(manifest)
+        graph._stored = (str(self.path.resolve()), manifest["n_nodes"], manifest["n_edges"])
+
+    def _append_embeddings(self, nodes: list, manifest: dict) -> None:
+        dim = manifest["dim"] or next((len(node.embedding) for node in nodes if node.embedding is not None), 0)
+        matrix = np.zeros((len(nodes), dim), dtype=np.float32)
+        for row, node in enumerate(nodes):
+            if node.embedding is not None:
+                matrix[row] = node.embedding
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        with (self.path / self.EMBEDDING_FILE).open("ab") as f:
+            # drop the rows written by an interrupted save
+            f.truncate(manifest["n_nodes"] * dim * 4)
+            f.write((matrix / norms).tobytes())
+        manifest["dim"] = dim
+
+    def load(self, graph: UndirectedGraph) -> dict:
+        """Load the nodes, edges and state into the (empty) `graph` and return the extra state."""
+        from rdagent.components.knowledge_management.graph import UndirectedNode
+        from rdagent.components.knowledge_management.vector_base import PDVectorBase
+
+        manifest = self._read_manifest()
+        if manifest is None:
+            raise FileNotFoundError(f"No knowledge base stored in {self.path}")
+        n_nodes, dim = manifest["n_nodes"], manifest["dim"]
+        embeddings = (
+            np.memmap(self.path / self.EMBEDDING_FILE, dtype=np.float32, mode="r", shape=(n_nodes, dim))
+            if n_nodes and dim
+            else np.zeros((n_nodes, dim), dtype=np.float32)
+        )
+        node_df = pd.concat(
+            [pd.read_parquet(self.path / "nodes" / part) for part in manifest["node_parts"]]
+            or [pd.DataFrame(columns=["id", "content", "label", "appendix"])]
+        ).iloc[:n_nodes]
+
+        graph.nodes = {}
+        graph._pending_nodes = []
+        graph._init_index()
+        rows = []
+        for position, (node_id, content, label, appendix) in enumerate(
+            node_df[["id", "content", "label", "appendix"]].itertuples(index=False, name=None)
+        ):
+            node = UndirectedNode(content=content, label=label, embedding=embeddings[position])
+            node.id = node_id
+            node.appendix = None if appendix is None else pickle.loads(appendix)
+            graph.nodes[node_id] = node
+            graph._index_node(node)
+            rows.append({"id": node_id, "label": label, "content": content, "trunk": content})
+
+        for part in manifest["edge_parts"]:
+            edges = pd.read_parquet(self.path / "edges" / part).to_numpy()
+            for src, dst in edges.tolist():
+                if len(graph._edges) >= manifest["n_edges"]:
+                    break
+                graph.nodes[graph._id_list[src]].add_neighbor(graph.nodes[graph._id_list[dst]])
+                graph._edges.append((src, dst))
+
+        graph.vector_base = PDVectorBase()
+        if n_nodes and dim:
+            graph.vector_base._attach(rows, embeddings)
+
+        with (self.path / self.STATE_FILE).open("rb") as f:
+            state = _NodeRefUnpickler(f, graph).load()
+        graph.__dict__.update(state["graph"])
+        graph._stored = (str(self.path.resolve()), n_nodes, manifest["n_edges"])
+        return state["extra"]
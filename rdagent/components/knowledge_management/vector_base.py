@@ -2,9 +2,12 @@ import uuid
 from pathlib import Path
 from typing import List, Tuple, Union
 
+import dill as pickle  # type: ignore[import-untyped]
+import numpy as np
 import pandas as pd
-from scipy.spatial.distance import cosine
 
+from rdagent.components.knowledge_management.ann_index import IVFIndex
+from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.knowledge_base import KnowledgeBase
 from rdagent.log import rdagent_logger as logger
 from rdagent.oai.llm_utils import APIBackend
@@ -105,15 +108,105 @@ class VectorBase(KnowledgeBase):
 
 class PDVectorBase(VectorBase):
     """
-    Implement of VectorBase using Pandas
+    Implement of VectorBase using a NumPy matrix and a Pandas metadata table.
+
+    Embeddings are kept L2-normalized in a preallocated float32 matrix which grows geometrically,
+    so `add` is amortized O(1) and `search` is a single matrix-vector product followed by `argpartition`.
+    The remaining columns (id, label, content, ...) are kept in a row-aligned metadata table.
+
+    `vector_df` is still available as a read/write view for compatibility with the original
+    DataFrame-based implementation (and for loading its pickles).
     """
 
+    META_FILE = "meta.parquet"
+    EMBEDDING_FILE = "embedding.npy"
+    ANN_FILE = "ann_index.npz"
+
     def __init__(self, path: Union[str, Path] = None):
-        self.vector_df = pd.DataFrame(columns=["id", "label", "content", "embedding"])
+        self._init_storage()
         super().__init__(path)
 
+    def _init_storage(self, dim: int = 0, capacity: int = 0) -> None:
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._size = 0
+        self._meta_rows: list[dict] = []
+        self._labels: np.ndarray | None = None  # cache of the label column for filtering
+        self._ann: IVFIndex | None = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_matrix"] = np.array(self._matrix[: self._size])
+        state["_labels"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        # pickles of the DataFrame-based implementation only contain `vector_df`
+        vector_df = state.pop("vector_df", None)
+        self.__dict__.update(state)
+        if "_matrix" not in self.__dict__:
+            self._init_storage()
+        self.__dict__.setdefault("_ann", None)
+        if vector_df is not None:
+            self.vector_df = vector_df
+
+    @property
+    def vector_df(self) -> pd.DataFrame:
+        df = pd.DataFrame(self._meta_rows, columns=self._meta_columns())
+        df["embedding"] = list(self._matrix[: self._size])
+        return df
+
+    @vector_df.setter
+    def vector_df(self, df: pd.DataFrame) -> None:
+        self._init_storage()
+        rows = df.drop(columns=["embedding"]).to_dict("records") if "embedding" in df else df.to_dict("records")
+        if len(rows):
+            self._append(rows, np.vstack(df["embedding"].to_list()))
+
+    def _attach(self, rows: list[dict], matrix: np.ndarray) -> None:
+        """
+        Use `matrix` (row-normalized, e.g. a read-only memory map) as the storage without copying it.
+        It is copied into a growable matrix on the first append.
+        """
+        self._init_storage()
+        self._matrix = matrix
+        self._size = matrix.shape[0]
+        self._meta_rows = rows
+
+    def _meta_columns(self) -> list[str]:
+        columns = {"id": None, "label": None, "content": None}
+        for row in self._meta_rows:
+            columns.update(dict.fromkeys(row))
+        return list(columns)
+
+    def _append(self, rows: list[dict], embeddings: np.ndarray | list) -> None:
+        """Append metadata rows and their embeddings (one embedding per row)."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        assert len(rows) == embeddings.shape[0], "rows' length must equals embeddings' length"
+        if self._matrix.shape[1] != embeddings.shape[1]:
+            assert self._size == 0, "embedding dimension mismatch"
+            self._matrix = np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+        required = self._size + embeddings.shape[0]
+        if required > self._matrix.shape[0]:
+            capacity = max(required, 2 * self._matrix.shape[0], 16)
+            grown = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._matrix[self._size : required] = embeddings / norms
+        if self._ann is not None:
+            self._ann.add(self._matrix[self._size : required])
+        self._size = required
+        self._meta_rows.extend(rows)
+        self._labels = None
+
+    def __len__(self) -> int:
+        return self._size
+
     def shape(self):
-        return self.vector_df.shape
+        return self._size, len(self._meta_columns()) + 1
 
     def add(self, document: Union[Document, List[Document]]):
         """
@@ -126,34 +219,85 @@ class PDVectorBase(VectorBase):
         -------
 
         """
-        if isinstance(document, Document):
-            if document.embedding is None:
-                document.create_embedding()
-            docs = [
-                {
-                    "id": document.id,
-                    "label": document.label,
-                    "content": document.content,
-                    "trunk": document.content,
-                    "embedding": document.embedding,
-                }
-            ]
-            docs.extend(
-                [
-                    {
-                        "id": document.id,
-                        "label": document.label,
-                        "content": document.content,
-                        "trunk": trunk,
-                        "embedding": embedding,
-                    }
-                    for trunk, embedding in zip(document.trunks, document.trunks_embedding)
-                ]
+        documents = [document] if isinstance(document, Document) else document
+        rows, embeddings = [], []
+        for doc in documents:
+            if doc.embedding is None:
+                doc.create_embedding()
+            rows.append({"id": doc.id, "label": doc.label, "content": doc.content, "trunk": doc.content})
+            embeddings.append(doc.embedding)
+            for trunk, embedding in zip(doc.trunks, doc.trunks_embedding):
+                rows.append({"id": doc.id, "label": doc.label, "content": doc.content, "trunk": trunk})
+                embeddings.append(embedding)
+        if rows:
+            self._append(rows, embeddings)
+
+    def _search_by_embedding(
+        self,
+        embedding: np.ndarray,
+        topk_k: int | None = None,
+        similarity_threshold: float = 0,
+        constraint_labels: list[str] | None = None,
+    ) -> Tuple[List[Document], List]:
+        if topk_k is not None and self._ann_index() is not None:
+            res = self._approximate_search(embedding, topk_k, similarity_threshold, constraint_labels)
+            if res is not None:
+                return res
+
+        scores = self._matrix[: self._size] @ embedding
+        candidates = np.flatnonzero(scores > similarity_threshold)
+        if constraint_labels is not None:
+            if self._labels is None:
+                self._labels = np.array([row.get("label") for row in self._meta_rows], dtype=object)
+            candidates = candidates[np.isin(self._labels[candidates], constraint_labels)]
+        if topk_k is not None and topk_k < candidates.size:
+            candidates = candidates[np.argpartition(-scores[candidates], topk_k - 1)[:topk_k]]
+        # stable sort keeps the insertion order for ties, as `nlargest` did
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return self._to_documents(candidates), scores[candidates].tolist()
+
+    def _to_documents(self, rows: np.ndarray) -> List[Document]:
+        return [Document().from_dict({**self._meta_rows[i], "embedding": self._matrix[i].tolist()}) for i in rows]
+
+    def _ann_index(self) -> IVFIndex | None:
+        """
+        The approximate index is only used for large bases (`knowledge_ann_min_size`); smaller ones are searched
+        exactly. It is trained lazily and retrained when the base has grown 4 times since the last training.
+        """
+        min_size = RD_AGENT_SETTINGS.knowledge_ann_min_size
+        if min_size <= 0 or self._size < min_size:
+            return None
+        if self._ann is None or self._size > 4 * self._ann.n_trained:
+            self._ann = IVFIndex(
+                nprobe=RD_AGENT_SETTINGS.knowledge_ann_nprobe, pq_m=RD_AGENT_SETTINGS.knowledge_ann_pq_m
             )
-            self.vector_df = pd.concat([self.vector_df, pd.DataFrame(docs)], ignore_index=True)
-        else:
-            for doc in document:
-                self.add(document=doc)
+            self._ann.train(self._matrix[: self._size])
+        return self._ann
+
+    def _approximate_search(
+        self,
+        embedding: np.ndarray,
+        topk_k: int,
+        similarity_threshold: float,
+        constraint_labels: list[str] | None,
+    ) -> Tuple[List[Document], List] | None:
+        """
+        Search the approximate index. Returns None when the filters leave fewer than `topk_k` candidates,
+        so the caller falls back to the exact search.
+        """
+        # over-fetch so that the label filter still leaves enough candidates
+        fetch = topk_k if constraint_labels is None else 4 * topk_k
+        rows, scores = self._ann.search(embedding, fetch, vectors=self._matrix)
+        keep = scores > similarity_threshold
+        if constraint_labels is not None:
+            if self._labels is None:
+                self._labels = np.array([row.get("label") for row in self._meta_rows], dtype=object)
+            keep &= np.isin(self._labels[rows], constraint_labels)
+        rows, scores = rows[keep][:topk_k], scores[keep][:topk_k]
+        if rows.size < topk_k:
+            return None
+        return self._to_documents(rows), scores.tolist()
 
     def search(
         self,
@@ -182,27 +326,72 @@ class PDVectorBase(VectorBase):
             A list of `topk_k` nodes that are semantically similar to the input node, sorted by similarity score.
             All nodes shall meet the `similarity_threshold` and `constraint_labels` criteria.
         """
-        if not self.vector_df.shape[0]:
-            return [], []
-
-        document = Document(content=content)
-        document.create_embedding()
-
-        filtered_df = self.vector_df
-        if constraint_labels is not None:
-            filtered_df = self.vector_df[self.vector_df["label"].isin(constraint_labels)]
-
-        similarities = filtered_df["embedding"].apply(
-            lambda x: 1 - cosine(x, document.embedding)
-        )  # cosine is cosine distance, 1-similarity
-
-        searched_similarities = similarities[similarities > similarity_threshold]
-        if topk_k is not None:
-            searched_similarities = searched_similarities.nlargest(topk_k)
-        most_similar_docs = filtered_df.loc[searched_similarities.index]
-
-        docs = []
-        for _, similar_docs in most_similar_docs.iterrows():
-            docs.append(Document().from_dict(similar_docs.to_dict()))
-
-        return docs, searched_similarities.to_list()
+        return self.batch_search(
+            [content],
+            topk_k=topk_k,
+            similarity_threshold=similarity_threshold,
+            constraint_labels=constraint_labels,
+        )[0]
+
+    def batch_search(
+        self,
+        contents: List[str],
+        topk_k: int | None = None,
+        similarity_threshold: float = 0,
+        constraint_labels: list[str] | None = None,
+    ) -> List[Tuple[List[Document], List]]:
+        """
+        Same as `search` for several queries; all queries are embedded in one request.
+        """
+        if not self._size:
+            return [([], []) for _ in contents]
+        query_embeddings = np.asarray(APIBackend().create_embedding(input_content=list(contents)), dtype=np.float32)
+        if query_embeddings.ndim == 1:
+            query_embeddings = query_embeddings.reshape(1, -1)
+        norms = np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        query_embeddings = query_embeddings / norms
+        return [
+            self._search_by_embedding(
+                embedding,
+                topk_k=topk_k,
+                similarity_threshold=similarity_threshold,
+                constraint_labels=constraint_labels,
+            )
+            for embedding in query_embeddings
+        ]
+
+    def load(self) -> None:
+        if self.path is not None and self.path.is_dir():
+            self._init_storage()
+            meta_path = self.path / self.META_FILE
+            rows = pd.read_parquet(meta_path).to_dict("records") if meta_path.exists() else []
+            if rows:
+                self._append(rows, np.load(self.path / self.EMBEDDING_FILE))
+            if (self.path / self.ANN_FILE).exists():
+                ann = IVFIndex.load(self.path / self.ANN_FILE)
+                # an index that does not cover all the rows is stale; it is rebuilt on the next search
+                self._ann = ann if len(ann) == self._size else None
+        elif self.path is not None and self.path.exists():
+            with self.path.open("rb") as f:
+                loaded = pickle.load(f)
+            if isinstance(loaded, pd.DataFrame):
+                # the file is a `vector_df` saved by `to_pickle`
+                self.vector_df = loaded
+            else:
+                state = loaded if isinstance(loaded, dict) else loaded.__dict__
+                self.__setstate__({k: v for k, v in state.items() if k != "path"})
+
+    def dump(self) -> None:
+        """
+        Save the vector base. If `path` has no suffix, it is saved as a folder with the metadata as parquet
+        and the embedding matrix as npy; otherwise the whole object is pickled as other knowledge bases.
+        """
+        if self.path is not None and self.path.suffix == "":
+            self.path.mkdir(parents=True, exist_ok=True)
+            np.save(self.path / self.EMBEDDING_FILE, self._matrix[: self._size])
+            pd.DataFrame(self._meta_rows, columns=self._meta_columns()).to_parquet(self.path / self.META_FILE)
+            if self._ann is not None:
+                self._ann.save(self.path / self.ANN_FILE)
+        else:
+            super().dump()
@@ -3,7 +3,6 @@ Model workflow with session control
 It is from `rdagent/app/qlib_rd_loop/model.py` and try to replace `rdagent/app/qlib_rd_loop/RDAgent.py`
 """
 
-import asyncio
 from typing import Any
 
 from rdagent.components.workflow.conf import BasePropSetting
@@ -54,12 +53,10 @@ class RDLoop(LoopBase, metaclass=LoopMeta):
 
     # included steps
     async def direct_exp_gen(self, prev_out: dict[str, Any]):
-        while True:
-            if self.get_unfinished_loop_cnt(self.loop_idx) < RD_AGENT_SETTINGS.get_max_parallel():
-                hypo = self._propose()
-                exp = self._exp_gen(hypo)
-                return {"propose": hypo, "exp_gen": exp}
-            await asyncio.sleep(1)
+        await self.wait_for_free_slot()
+        hypo = self._propose()
+        exp = self._exp_gen(hypo)
+        return {"propose": hypo, "exp_gen": exp}
 
     def coding(self, prev_out: dict[str, Any]):
         exp = self.coder.develop(prev_out["direct_exp_gen"]["exp_gen"])
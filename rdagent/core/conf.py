@@ -53,6 +53,13 @@ class RDAgentSettings(ExtendedBaseSettings):
     max_output_duplicate_factor_group: int = 20
     max_kmeans_group_number: int = 40
 
+    # knowledge base vector search conf
+    knowledge_ann_min_size: int = 0
+    """Use the approximate (IVF) index for top-k search once a vector base has this many rows; 0 disables it"""
+    knowledge_ann_nprobe: int = 8
+    knowledge_ann_pq_m: int = 0
+    """number of product quantizer sub-spaces for the approximate index; 0 disables product quantization"""
+
     # workspace conf
     workspace_path: Path = Path.cwd() / "git_ignore_folder" / "RD-Agent_workspace"
 
@@ -89,6 +96,16 @@ class RDAgentSettings(ExtendedBaseSettings):
             return self.step_semaphore
         return max(self.step_semaphore.values())
 
+    # resource scheduling of the runs on the host (see `rdagent.utils.resource_scheduler`)
+    enable_resource_scheduler: bool = False
+    """Admit the environment runs of all the sessions on the host according to their CPU and memory requests"""
+    resource_scheduler_path: str | None = None
+    """the state file shared by the sessions of the host; a file in the temporary folder by default"""
+    resource_scheduler_cpus: int | None = None
+    """the CPU cores which may be leased; all the cores of the host by default"""
+    resource_scheduler_memory: str | None = None
+    """the memory which may be leased (e.g. "64g"); the physical memory of the host by default"""
+
     # NOTE: for debug
     # the following function only serves as debugging and is necessary in main logic.
     subproc_step: bool = False
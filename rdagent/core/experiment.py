@@ -68,6 +68,9 @@ ASpecificFeedback = TypeVar("ASpecificFeedback", bound=Feedback)
 class RunningInfo:
     result: object = None  # The result of the experiment, can be different types in different scenarios.
     running_time: float | None = None
+    cache_stats: dict | None = None  # The hit statistics of the caches used during the execution.
+    peak_memory_mb: float | None = None
+    debug_profile: object = None  # The profile of a debug run of the same code, e.g. to estimate the full run.
 
 
 class Workspace(ABC, Generic[ASpecificTask, ASpecificFeedback]):
@@ -265,15 +268,16 @@ class FBWorkspace(Workspace):
         result = self.run(env, entry)
         return result.stdout
 
-    def run(self, env: Env, entry: str) -> EnvResult:
+    def run(self, env: Env, entry: str, **kwargs: Any) -> EnvResult:
         """
         Execute the code in the environment and return an EnvResult object (stdout, exit_code, running_time).
+        The keyword arguments (e.g. `resources`) are passed to `Env.run`.
 
         Before each execution, make sure to prepare and inject code.
         """
         self.prepare()
         self.inject_files(**self.file_dict)
-        result = env.run(entry, str(self.workspace_path), env={"PYTHONPATH": "./"})
+        result = env.run(entry, str(self.workspace_path), env={"PYTHONPATH": "./"}, **kwargs)
         # result is EnvResult
         result.stdout = shrink_text(
             filter_redundant_text(result.stdout),
@@ -2,11 +2,9 @@
 
 from __future__ import annotations
 
-import asyncio
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Generic, TypeVar
 
-from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.evaluation import Feedback
 from rdagent.core.experiment import (
     ASpecificExp,
@@ -126,6 +124,85 @@ ASpecificScen = TypeVar("ASpecificScen", bound=Scenario)
 ASpecificKB = TypeVar("ASpecificKB", bound=KnowledgeBase)
 
 
+class _TraceIndex:
+    """
+    Lookups over `Trace.hist` and `Trace.dag_parent`, extended with the newly recorded nodes on each access.
+
+    The experiments are mapped by identity (`Experiment` does not override `__eq__`). Only the structure is cached,
+    so the index is rebuilt when the recorded prefix of `hist` or `dag_parent` is changed (e.g. `hist.insert(0, ...)`).
+    """
+
+    def __init__(self) -> None:
+        self.n_hist = 0
+        self.n_dag = 0
+        self.first_node: object = None
+        self.last_node: object = None
+        self.last_parents: tuple[int, ...] | None = None
+
+        self.exp_first_idx: dict[int, int] = {}  # id(experiment) -> first index in hist
+        self.exp_last_idx: dict[int, int] = {}  # id(experiment) -> last index in hist
+        self.last_accepted: int | None = None  # last node with a positive decision in the whole hist
+        self.children: dict[int, list[int]] = {}
+        self.leaves: set[int] = set()
+        # for the nodes recorded in both hist and dag_parent:
+        self.parent: list[int | None] = []  # the parent followed by `Trace.get_parents`
+        self.best: list[int | None] = []  # last node with a positive decision from the root to the node
+
+    def is_valid(self, hist: list, dag_parent: list[tuple[int, ...]]) -> bool:
+        return (
+            len(hist) >= self.n_hist
+            and len(dag_parent) >= self.n_dag
+            and (self.n_hist == 0 or (hist[0] is self.first_node and hist[self.n_hist - 1] is self.last_node))
+            and (self.n_dag == 0 or dag_parent[self.n_dag - 1] == self.last_parents)
+        )
+
+    @staticmethod
+    def accepted(node: Trace.NodeType | None) -> bool:
+        return node is not None and bool(node[1].decision)
+
+    def update(self, hist: list, dag_parent: list[tuple[int, ...]]) -> None:
+        for i in range(self.n_hist, len(hist)):
+            node = hist[i]
+            if node is not None:
+                self.exp_first_idx.setdefault(id(node[0]), i)
+                self.exp_last_idx[id(node[0])] = i
+            if self.accepted(node):
+                self.last_accepted = i
+            if i not in self.children:
+                self.leaves.add(i)
+        for i in range(self.n_dag, len(dag_parent)):
+            for p in dag_parent[i]:
+                self.children.setdefault(p, []).append(i)
+                self.leaves.discard(p)
+        for i in range(len(self.parent), min(len(hist), len(dag_parent))):
+            parents = dag_parent[i]
+            p = parents[0] if parents and parents[0] != i else None
+            self.parent.append(p)
+            if self.accepted(hist[i]):
+                self.best.append(i)
+            elif p is None:
+                self.best.append(None)
+            elif p < i:
+                self.best.append(self.best[p])
+            else:  # the parent is recorded after the child; not produced by the current code
+                self.best.append(self._scan_best(hist, dag_parent, p))
+
+        self.n_hist, self.n_dag = len(hist), len(dag_parent)
+        if hist:
+            self.first_node, self.last_node = hist[0], hist[-1]
+        if dag_parent:
+            self.last_parents = dag_parent[-1]
+
+    def _scan_best(self, hist: list, dag_parent: list[tuple[int, ...]], idx: int) -> int | None:
+        while True:
+            if self.accepted(hist[idx]):
+                return idx
+            parents = dag_parent[idx]
+            if not parents or parents[0] == idx:
+                return None
+            idx = parents[0]
+
+
 class Trace(Generic[ASpecificScen, ASpecificKB]):
     NodeType = tuple[Experiment, ExperimentFeedback]  # Define NodeType as a new type representing the tuple
     NEW_ROOT: tuple = ()
@@ -160,12 +237,27 @@ class Trace(Generic[ASpecificScen, ASpecificKB]):
         self.knowledge_base: ASpecificKB | None = knowledge_base
         self.current_selection: tuple[int, ...] = (-1,)
 
+    def __getstate__(self) -> dict:
+        # the index is derived from `hist` and `dag_parent` and rebuilt on demand
+        state = self.__dict__.copy()
+        state.pop("_index", None)
+        return state
+
+    def _get_index(self) -> _TraceIndex:
+        index: _TraceIndex | None = self.__dict__.get("_index")
+        if index is None or not index.is_valid(self.hist, self.dag_parent):
+            index = self._index = _TraceIndex()
+        if index.n_hist != len(self.hist) or index.n_dag != len(self.dag_parent):
+            index.update(self.hist, self.dag_parent)
+        return index
+
     def get_sota_hypothesis_and_experiment(self) -> tuple[Hypothesis | None, Experiment | None]:
         """Access the last experiment result, sub-task, and the corresponding hypothesis."""
         # TODO: The return value does not align with the signature.
-        for experiment, feedback in self.hist[::-1]:
-            if feedback.decision:
-                return experiment.hypothesis, experiment
+        idx = self._get_index().last_accepted
+        if idx is not None:
+            experiment = self.hist[idx][0]
+            return experiment.hypothesis, experiment
 
         return None, None
 
@@ -202,12 +294,21 @@ class Trace(Generic[ASpecificScen, ASpecificKB]):
         return [self.hist[i] for i in self.get_parents(selection[0])]
 
     def exp2idx(self, exp: Experiment | list[Experiment]) -> int | list[int] | None:
+        index = self._get_index()
         if isinstance(exp, list):
             exps: list[Experiment] = exp
 
             # keep the order
-            exp_to_index: dict[Experiment, int] = {_exp: i for i, (_exp, _) in enumerate(self.hist)}
-            return [exp_to_index[_exp] for _exp in exps]
+            idxs = []
+            for _exp in exps:
+                i = index.exp_last_idx.get(id(_exp))
+                if i is None or self.hist[i][0] is not _exp:
+                    raise KeyError(_exp)
+                idxs.append(i)
+            return idxs
+        i = index.exp_first_idx.get(id(exp))
+        if i is not None and self.hist[i][0] is exp:
+            return i
         for i, (_exp, _) in enumerate(self.hist):
             if _exp == exp:
                 return i
@@ -227,17 +328,38 @@ class Trace(Generic[ASpecificScen, ASpecificKB]):
         if self.is_selection_new_tree((child_idx,)):
             return []
 
-        ancestors: list[int] = []
-        curr = child_idx
-        while True:
-            ancestors.insert(0, curr)
-            parent_tuple = self.dag_parent[curr]
-            if not parent_tuple or parent_tuple[0] == curr:
-                break
-            curr = parent_tuple[0]
-
+        index = self._get_index()
+        ancestors: list[int] = [child_idx]
+        parent_tuple = self.dag_parent[child_idx]
+        curr = parent_tuple[0] if parent_tuple and parent_tuple[0] != child_idx else None
+        while curr is not None:
+            ancestors.append(curr)
+            if 0 <= curr < len(index.parent):
+                curr = index.parent[curr]
+            else:
+                parent_tuple = self.dag_parent[curr]
+                curr = parent_tuple[0] if parent_tuple and parent_tuple[0] != curr else None
+
+        ancestors.reverse()
         return ancestors
 
+    def get_best_ancestor(self, child_idx: int) -> int | None:
+        """
+        The last node with a positive decision on the path from the root to `child_idx` (included), i.e. the last
+        accepted node of `get_parents(child_idx)`.
+        """
+        if self.is_selection_new_tree((child_idx,)):
+            return None
+        index = self._get_index()
+        if 0 <= child_idx < len(index.best):
+            return index.best[child_idx]
+        if index.accepted(self.hist[child_idx]):
+            return child_idx
+        ancestors = self.get_parents(child_idx)[:-1]
+        if ancestors and ancestors[-1] < len(index.best):
+            return index.best[ancestors[-1]]
+        return next((i for i in reversed(ancestors) if index.accepted(self.hist[i])), None)
+
 
 class CheckpointSelector:
     """
@@ -318,10 +440,8 @@ class ExpGen(ABC):
         """
         # we give a default implementation here.
         # The proposal is set to try best to generate the experiment in max-parallel level.
-        while True:
-            if loop.get_unfinished_loop_cnt(loop.loop_idx) < RD_AGENT_SETTINGS.get_max_parallel():
-                return self.gen(trace)
-            await asyncio.sleep(1)
+        await loop.wait_for_free_slot()
+        return self.gen(trace)
 
 
 class HypothesisGen(ABC):
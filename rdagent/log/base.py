@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import abstractmethod
-from collections.abc import Generator
+from collections.abc import Callable, Generator
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -22,6 +22,37 @@ class Message:
     content: object  # The content
 
 
+class LazyMessage(Message):
+    """A message whose content is only loaded from the storage when it is accessed."""
+
+    _UNLOADED = object()
+
+    def __init__(
+        self,
+        tag: str,
+        level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        timestamp: datetime,
+        caller: Optional[str],
+        pid_trace: Optional[str],
+        loader: Callable[[], object],
+    ) -> None:
+        super().__init__(tag, level, timestamp, caller, pid_trace, self._UNLOADED)
+        self._loader = loader
+
+    @property  # type: ignore[override]
+    def content(self) -> object:
+        if self._content is self._UNLOADED:
+            self._content = self._loader()
+        return self._content
+
+    @content.setter
+    def content(self, value: object) -> None:
+        self._content = value
+
+    def __reduce__(self) -> tuple:
+        return Message, (self.tag, self.level, self.timestamp, self.caller, self.pid_trace, self.content)
+
+
 class Storage:
     """
     Basic storage to support saving objects;
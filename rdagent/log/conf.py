@@ -17,6 +17,15 @@ class LogSettings(ExtendedBaseSettings):
 
     ui_server_port: int | None = None
 
+    storage: str = "rdagent.log.storage.FileStorage"
+    """The main storage of the trace, e.g. `rdagent.log.storage.SegmentStorage` for append-only segment files"""
+
+    segment_max_bytes: int = 64 * 1024 * 1024
+    """`SegmentStorage` starts a new segment once the current one exceeds this size"""
+
+    segment_compress: bool = True
+    """Whether `SegmentStorage` compresses the records"""
+
     storages: dict[str, list[int | str]] = {}
 
     def model_post_init(self, _context: Any, /) -> None:
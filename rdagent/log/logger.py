@@ -19,7 +19,6 @@ from psutil import Process
 from rdagent.core.utils import SingletonBaseClass, import_class
 
 from .base import Storage
-from .storage import FileStorage
 from .utils import get_caller_info
 
 
@@ -58,7 +57,7 @@ class RDAgentLog(SingletonBaseClass):
         self._tag_ctx.set(value)
 
     def __init__(self) -> None:
-        self.storage = FileStorage(LOG_SETTINGS.trace_path)
+        self.storage: Storage = import_class(LOG_SETTINGS.storage)(LOG_SETTINGS.trace_path)
         self.other_storages: list[Storage] = []
         for storage, args in LOG_SETTINGS.storages.items():
             storage_cls = import_class(storage)
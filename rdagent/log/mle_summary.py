@@ -7,9 +7,9 @@ import fire
 import pandas as pd
 
 from rdagent.core.experiment import FBWorkspace
-from rdagent.core.proposal import ExperimentFeedback
-from rdagent.log.storage import FileStorage
-from rdagent.log.utils import extract_json, extract_loopid_func_name, is_valid_session
+from rdagent.log.storage import open_storage
+from rdagent.log.summary_index import TraceSummary
+from rdagent.log.utils import extract_json, is_valid_session
 from rdagent.log.utils.folder import get_first_session_file_after_duration
 from rdagent.scenarios.data_science.experiment.experiment import DSExperiment
 from rdagent.scenarios.data_science.test_eval import (
@@ -25,7 +25,7 @@ def save_grade_info(log_trace_path: Path):
     test_eval = get_test_eval()
 
     is_mle = isinstance(test_eval, MLETestEval)
-    trace_storage = FileStorage(log_trace_path)
+    trace_storage = open_storage(log_trace_path)
     for msg in trace_storage.iter_msg():
         if "competition" in msg.tag:
             competition = msg.content
@@ -109,85 +109,84 @@ def summarize_folder(log_folder: Path, hours: int | None = None) -> None:
         sota_exp_rank = None
         grade_output = None
 
-        if hours:
-            stop_li, stop_fn = _get_loop_and_fn_after_hours(log_trace_path, hours)
-        msgs = [(msg, extract_loopid_func_name(msg.tag)) for msg in FileStorage(log_trace_path).iter_msg()]
-        msgs = [(msg, int(loop_id) if loop_id else loop_id, fn) for msg, (loop_id, fn) in msgs]
-        msgs.sort(key=lambda m: m[1] if m[1] else -1)  # sort by loop id
-        for msg, loop_id, fn in msgs:  # messages in log trace
+        stop_li, stop_fn = _get_loop_and_fn_after_hours(log_trace_path, hours) if hours else (None, None)
+        summary = TraceSummary.load(log_trace_path)
+        if summary.competition is not None:
+            stat[log_trace_path.name]["competition"] = summary.competition
+
+            # get threshold scores
+            workflowexp = FBWorkspace()
+            if is_mle:
+                stdout = workflowexp.execute(
+                    env=test_eval.env,
+                    entry=f"mlebench grade-sample None {stat[log_trace_path.name]['competition']} --data-dir /mle/data",
+                )
+                grade_output = extract_json(stdout)
+                if grade_output:
+                    bronze_threshold = grade_output["bronze_threshold"]
+                    silver_threshold = grade_output["silver_threshold"]
+                    gold_threshold = grade_output["gold_threshold"]
+                    median_threshold = grade_output["median_threshold"]
+
+        for loop_id, loop in sorted(summary.loops.items()):  # per-loop records of the log trace
+            if hours and loop_id > stop_li:
+                break
+            # the stop step of the stop loop and the steps after it are not counted
+            stop_here = hours and loop_id == stop_li and stop_fn in loop.steps
             if loop_id:
                 loop_num = max(loop_id + 1, loop_num)
-            if hours and loop_id == stop_li and fn == stop_fn:
-                break
-            if msg.tag and "llm" not in msg.tag and "session" not in msg.tag:
-                if "competition" in msg.tag:
-                    stat[log_trace_path.name]["competition"] = msg.content
-
-                    # get threshold scores
-                    workflowexp = FBWorkspace()
-                    if is_mle:
-                        stdout = workflowexp.execute(
-                            env=test_eval.env,
-                            entry=f"mlebench grade-sample None {stat[log_trace_path.name]['competition']} --data-dir /mle/data",
-                        )
-                        grade_output = extract_json(stdout)
-                        if grade_output:
-                            bronze_threshold = grade_output["bronze_threshold"]
-                            silver_threshold = grade_output["silver_threshold"]
-                            gold_threshold = grade_output["gold_threshold"]
-                            median_threshold = grade_output["median_threshold"]
 
-                if "running" in msg.tag:
-                    if isinstance(msg.content, DSExperiment):
-                        if msg.content.result is not None:
-                            valid_scores[loop_id] = msg.content.result
-                    elif "mle_score" in msg.tag:
-                        grade_output = extract_json(msg.content)
-                        if grade_output:
-                            if grade_output["submission_exists"]:
-                                made_submission_num += 1
-                            if grade_output["score"] is not None:
-                                test_scores[loop_id] = grade_output["score"]
-                                if is_mle:
-                                    _, test_ranks[loop_id] = score_rank(
-                                        stat[log_trace_path.name]["competition"], grade_output["score"]
-                                    )
-                            if grade_output["valid_submission"]:
-                                valid_submission_num += 1
-                            if grade_output["above_median"]:
-                                above_median_num += 1
-                            if grade_output["any_medal"]:
-                                get_medal_num += 1
-                            if grade_output["bronze_medal"]:
-                                bronze_num += 1
-                            if grade_output["silver_medal"]:
-                                silver_num += 1
-                            if grade_output["gold_medal"]:
-                                gold_num += 1
+            if not stop_here or loop.started_before("running", stop_fn):
+                if loop.valid_result is not None:
+                    valid_scores[loop_id] = loop.valid_result
+                if loop.graded:
+                    grade_output = loop.mle_score
+                    if grade_output:
+                        if grade_output["submission_exists"]:
+                            made_submission_num += 1
+                        if grade_output["score"] is not None:
+                            test_scores[loop_id] = grade_output["score"]
+                            if is_mle:
+                                _, test_ranks[loop_id] = score_rank(
+                                    stat[log_trace_path.name]["competition"], grade_output["score"]
+                                )
+                        if grade_output["valid_submission"]:
+                            valid_submission_num += 1
+                        if grade_output["above_median"]:
+                            above_median_num += 1
+                        if grade_output["any_medal"]:
+                            get_medal_num += 1
+                        if grade_output["bronze_medal"]:
+                            bronze_num += 1
+                        if grade_output["silver_medal"]:
+                            silver_num += 1
+                        if grade_output["gold_medal"]:
+                            gold_num += 1
 
-                if "feedback" in msg.tag and "evolving" not in msg.tag:
-                    if isinstance(msg.content, ExperimentFeedback) and bool(msg.content):
-                        success_loop_num += 1
+            if (not stop_here or loop.started_before("feedback", stop_fn)) and loop.decision:
+                success_loop_num += 1
 
-                        if grade_output:  # sota exp's grade output
-                            if grade_output["gold_medal"]:
-                                sota_exp_stat = "gold"
-                            elif grade_output["silver_medal"]:
-                                sota_exp_stat = "silver"
-                            elif grade_output["bronze_medal"]:
-                                sota_exp_stat = "bronze"
-                            elif grade_output["above_median"]:
-                                sota_exp_stat = "above_median"
-                            elif grade_output["valid_submission"]:
-                                sota_exp_stat = "valid_submission"
-                            elif grade_output["submission_exists"]:
-                                sota_exp_stat = "made_submission"
-                            if grade_output["score"] is not None:
-                                sota_exp_score = grade_output["score"]
-                                if is_mle:
-                                    _, sota_exp_rank = score_rank(
-                                        stat[log_trace_path.name]["competition"], grade_output["score"]
-                                    )
+                if grade_output:  # sota exp's grade output
+                    if grade_output["gold_medal"]:
+                        sota_exp_stat = "gold"
+                    elif grade_output["silver_medal"]:
+                        sota_exp_stat = "silver"
+                    elif grade_output["bronze_medal"]:
+                        sota_exp_stat = "bronze"
+                    elif grade_output["above_median"]:
+                        sota_exp_stat = "above_median"
+                    elif grade_output["valid_submission"]:
+                        sota_exp_stat = "valid_submission"
+                    elif grade_output["submission_exists"]:
+                        sota_exp_stat = "made_submission"
+                    if grade_output["score"] is not None:
+                        sota_exp_score = grade_output["score"]
+                        if is_mle:
+                            _, sota_exp_rank = score_rank(
+                                stat[log_trace_path.name]["competition"], grade_output["score"]
+                            )
+            if stop_here:
+                break
 
         stat[log_trace_path.name].update(
             {
@@ -1,3 +1,5 @@
+import gzip
+import json
 import os
 import random
 import signal
@@ -12,10 +14,8 @@ from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
-from rdagent.log.storage import FileStorage
+from rdagent.log.server.trace_cache import TraceCache
 from rdagent.log.ui.conf import UI_SETTING
-from rdagent.log.ui.storage import WebStorage
-from rdagent.log.utils import is_valid_session
 
 app = Flask(__name__, static_folder=UI_SETTING.static_path)
 CORS(app)
@@ -30,45 +30,26 @@ def favicon():
     return send_from_directory(app.static_folder, "favicon.ico", mimetype="image/vnd.microsoft.icon")
 
 
-msgs_for_frontend = defaultdict(list)
+# traces are read on their first request, then tailed
+traces = TraceCache()
 pointers = defaultdict(lambda: defaultdict(int))  # pointers[trace_id][user_ip]
 
 
-def read_trace(log_path: Path, id: str = "") -> None:
-    fs = FileStorage(log_path)
-    ws = WebStorage(port=1, path=log_path)
-    msgs_for_frontend[id] = []
-    last_timestamp = None
-    for msg in fs.iter_msg():
-        data = ws._obj_to_json(obj=msg.content, tag=msg.tag, id=id, timestamp=msg.timestamp.isoformat())
-        if data:
-            if isinstance(data, list):
-                for d in data:
-                    msgs_for_frontend[id].append(d["msg"])
-                    last_timestamp = msg.timestamp
-            else:
-                msgs_for_frontend[id].append(data["msg"])
-                last_timestamp = msg.timestamp
-
-    now = datetime.now(timezone.utc)
-    if last_timestamp and (now - last_timestamp).total_seconds() > 1800:
-        msgs_for_frontend[id].append({"tag": "END", "timestamp": now.isoformat(), "content": {}})
-
-
-# load all traces from the log folder
-for p in log_folder_path.glob("*/*/"):
-    if is_valid_session(p):
-        read_trace(p, id=str(p))
-
-
 @app.route("/trace", methods=["POST"])
 def update_trace():
-    global pointers, msgs_for_frontend
+    """
+    Return the next messages of a trace for the user.
+
+    Without `limit` a few messages are returned per call (all of them with `all`); with `limit` at most `limit`
+    messages starting at `offset` (the position of the user by default).
+    """
+    global pointers
     data = request.get_json()
     trace_id = data.get("id")
     return_all = data.get("all")
     reset = data.get("reset")
-    msg_num = random.randint(1, 10)
+    limit = data.get("limit")
+    msg_num = min(int(limit), UI_SETTING.server_page_size) if limit else random.randint(1, 10)
     app.logger.info(data)
     log_folder_path = Path(UI_SETTING.trace_folder).absolute()
     if not trace_id:
@@ -79,13 +60,16 @@ def update_trace():
 
     if reset:
         pointers[trace_id][user_ip] = 0
+    if data.get("offset") is not None:
+        pointers[trace_id][user_ip] = int(data["offset"])
 
+    msgs = traces.messages(trace_id)
     start_pointer = pointers[trace_id][user_ip]
     end_pointer = start_pointer + msg_num
-    if end_pointer > len(msgs_for_frontend[trace_id]) or return_all:
-        end_pointer = len(msgs_for_frontend[trace_id])
+    if end_pointer > len(msgs) or (return_all and not limit):
+        end_pointer = len(msgs)
 
-    returned_msgs = msgs_for_frontend[trace_id][start_pointer:end_pointer]
+    returned_msgs = msgs[start_pointer:end_pointer]
 
     pointers[trace_id][user_ip] = end_pointer
     if returned_msgs:
@@ -181,25 +165,25 @@ def upload_file():
 @app.route("/receive", methods=["POST"])
 def receive_msgs():
     try:
-        data = request.get_json()
+        if request.headers.get("Content-Encoding") == "gzip":
+            data = json.loads(gzip.decompress(request.get_data()))
+        else:
+            data = request.get_json()
         # app.logger.info(data["msg"]["tag"])
         if not data:
             return jsonify({"error": "No JSON data received"}), 400
     except Exception as e:
         return jsonify({"error": "Internal Server Error"}), 500
 
-    if isinstance(data, list):
-        for d in data:
-            msgs_for_frontend[d["id"]].append(d["msg"])
-    else:
-        msgs_for_frontend[data["id"]].append(data["msg"])
+    for d in data if isinstance(data, list) else [data]:
+        traces.push(d["id"], d["msg"])
 
     return jsonify({"status": "success"}), 200
 
 
 @app.route("/control", methods=["POST"])
 def control_process():
-    global rdagent_processes, msgs_for_frontend
+    global rdagent_processes
     data = request.get_json()
     app.logger.info(data)
     if not data or "id" not in data or "action" not in data:
@@ -214,7 +198,7 @@ def control_process():
     process = rdagent_processes[id]
 
     if process.poll() is not None:
-        msgs_for_frontend[id].append({"tag": "END", "timestamp": datetime.now(timezone.utc).isoformat(), "content": {}})
+        traces.push(id, {"tag": "END", "timestamp": datetime.now(timezone.utc).isoformat(), "content": {}})
         return jsonify({"error": "Process has already terminated"}), 400
 
     try:
@@ -228,9 +212,7 @@ def control_process():
             process.terminate()
             process.wait()
             del rdagent_processes[id]
-            msgs_for_frontend[id].append(
-                {"tag": "END", "timestamp": datetime.now(timezone.utc).isoformat(), "content": {}}
-            )
+            traces.push(id, {"tag": "END", "timestamp": datetime.now(timezone.utc).isoformat(), "content": {}})
             return jsonify({"status": "stopped"}), 200
         else:
             return jsonify({"error": "Unknown action"}), 400
@@ -241,8 +223,8 @@ def control_process():
 @app.route("/test", methods=["GET"])
 def test():
     # return 'Hello, World!'
-    global msgs_for_frontend, pointers
-    msgs = {k: [i["tag"] for i in v] for k, v in msgs_for_frontend.items()}
+    global pointers
+    msgs = {k: [i["tag"] for i in traces.messages(k)] for k in list(traces)}
     pointers = pointers
     return jsonify({"msgs": msgs, "pointers": pointers}), 200
 
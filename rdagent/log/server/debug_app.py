@@ -89,10 +89,10 @@ def upload_file():
     id = f"{scenario}/{randomname.get_name()}"
 
     def read_trace(log_path: Path, t: float = 0.2, id: str = "") -> None:
-        from rdagent.log.storage import FileStorage
+        from rdagent.log.storage import open_storage
         from rdagent.log.ui.storage import WebStorage
 
-        fs = FileStorage(log_path)
+        fs = open_storage(log_path)
         ws = WebStorage(port=1, path=log_path)
         msgs_for_frontend[id] = []
         for msg in fs.iter_msg():
@@ -0,0 +1,105 @@
+"""
+Lazily loaded, incrementally tailed traces for the log server.
+
+A trace is only read when it is requested for the first time. Its storage (and thus the message index of the
+storage) is kept with a cursor, so later requests only convert the messages logged after the cursor. Traces whose
+folder did not change are polled less and less often (exponential backoff). Traces receiving messages pushed by
+a running process (`/receive`) are not polled. At most `UI_SETTING.server_max_traces` traces are kept in memory;
+the least recently used one is evicted and read again when it is requested.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+from rdagent.log.base import Storage
+from rdagent.log.storage import open_storage
+from rdagent.log.ui.conf import UI_SETTING
+from rdagent.log.ui.storage import WebStorage
+from rdagent.log.utils import is_valid_session
+
+
+@dataclass
+class _TraceState:
+    msgs: list[dict] = field(default_factory=list)
+    storage: Storage | None = None
+    # cursor: timestamp of the last read message and the (tag, pid) of the read messages with this timestamp
+    last_timestamp: datetime | None = None
+    read_at_last_timestamp: set[tuple[str, str | None]] = field(default_factory=set)
+    next_poll: float = 0.0
+    poll_interval: float = 0.0
+    pushed: bool = False
+    ended: bool = False
+
+
+class TraceCache:
+    # traces without new messages for this long are considered finished
+    END_AFTER_SECONDS = 1800
+
+    def __init__(self) -> None:
+        self._traces: OrderedDict[str, _TraceState] = OrderedDict()
+        self._converter = WebStorage(port=1, path="")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._traces))
+
+    def _state(self, trace_id: str) -> _TraceState:
+        state = self._traces.get(trace_id)
+        if state is None:
+            state = self._traces[trace_id] = _TraceState()
+            if is_valid_session(Path(trace_id)):
+                state.storage = open_storage(trace_id)
+            while len(self._traces) > UI_SETTING.server_max_traces:
+                self._traces.popitem(last=False)
+        self._traces.move_to_end(trace_id)
+        return state
+
+    def messages(self, trace_id: str) -> list[dict]:
+        """The messages of the trace, including the ones logged since the last call."""
+        state = self._state(trace_id)
+        if state.storage is not None and not state.pushed and not state.ended and time.monotonic() >= state.next_poll:
+            self._tail(trace_id, state)
+        return state.msgs
+
+    def push(self, trace_id: str, msg: dict) -> None:
+        """Append a message pushed by a running process; the trace is not polled anymore."""
+        state = self._state(trace_id)
+        state.pushed = True
+        state.msgs.append(msg)
+
+    def _tail(self, trace_id: str, state: _TraceState) -> None:
+        n_new = 0
+        for msg in state.storage.iter_msg(start=state.last_timestamp):
+            key = (msg.tag, msg.pid_trace)
+            if msg.timestamp == state.last_timestamp:
+                if key in state.read_at_last_timestamp:
+                    continue
+                state.read_at_last_timestamp.add(key)
+            else:
+                state.last_timestamp, state.read_at_last_timestamp = msg.timestamp, {key}
+            n_new += 1
+            if not any(keyword in msg.tag for keyword in WebStorage.CONVERTED_TAG_KEYWORDS):
+                continue  # not shown in the web app, no need to load the content
+            data = self._converter._obj_to_json(
+                obj=msg.content, tag=msg.tag, id=trace_id, timestamp=msg.timestamp.isoformat()
+            )
+            if data:
+                state.msgs.extend(d["msg"] for d in (data if isinstance(data, list) else [data]))
+
+        if n_new:
+            state.poll_interval = UI_SETTING.server_poll_min
+        else:
+            state.poll_interval = min(
+                max(state.poll_interval * 2, UI_SETTING.server_poll_min), UI_SETTING.server_poll_max
+            )
+        state.next_poll = time.monotonic() + state.poll_interval
+
+        now = datetime.now(timezone.utc)
+        if state.last_timestamp and (now - state.last_timestamp).total_seconds() > self.END_AFTER_SECONDS:
+            state.msgs.append({"tag": "END", "timestamp": now.isoformat(), "content": {}})
+            state.ended = True
@@ -1,11 +1,21 @@
+import bisect
+import heapq
 import json
+import os
 import pickle
 import re
+import shutil
+import struct
+import threading
+import time
+import zlib
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-from typing import Any, Generator, Literal
+from typing import IO, Any, Generator, Iterable, Literal, NamedTuple
 
-from .base import Message, Storage
+from .base import LazyMessage, Message, Storage
+from .conf import LOG_SETTINGS
 from .utils import gen_datetime
 
 LOG_LEVEL = Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
@@ -32,8 +42,13 @@ class FileStorage(Storage):
     TODO: describe the storage format
     """
 
+    TIME_FORMAT = "%Y-%m-%d_%H-%M-%S-%f"
+    MSG_FILE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}-\d{6}\.pkl")
+
     def __init__(self, path: str | Path) -> None:
         self.path = Path(path)
+        # message index: folder -> (mtime, sub folders, time sorted names of the pickled messages)
+        self._index: dict[str, tuple[int, list[str], list[str]]] = {}
 
     def log(
         self,
@@ -76,33 +91,94 @@ class FileStorage(Storage):
         r"(?P<caller>.+:.+:\d+) - "
     )
 
-    def iter_msg(self, tag: str | None = None, pattern: str | None = None) -> Generator[Message, None, None]:
-        msg_l = []
+    def _indexed_folders(self) -> Generator[tuple[str, list[str]], None, None]:
+        """
+        Yield (relative folder, time sorted message file names) for every folder holding messages.
 
-        if pattern:
-            pkl_files = pattern
-        elif tag:
-            pkl_files = f"**/{tag.replace('.','/')}/**/*.pkl"
-        else:
-            pkl_files = "**/*.pkl"
-        for file in self.path.glob(pkl_files):
-            if file.name == "debug_llm.pkl":
+        Only the folders modified since the last call are listed again; the others cost one `stat`.
+        """
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            folder = os.path.join(self.path, rel)
+            try:
+                mtime = os.stat(folder).st_mtime_ns
+            except FileNotFoundError:
+                self._index.pop(folder, None)
                 continue
-            pkl_log_tag = ".".join(file.relative_to(self.path).as_posix().replace("/", ".").split(".")[:-3])
-            pid = file.parent.name
+            cached = self._index.get(folder)
+            # folders modified in the last seconds are listed again in case of a coarse mtime resolution
+            if cached is None or cached[0] != mtime or time.time_ns() - mtime < 2_000_000_000:
+                sub_folders, names = [], []
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if entry.is_dir():
+                            sub_folders.append(entry.name)
+                        elif self.MSG_FILE_PATTERN.fullmatch(entry.name):
+                            names.append(entry.name)
+                names.sort()
+                cached = self._index[folder] = (mtime, sub_folders, names)
+            stack.extend(os.path.join(rel, sub) for sub in cached[1])
+            if cached[2]:
+                yield rel, cached[2]
 
-            with file.open("rb") as f:
-                content = pickle.load(f)
+    def iter_msg(
+        self,
+        tag: str | None = None,
+        pattern: str | None = None,
+        loop_id: int | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Generator[Message, None, None]:
+        """
+        Stream the pickled messages in timestamp order.
 
-            timestamp = datetime.strptime(file.stem, "%Y-%m-%d_%H-%M-%S-%f").replace(tzinfo=timezone.utc)
+        The messages are selected from the file names only and merged across folders, so the first message is
+        yielded without reading the others; the content of a message is unpickled when it is accessed.
 
-            m = Message(tag=pkl_log_tag, level="INFO", timestamp=timestamp, caller="", pid_trace=pid, content=content)
+        Parameters
+        ----------
+        tag : str, optional
+            Only the messages whose tag contains `tag` (e.g. "Loop_3.running").
+        pattern : str, optional
+            Glob pattern on the message files relative to the log folder, e.g. "**/running/*/*.pkl";
+            takes precedence over `tag`.
+        loop_id : int, optional
+            Only the messages of the loop.
+        start, end : datetime, optional
+            Only the messages with `start <= timestamp < end`.
+        """
+        regex = _glob_to_regex(pattern) if pattern else None
+        tag_path = f"/{tag.replace('.', '/')}/" if tag else None
+        start_name = None if start is None else gen_datetime(start).strftime(self.TIME_FORMAT)
+        end_name = None if end is None else gen_datetime(end).strftime(self.TIME_FORMAT)
 
-            msg_l.append(m)
+        sources = []
+        for rel, names in self._indexed_folders():
+            parts = Path(rel).parts
+            rel_posix = "/".join(parts)
+            msg_tag, pid = ".".join(parts[:-1]), (parts[-1] if parts else self.path.name)
+            if loop_id is not None and f".Loop_{loop_id}." not in f".{msg_tag}.":
+                continue
+            if regex is None and tag_path is not None and tag_path not in f"/{rel_posix}/":
+                continue
+            lo = 0 if start_name is None else bisect.bisect_left(names, start_name, key=lambda n: n[:-4])
+            hi = len(names) if end_name is None else bisect.bisect_left(names, end_name, key=lambda n: n[:-4])
+            selected: Iterable[str] = names[lo:hi]
+            if regex is not None:
+                selected = [n for n in selected if regex.match(f"{rel_posix}/{n}" if rel_posix else n)]
+            folder = self.path / rel
+            sources.append(_with_source(selected, msg_tag, pid, folder))
 
-        msg_l.sort(key=lambda x: x.timestamp)
-        for m in msg_l:
-            yield m
+        for name, msg_tag, pid, folder in heapq.merge(*sources, key=lambda x: x[0]):
+            yield LazyMessage(
+                tag=msg_tag,
+                level="INFO",
+                timestamp=datetime.strptime(name[:-4], self.TIME_FORMAT).replace(tzinfo=timezone.utc),
+                caller="",
+                pid_trace=pid,
+                loader=partial(_load_pickle, folder / name),
+            )
 
     def truncate(self, time: datetime) -> None:
         for file in self.path.glob("**/*.pkl"):
@@ -111,6 +187,391 @@ class FileStorage(Storage):
                 file.unlink()
 
         _remove_empty_dir(self.path)
+        self._index.clear()
 
     def __str__(self) -> str:
         return f"FileStorage({self.path})"
+
+
+def _load_pickle(path: Path) -> object:
+    with path.open("rb") as f:
+        return pickle.load(f)
+
+
+def _with_source(items: Iterable, *source: Any) -> Generator[tuple, None, None]:
+    for item in items:
+        yield (item, *source)
+
+
+def _glob_to_regex(pattern: str) -> re.Pattern:
+    """Translate a `Path.glob` style pattern (with recursive `**`) into a regex on posix relative paths."""
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r"\Z")
+
+
+class _SegmentEntry(NamedTuple):
+    timestamp: datetime
+    tag: str
+    pid: str
+    type: str
+    off: int
+    len: int
+
+    @classmethod
+    def from_meta(cls, meta: dict, off: int, length: int) -> "_SegmentEntry":
+        return cls(datetime.fromisoformat(meta["t"]), meta["tag"], meta["pid"], meta["type"], off, length)
+
+    def to_line(self, off: int) -> bytes:
+        meta = {"t": self.timestamp.isoformat(), "tag": self.tag, "pid": self.pid, "type": self.type}
+        return json.dumps({**meta, "off": off, "len": self.len}).encode() + b"\n"
+
+
+class _SegmentWriter:
+    def __init__(self, segment: Path) -> None:
+        self.pid = os.getpid()
+        self.segment = segment
+        self.seg_file: IO[bytes] = segment.open("ab")
+        self.idx_file: IO[bytes] = segment.with_suffix(SegmentStorage.INDEX_SUFFIX).open("ab")
+        self.size = self.seg_file.tell()
+
+    def close(self) -> None:
+        self.seg_file.close()
+        self.idx_file.close()
+
+
+class SegmentStorage(Storage):
+    """
+    Append-only log storage.
+
+    Instead of one file per message, every process appends its records to its own segment file
+    `segments/<pid>-<seq>.seg`, which is rotated once it exceeds `LOG_SETTINGS.segment_max_bytes`.
+    A record is
+
+    .. code-block:: text
+
+        header (magic, flags, meta length, payload length, crc32) | json meta | payload
+
+    where the meta holds the timestamp, tag, pid and save type, and the payload is the pickled, json or text
+    content, zlib compressed when `LOG_SETTINGS.segment_compress` is set. Next to each segment a sidecar
+    `<pid>-<seq>.idx` holds one json line (t, tag, pid, off, len, type) per record, so readers do not have to
+    scan the segments.
+
+    The index line is written after its record. Readers ignore a partially written index line or record and
+    recover the records missing from the index by scanning the segment past the last indexed one, so a folder
+    can be read while it is being written and after a crash. A process never appends to an existing segment.
+    """
+
+    SEGMENT_DIR = "segments"
+    SEGMENT_SUFFIX = ".seg"
+    INDEX_SUFFIX = ".idx"
+    HEADER = struct.Struct("<4sBIII")
+    MAGIC = b"RDLS"
+    FLAG_ZLIB = 1
+    MIN_COMPRESS_BYTES = 256
+
+    def __init__(self, path: str | Path) -> None:
+        self._writer: _SegmentWriter | None = None
+        self._lock = threading.Lock()
+        # message index: segment -> (read position in its index file, end of the indexed records, entries)
+        self._index: dict[Path, tuple[int, int, list[_SegmentEntry]]] = {}
+        self.path = Path(path)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @path.setter
+    def path(self, path: str | Path) -> None:
+        self._close_writer()
+        self._path = Path(path)
+
+    @classmethod
+    def is_segment_storage(cls, path: str | Path) -> bool:
+        return (Path(path) / cls.SEGMENT_DIR).is_dir()
+
+    def _close_writer(self) -> None:
+        # after a fork the writer belongs to the parent process; it is dropped without flushing twice
+        if self._writer is not None and self._writer.pid == os.getpid():
+            self._writer.close()
+        self._writer = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_writer()
+
+    def _get_writer(self) -> _SegmentWriter:
+        if self._writer is None or self._writer.pid != os.getpid() or self._writer.size >= self._max_bytes():
+            self._close_writer()
+            seg_dir = self.path / self.SEGMENT_DIR
+            seg_dir.mkdir(parents=True, exist_ok=True)
+            pid = os.getpid()
+            existing = seg_dir.glob(f"{pid}-*{self.SEGMENT_SUFFIX}")
+            seq = max((int(p.stem.split("-")[1]) + 1 for p in existing), default=0)
+            self._writer = _SegmentWriter(seg_dir / f"{pid}-{seq:05d}{self.SEGMENT_SUFFIX}")
+        return self._writer
+
+    @staticmethod
+    def _max_bytes() -> int:
+        return LOG_SETTINGS.segment_max_bytes
+
+    def _append(self, payload: bytes, tag: str, timestamp: datetime, save_type: str) -> str:
+        tag, _, pid = tag.rpartition(".")
+        meta = {"t": timestamp.isoformat(), "tag": tag, "pid": pid, "type": save_type}
+        meta_bytes = json.dumps(meta).encode()
+        flags = 0
+        if LOG_SETTINGS.segment_compress and len(payload) >= self.MIN_COMPRESS_BYTES:
+            payload, flags = zlib.compress(payload, 1), self.FLAG_ZLIB
+        crc = zlib.crc32(payload, zlib.crc32(meta_bytes))
+        record = self.HEADER.pack(self.MAGIC, flags, len(meta_bytes), len(payload), crc) + meta_bytes + payload
+
+        with self._lock:
+            writer = self._get_writer()
+            offset = writer.size
+            writer.seg_file.write(record)
+            writer.seg_file.flush()
+            writer.size += len(record)
+            writer.idx_file.write(json.dumps({**meta, "off": offset, "len": len(record)}).encode() + b"\n")
+            writer.idx_file.flush()
+        return f"{writer.segment}:{offset}"
+
+    def log(
+        self,
+        obj: object,
+        tag: str = "",
+        timestamp: datetime | None = None,
+        save_type: Literal["json", "text", "pkl"] = "pkl",
+        **kwargs: Any,
+    ) -> str | Path:
+        timestamp = gen_datetime(timestamp)
+        if save_type == "json":
+            try:
+                payload = json.dumps(obj).encode()
+            except TypeError:
+                payload = json.dumps(json.loads(str(obj))).encode()
+        elif save_type == "pkl":
+            payload = pickle.dumps(obj)
+        else:
+            payload = str(obj).encode()
+        return self._append(payload, tag, timestamp, save_type)
+
+    def _parse_record(self, data: bytes) -> tuple[dict, bytes] | None:
+        """Return the meta and the decoded payload of a record, or None if it is incomplete or corrupted."""
+        if len(data) < self.HEADER.size:
+            return None
+        magic, flags, meta_len, payload_len, crc = self.HEADER.unpack_from(data)
+        end = self.HEADER.size + meta_len + payload_len
+        if magic != self.MAGIC or len(data) < end:
+            return None
+        meta_bytes = data[self.HEADER.size : self.HEADER.size + meta_len]
+        payload = data[self.HEADER.size + meta_len : end]
+        if zlib.crc32(payload, zlib.crc32(meta_bytes)) != crc:
+            return None
+        if flags & self.FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        return json.loads(meta_bytes), payload
+
+    def _scan(self, segment: Path, offset: int) -> list[_SegmentEntry]:
+        """Recover the index entries of the complete records from `offset` on."""
+        entries = []
+        with segment.open("rb") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(self.HEADER.size)
+                if len(header) < self.HEADER.size:
+                    break
+                magic, _, meta_len, payload_len, _ = self.HEADER.unpack(header)
+                if magic != self.MAGIC:
+                    break
+                parsed = self._parse_record(header + f.read(meta_len + payload_len))
+                if parsed is None:
+                    break
+                length = self.HEADER.size + meta_len + payload_len
+                entries.append(_SegmentEntry.from_meta(parsed[0], offset, length))
+                offset += length
+        return entries
+
+    def _segment_entries(self, segment: Path) -> list[_SegmentEntry]:
+        """
+        Return the entries of the records of `segment`.
+
+        The index file is read from the position reached by the previous call, so a growing segment is indexed
+        incrementally. Records which are not indexed yet are recovered by scanning the segment.
+        """
+        position, end, entries = self._index.get(segment, (0, 0, []))
+        size = segment.stat().st_size
+        index = segment.with_suffix(self.INDEX_SUFFIX)
+        if index.exists():
+            with index.open("rb") as f:
+                f.seek(position)
+                data = f.read()
+            # a partially written last line is read again by the next call
+            data = data[: data.rfind(b"\n") + 1]
+            position += len(data)
+            for line in data.splitlines():
+                try:
+                    meta = json.loads(line)
+                except ValueError:
+                    break
+                if meta["off"] < end:
+                    continue  # already recovered by scanning
+                if meta["off"] + meta["len"] > size:
+                    break
+                entries.append(_SegmentEntry.from_meta(meta, meta["off"], meta["len"]))
+                end = meta["off"] + meta["len"]
+        if end < size:
+            recovered = self._scan(segment, end)
+            entries.extend(recovered)
+            end = recovered[-1].off + recovered[-1].len if recovered else end
+        self._index[segment] = (position, end, entries)
+        return entries
+
+    def _segments(self) -> list[Path]:
+        return sorted((self.path / self.SEGMENT_DIR).glob(f"*{self.SEGMENT_SUFFIX}"))
+
+    def _read(self, segment: Path, entry: _SegmentEntry) -> object:
+        with segment.open("rb") as f:
+            f.seek(entry.off)
+            parsed = self._parse_record(f.read(entry.len))
+        if parsed is None:
+            raise ValueError(f"Corrupted log record at {segment}:{entry.off}")
+        payload = parsed[1]
+        if entry.type == "pkl":
+            return pickle.loads(payload)
+        if entry.type == "json":
+            return json.loads(payload)
+        return payload.decode()
+
+    def iter_msg(
+        self,
+        tag: str | None = None,
+        pattern: str | None = None,
+        loop_id: int | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Generator[Message, None, None]:
+        """
+        Same as `FileStorage.iter_msg`: stream the pickled messages in timestamp order.
+
+        `pattern` is matched against the path the message would have in a `FileStorage`.
+        """
+        regex = _glob_to_regex(pattern) if pattern else None
+        start = None if start is None else gen_datetime(start)
+        end = None if end is None else gen_datetime(end)
+        sources = []
+        for segment in self._segments():
+            selected = []
+            for entry in self._segment_entries(segment):
+                if entry.type != "pkl":
+                    continue
+                if (start is not None and entry.timestamp < start) or (end is not None and entry.timestamp >= end):
+                    continue
+                if loop_id is not None and f".Loop_{loop_id}." not in f".{entry.tag}.":
+                    continue
+                full_tag = f"{entry.tag}.{entry.pid}".strip(".")
+                if regex is not None:
+                    name = entry.timestamp.strftime(FileStorage.TIME_FORMAT)
+                    if not regex.match(f"{full_tag.replace('.', '/')}/{name}.pkl"):
+                        continue
+                elif tag and f".{tag}." not in f".{full_tag}.":
+                    continue
+                selected.append(entry)
+            # records are appended in call order, which may differ from the given timestamps
+            selected.sort(key=lambda e: e.timestamp)
+            sources.append(_with_source(selected, segment))
+
+        for entry, segment in heapq.merge(*sources, key=lambda x: x[0].timestamp):
+            yield LazyMessage(
+                tag=entry.tag,
+                level="INFO",
+                timestamp=entry.timestamp,
+                caller="",
+                pid_trace=entry.pid,
+                loader=partial(self._read, segment, entry),
+            )
+
+    def truncate(self, time: datetime) -> None:
+        """Rewrite the segments without the records after `time`."""
+        with self._lock:
+            self._close_writer()
+            for segment in self._segments():
+                entries = self._segment_entries(segment)
+                kept = [e for e in entries if e.timestamp <= time]
+                index = segment.with_suffix(self.INDEX_SUFFIX)
+                if not kept:
+                    segment.unlink()
+                    index.unlink(missing_ok=True)
+                    continue
+                if len(kept) == len(entries) and index.exists():
+                    continue
+                tmp_seg, tmp_idx = segment.with_suffix(".seg.tmp"), segment.with_suffix(".idx.tmp")
+                with segment.open("rb") as src, tmp_seg.open("wb") as seg_f, tmp_idx.open("wb") as idx_f:
+                    offset = 0
+                    for e in kept:
+                        src.seek(e.off)
+                        seg_f.write(src.read(e.len))
+                        idx_f.write(e.to_line(offset))
+                        offset += e.len
+                os.replace(tmp_seg, segment)
+                os.replace(tmp_idx, index)
+            self._index.clear()
+
+    def __str__(self) -> str:
+        return f"SegmentStorage({self.path})"
+
+
+def open_storage(path: str | Path) -> FileStorage | SegmentStorage:
+    """Open an existing log folder for reading, whatever the storage that wrote it."""
+    return SegmentStorage(path) if SegmentStorage.is_segment_storage(path) else FileStorage(path)
+
+
+_FILE_STORAGE_SUFFIX = {".pkl": "pkl", ".json": "json", ".log": "text"}
+
+
+def convert_file_storage(src: str | Path, dst: str | Path) -> int:
+    """
+    Convert a log folder written by `FileStorage` into a `SegmentStorage` folder.
+
+    The messages are copied without being unpickled. Files that are not messages (e.g. `debug_llm.pkl`) are
+    copied as they are. Returns the number of converted messages.
+    """
+    src, dst = Path(src), Path(dst)
+    if dst.exists() and any(dst.iterdir()):
+        raise FileExistsError(f"{dst} is not empty")
+    storage = SegmentStorage(dst)
+    messages = []
+    for file in src.rglob("*"):
+        if not file.is_file():
+            continue
+        rel = file.relative_to(src)
+        try:
+            timestamp = datetime.strptime(file.stem, "%Y-%m-%d_%H-%M-%S-%f").replace(tzinfo=timezone.utc)
+        except ValueError:
+            timestamp = None
+        if timestamp is None or file.suffix not in _FILE_STORAGE_SUFFIX or len(rel.parts) < 2:
+            (dst / rel).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(file, dst / rel)
+            continue
+        messages.append((timestamp, file, ".".join(rel.parent.parts)))
+
+    messages.sort(key=lambda x: x[0])
+    for timestamp, file, tag in messages:
+        storage._append(file.read_bytes(), tag, timestamp, _FILE_STORAGE_SUFFIX[file.suffix])
+    storage.close()
+    return len(messages)
@@ -0,0 +1,190 @@
+"""
+Compact per-loop summary records of a log trace.
+
+The summaries of the UI and `mle_summary.py` need a few values per loop (scores, the SOTA loop, timings, a hash
+of the code) but used to unpickle every message of every trace to get them. `TraceSummary` derives these records
+from the messages and stores them in the trace folder (`summary_index.pkl`). When the trace grows, only the
+messages which were not summarized yet are read; the other ones are recognized from the message index of the
+storage without being unpickled.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from rdagent.log.base import Message
+from rdagent.log.storage import open_storage
+from rdagent.log.utils import extract_json, extract_loopid_func_name
+
+SOTA_TAGS = ("sota_exp_to_submit", "SOTA experiment")
+
+
+def exp_code_hash(exp: Any) -> str:
+    """Identify an experiment by its code and hypothesis."""
+    content = str(exp.experiment_workspace.all_codes) + str(exp.hypothesis)
+    return hashlib.md5(content.encode()).hexdigest()
+
+
+@dataclass
+class LoopSummary:
+    loop_id: int
+    # step name -> [time of the first message, time of the last message]
+    steps: dict[str, list[datetime]] = field(default_factory=dict)
+    # step name -> [start, end] of the completed step, as recorded by the loop (`LoopTrace`)
+    step_bounds: dict[str, list[datetime]] = field(default_factory=dict)
+    code_hash: str | None = None
+    valid_result: pd.DataFrame | None = None
+    graded: bool = False
+    mle_score: dict | None = None
+    decision: bool | None = None
+
+    @property
+    def valid_score(self) -> float | None:
+        if self.valid_result is None or "ensemble" not in self.valid_result.index:
+            return None
+        return self.valid_result.loc["ensemble"].iloc[0]
+
+    def duration(self, step: str | None = None) -> timedelta:
+        """
+        The running time of the step, or the sum of the running times of the steps of the loop (the time the loop
+        waited between its steps is not included).
+
+        Traces logged before the step boundaries were recorded fall back to the time from the first to the last
+        message of the step or of the loop, which misses the time before the first and after the last message.
+        """
+        if self.step_bounds:
+            if step is None:
+                return sum((end - start for start, end in self.step_bounds.values()), timedelta())
+            if step in self.step_bounds:
+                return self.step_bounds[step][1] - self.step_bounds[step][0]
+        if step is None:
+            if not self.steps:
+                return timedelta()
+            return max(end for _, end in self.steps.values()) - min(start for start, _ in self.steps.values())
+        if step not in self.steps:
+            return timedelta()
+        return self.steps[step][1] - self.steps[step][0]
+
+    def started_before(self, step: str, other_step: str) -> bool:
+        return step in self.steps and self.steps[step][0] < self.steps[other_step][0]
+
+
+@dataclass
+class TraceSummary:
+    competition: str | None = None
+    loops: dict[int, LoopSummary] = field(default_factory=dict)
+    # tag in SOTA_TAGS -> code hash of the last logged experiment
+    sota_hashes: dict[str, str | None] = field(default_factory=dict)
+    # (tag, pid, timestamp) of the summarized messages
+    seen: set[tuple[str, str | None, datetime]] = field(default_factory=set)
+    # the stored summaries of another format are rebuilt
+    format: int = 2
+
+    FILE_NAME = "summary_index.pkl"
+
+    @classmethod
+    def load(cls, log_path: str | Path, update: bool = True) -> TraceSummary:
+        """Load the stored summary of the trace and add the messages logged since it was stored."""
+        summary_path = Path(log_path) / cls.FILE_NAME
+        summary = cls()
+        if summary_path.exists():
+            try:
+                with summary_path.open("rb") as f:
+                    summary = pickle.load(f)
+                if getattr(summary, "format", None) != cls.format:
+                    summary = cls()
+            except Exception:
+                summary = cls()
+        if update and summary.update(log_path):
+            try:
+                summary.save(summary_path)
+            except OSError:
+                pass  # read-only log folder
+        return summary
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        with tmp.open("wb") as f:
+            pickle.dump(self, f)
+        os.replace(tmp, path)
+
+    def update(self, log_path: str | Path) -> bool:
+        """Summarize the messages which were not summarized yet; return whether there was any."""
+        n_seen = len(self.seen)
+        for msg in open_storage(log_path).iter_msg():
+            key = (msg.tag, msg.pid_trace, msg.timestamp)
+            if key not in self.seen:
+                self.seen.add(key)
+                self._add(msg)
+        return len(self.seen) > n_seen
+
+    def _add(self, msg: Message) -> None:
+        """Only the contents of the messages needed by the summary are loaded."""
+        from rdagent.core.proposal import ExperimentFeedback
+
+        tag = msg.tag
+        loop_id, fn = extract_loopid_func_name(tag)
+        loop = None
+        if loop_id is not None:
+            loop = self.loops.setdefault(int(loop_id), LoopSummary(int(loop_id)))
+            span = loop.steps.setdefault(fn, [msg.timestamp, msg.timestamp])
+            span[0], span[1] = min(span[0], msg.timestamp), max(span[1], msg.timestamp)
+            if tag.endswith(".step_trace") and hasattr(msg.content, "start"):
+                loop.step_bounds[fn] = [msg.content.start, msg.content.end]
+                return
+
+        if "llm" in tag or "session" in tag:
+            return
+        if "competition" in tag:
+            self.competition = msg.content
+        for sota_tag in SOTA_TAGS:
+            if sota_tag in tag:
+                self.sota_hashes[sota_tag] = exp_code_hash(msg.content) if msg.content is not None else None
+        if loop is None:
+            return
+
+        if "running" in tag:
+            if "mle_score" in tag:
+                loop.graded, loop.mle_score = True, extract_json(msg.content)
+            elif tag.endswith(".running") and hasattr(msg.content, "experiment_workspace"):
+                loop.code_hash = exp_code_hash(msg.content)
+                try:
+                    loop.valid_result = msg.content.result
+                except AttributeError:  # compatibility with old versions
+                    loop.valid_result = msg.content.__dict__.get("result")
+        if "feedback" in tag and "evolving" not in tag and isinstance(msg.content, ExperimentFeedback):
+            loop.decision = bool(msg.content)
+
+    def sota_loop_id(self, to_submit: bool = True) -> int | None:
+        """The last loop which ran the SOTA experiment."""
+        sota_hash = self.sota_hashes.get(SOTA_TAGS[0] if to_submit else SOTA_TAGS[1])
+        if sota_hash is None:
+            return None
+        return max((li for li, loop in self.loops.items() if loop.code_hash == sota_hash), default=None)
+
+    def records(self) -> pd.DataFrame:
+        """One row per loop."""
+        sota_loop_id = self.sota_loop_id()
+        return pd.DataFrame(
+            [
+                {
+                    "loop_id": li,
+                    "valid_score": loop.valid_score,
+                    "test_score": (loop.mle_score or {}).get("score"),
+                    "decision": loop.decision,
+                    "sota": li == sota_loop_id,
+                    "code_hash": loop.code_hash,
+                    **{f"{step}_time": loop.duration(step) for step in loop.steps},
+                    "time": loop.duration(),
+                }
+                for li, loop in sorted(self.loops.items())
+            ]
+        )
@@ -77,6 +77,13 @@ class RDAgentTimerWrapper(SingletonBaseClass):
         self.timer: RDAgentTimer = RDAgentTimer()
         self.api_fail_count: int = 0
         self.latest_api_fail_time: datetime | None = None
+        # accumulated latency of the successful API calls in current process (used by benchmarks)
+        self.api_call_count: int = 0
+        self.api_call_duration: timedelta = timedelta()
+
+    def record_api_call(self, duration: timedelta) -> None:
+        self.api_call_count += 1
+        self.api_call_duration += duration
 
     def replace_timer(self, timer: RDAgentTimer) -> None:
         self.timer = timer
@@ -22,7 +22,7 @@ from rdagent.components.coder.model_coder.model import ModelFBWorkspace, ModelTa
 from rdagent.core.proposal import Hypothesis, HypothesisFeedback
 from rdagent.core.scenario import Scenario
 from rdagent.log.base import Message
-from rdagent.log.storage import FileStorage
+from rdagent.log.storage import open_storage
 from rdagent.log.ui.qlib_report_figure import report_figure
 from rdagent.scenarios.general_model.scenario import GeneralModelScenario
 from rdagent.scenarios.kaggle.experiment.scenario import KGScenario
@@ -261,9 +261,9 @@ def refresh(same_trace: bool = False):
         return
 
     if main_log_path:
-        state.fs = FileStorage(main_log_path / state.log_path).iter_msg()
+        state.fs = open_storage(main_log_path / state.log_path).iter_msg()
     else:
-        state.fs = FileStorage(state.log_path).iter_msg()
+        state.fs = open_storage(state.log_path).iter_msg()
 
     # detect scenario
     if not same_trace:
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import SettingsConfigDict
 
 from rdagent.core.conf import ExtendedBaseSettings
@@ -20,5 +22,38 @@ class UIBasePropSetting(ExtendedBaseSettings):
 
     enable_cache: bool = True
 
+    server_max_traces: int = 32
+    """Traces kept in memory by the log server"""
+
+    server_poll_min: float = 1.0
+    """Seconds between two reads of a changing trace by the log server; doubled up to `server_poll_max` while idle"""
+
+    server_poll_max: float = 60.0
+
+    server_page_size: int = 1000
+
+    web_queue_size: int = 10000
+    """Messages waiting to be sent to the UI server; beyond it the `web_backpressure` policy applies"""
+
+    web_backpressure: Literal["spill", "drop"] = "spill"
+    """Whether messages are spilled to disk or dropped when the queue is full"""
+
+    web_spill_max_messages: int = 100000
+
+    web_batch_size: int = 64
+
+    web_batch_latency: float = 0.2
+    """Seconds a message may wait for more messages to fill its batch"""
+
+    web_compress_min_bytes: int = 16 * 1024
+    """Batches larger than this are sent gzip compressed"""
+
+    web_max_retries: int = 3
+
+    web_retry_backoff: float = 0.5
+    """Seconds before the first retry, doubled at each retry"""
+
+    web_timeout: float = 5.0
+
 
 UI_SETTING = UIBasePropSetting()
@@ -14,7 +14,7 @@ from litellm import get_valid_models
 from streamlit import session_state as state
 
 from rdagent.app.data_science.loop import DataScienceRDLoop
-from rdagent.log.storage import FileStorage
+from rdagent.log.storage import open_storage
 from rdagent.log.ui.conf import UI_SETTING
 from rdagent.log.ui.utils import (
     curve_figure,
@@ -75,7 +75,7 @@ def load_data(log_path: Path):
     llm_data = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
     token_costs = defaultdict(list)
 
-    for msg in FileStorage(log_path).iter_msg():
+    for msg in open_storage(log_path).iter_msg():
         if not msg.tag:
             continue
         li, fn = extract_loopid_func_name(msg.tag)
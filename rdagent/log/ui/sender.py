@@ -0,0 +1,174 @@
+"""
+Asynchronous, batched delivery of the messages of `WebStorage` to the UI server.
+
+Logging must not wait for the UI server. `WebSender.send` only puts the message into a bounded queue; a background
+thread groups the queued messages into batches (at most `web_batch_size` messages, or whatever arrived within
+`web_batch_latency` seconds) and posts them over one keep-alive session to the `/receive` endpoint, gzip compressed
+when they are large. Failed posts are retried with exponential backoff and then dropped.
+
+When the queue is full, the messages are appended to a spill file and sent once the queue has drained
+(`web_backpressure="spill"`), or dropped (`web_backpressure="drop"`). While messages are spilled, new messages are
+spilled as well, so the order of the messages is kept. Each process has its own spill file, so a forked child
+neither sends nor removes the messages spilled by its parent.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from rdagent.log.ui.conf import UI_SETTING
+
+
+class WebSender:
+    def __init__(self, url: str, spill_dir: str | Path | None = None) -> None:
+        self.url = url
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else Path(tempfile.gettempdir())
+        self.spill_path = self._spill_path()
+        self.sent = 0
+        self.dropped = 0
+        self.batches = 0
+        self._pid: int | None = None
+        # registered once; the forked children inherit it and `close` only acts in the process running the thread
+        atexit.register(self.close)
+
+    def _spill_path(self) -> Path:
+        return self.spill_dir / f"rdagent_web_spill_{os.getpid()}_{id(self)}.jsonl"
+
+    def _start(self) -> None:
+        """(Re)initialize the queue and the thread; also after a fork, which does not copy the thread."""
+        self._pid = os.getpid()
+        self.spill_path = self._spill_path()
+        self._queue: queue.Queue[dict] = queue.Queue(maxsize=UI_SETTING.web_queue_size)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._spilled = 0
+        self._stop = threading.Event()
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run, name="rdagent-web-sender", daemon=True)
+        self._thread.start()
+
+    def send(self, msg: dict) -> None:
+        """Queue `msg` without blocking."""
+        if self._pid != os.getpid():
+            self._start()
+        with self._lock:
+            if self._spilled == 0:
+                try:
+                    self._queue.put_nowait(msg)
+                    self._pending += 1
+                    return
+                except queue.Full:
+                    pass
+            if UI_SETTING.web_backpressure == "drop" or self._spilled >= UI_SETTING.web_spill_max_messages:
+                self.dropped += 1
+                return
+            try:
+                with self.spill_path.open("a") as f:
+                    f.write(json.dumps(msg) + "\n")
+            except OSError:
+                self.dropped += 1
+                return
+            self._spilled += 1
+            self._pending += 1
+
+    def _next_batch(self) -> list[dict]:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + UI_SETTING.web_batch_latency
+        while len(batch) < UI_SETTING.web_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _take_spilled(self) -> list[dict]:
+        with self._lock:
+            if self._spilled == 0 or not self._queue.empty():
+                return []
+            try:
+                with self.spill_path.open() as f:
+                    msgs = [json.loads(line) for line in f]
+                self.spill_path.unlink()
+            except (OSError, ValueError):
+                # the spilled messages are lost; they must not keep `flush` waiting
+                msgs = []
+                self.dropped += self._spilled
+                self._pending -= self._spilled
+                self._idle.notify_all()
+            self._spilled = 0
+        return msgs
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._pending == 0):
+            try:
+                batch = self._next_batch()
+                if batch:
+                    self._post(batch)
+                spilled = self._take_spilled()
+                for start in range(0, len(spilled), UI_SETTING.web_batch_size):
+                    self._post(spilled[start : start + UI_SETTING.web_batch_size])
+            except Exception:
+                # the thread must survive any error, otherwise every later message would be lost silently
+                time.sleep(0.5)
+
+    def _post(self, batch: list[dict]) -> None:
+        body = json.dumps(batch).encode()
+        headers = {"Content-Type": "application/json"}
+        if len(body) >= UI_SETTING.web_compress_min_bytes:
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        delivered = False
+        for attempt in range(UI_SETTING.web_max_retries + 1):
+            if attempt:
+                time.sleep(UI_SETTING.web_retry_backoff * 2 ** (attempt - 1))
+            try:
+                resp = self._session.post(
+                    f"{self.url}/receive", data=body, headers=headers, timeout=UI_SETTING.web_timeout
+                )
+                if resp.status_code < 500:
+                    delivered = resp.ok
+                    break
+            except requests.RequestException:
+                continue
+        with self._lock:
+            if delivered:
+                self.sent += len(batch)
+                self.batches += 1
+            else:
+                self.dropped += len(batch)
+            self._pending -= len(batch)
+            self._idle.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every queued message is sent or dropped; return False on timeout."""
+        if self._pid != os.getpid():
+            return True
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._pid != os.getpid():
+            return
+        self.flush(timeout=timeout)
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._pid = None
+
+    def stats(self) -> dict[str, Any]:
+        return {"sent": self.sent, "dropped": self.dropped, "batches": self.batches}
@@ -2,20 +2,36 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Generator
 
-import requests
-
 from rdagent.log.base import Message, Storage
 from rdagent.log.utils import extract_evoid, extract_loopid_func_name, gen_datetime
 
 from .conf import UI_SETTING
+from .sender import WebSender
 
 
 class WebStorage(Storage):
     """
     The storage for web app.
     It is used to provide the data for the web app.
+    The messages are sent to the UI server in the background by a `WebSender`, so logging never waits for it.
     """
 
+    # `_obj_to_json` only converts the messages whose tag contains one of them
+    CONVERTED_TAG_KEYWORDS = (
+        "hypothesis generation",
+        "pdf_image",
+        "load_pdf_screenshot",
+        "experiment generation",
+        "load_experiment",
+        "direct_exp_gen",
+        "evolving code",
+        "evolving feedback",
+        "scenario",
+        "Quantitative Backtesting Chart",
+        "running",
+        "feedback",
+    )
+
     def __init__(self, port: int, path: str) -> None:
         """
         Initializes the storage object with the specified port and identifier.
@@ -26,6 +42,7 @@ class WebStorage(Storage):
         self.url = f"http://localhost:{port}"
         self.path = path
         self.msgs = []
+        self.sender = WebSender(self.url)
 
     def __str__(self):
         return f"WebStorage({self.url})"
@@ -35,20 +52,13 @@ class WebStorage(Storage):
         if "pdf_image" in tag or "load_pdf_screenshot" in tag:
             obj.save(f"{UI_SETTING.static_path}/{timestamp.isoformat()}.jpg")
 
-        try:
-            data = self._obj_to_json(obj=obj, tag=tag, id=self.path, timestamp=timestamp.isoformat())
-            if not data:
-                return "Normal log, skipped"
-            if isinstance(data, list):
-                for d in data:
-                    self.msgs.append(d)
-            else:
-                self.msgs.append(data)
-            headers = {"Content-Type": "application/json"}
-            resp = requests.post(f"{self.url}/receive", json=data, headers=headers, timeout=1)
-            return f"{resp.status_code} {resp.text}"
-        except (requests.ConnectionError, requests.Timeout) as e:
-            pass
+        data = self._obj_to_json(obj=obj, tag=tag, id=self.path, timestamp=timestamp.isoformat())
+        if not data:
+            return "Normal log, skipped"
+        for d in data if isinstance(data, list) else [data]:
+            self.msgs.append(d)
+            self.sender.send(d)
+        return "Queued"
 
     def truncate(self, time: datetime) -> None:
         self.msgs = [m for m in self.msgs if datetime.fromisoformat(m["msg"]["timestamp"]) <= time]
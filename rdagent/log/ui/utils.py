@@ -15,9 +15,9 @@ from matplotlib import pyplot as plt
 from rdagent.app.data_science.loop import DataScienceRDLoop
 from rdagent.core.proposal import Trace
 from rdagent.core.utils import cache_with_pickle
-from rdagent.log.storage import FileStorage
+from rdagent.log.storage import open_storage
+from rdagent.log.summary_index import TraceSummary, exp_code_hash
 from rdagent.log.ui.conf import UI_SETTING
-from rdagent.log.utils import extract_json
 from rdagent.oai.llm_utils import md5_hash
 from rdagent.scenarios.data_science.experiment.experiment import DSExperiment
 from rdagent.scenarios.kaggle.kaggle_crawler import get_metric_direction
@@ -169,48 +169,35 @@ def get_sota_exp_stat(
         - sota_exp_stat : str or None
             The medal status string ("gold", "silver", "bronze", etc.) or None if not found.
     """
-    log_storage = FileStorage(log_path)
+    log_storage = open_storage(log_path)
+    summary = TraceSummary.load(log_path)
 
-    # get sota exp
-    sota_exp_list = [
-        i.content for i in log_storage.iter_msg(tag=("sota_exp_to_submit" if to_submit else "SOTA experiment"))
-    ]
-    if len(sota_exp_list) == 0:
+    # get sota exp; only the content of the last message is loaded
+    sota_exp_msgs = list(log_storage.iter_msg(tag=("sota_exp_to_submit" if to_submit else "SOTA experiment")))
+    if len(sota_exp_msgs) == 0:
         # if no sota exp found, try to find the last trace
-        trace_list = [i.content for i in log_storage.iter_msg(tag="trace")]
-        final_trace = trace_list[-1] if trace_list else None
+        trace_msgs = list(log_storage.iter_msg(tag="trace"))
+        final_trace = trace_msgs[-1].content if trace_msgs else None
         if final_trace is not None:
             sota_exp = final_trace.sota_exp_to_submit if to_submit else final_trace.sota_experiment(search_type="all")
         else:
             sota_exp = None
     else:
-        sota_exp = sota_exp_list[-1]
+        sota_exp = sota_exp_msgs[-1].content
 
     if sota_exp is None:
         return None, None, None, None
 
-    # find sota exp's loop id
-    sota_loop_id = None
-    running_exps: list[tuple[DSExperiment, int]] = [
-        (i.content, int(re.search(r".*Loop_(\d+).*", str(i.tag))[1]))
-        for i in log_storage.iter_msg(pattern="**/running/*/*.pkl")
-    ]
-    running_exps.sort(key=lambda x: x[1], reverse=True)
-    for exp, loop_id in running_exps:
-        if exp.experiment_workspace.all_codes == sota_exp.experiment_workspace.all_codes and str(exp.hypothesis) == str(
-            sota_exp.hypothesis
-        ):
-            sota_loop_id = loop_id
-            break
+    # find sota exp's loop id: the last loop running the same code
+    sota_hash = exp_code_hash(sota_exp)
+    sota_loop_id = max((li for li, loop in summary.loops.items() if loop.code_hash == sota_hash), default=None)
 
     # get sota exp's mle score
-    try:
-        sota_mle_score = extract_json(
-            [i.content for i in log_storage.iter_msg(tag=f"Loop_{sota_loop_id}.running.mle_score")][0]
-        )
-    except Exception as e:
+    sota_loop = summary.loops.get(sota_loop_id)
+    if sota_loop is None or not sota_loop.graded:
         # sota exp is not tested yet
         return sota_exp, sota_loop_id, None, None
+    sota_mle_score = sota_loop.mle_score
 
     sota_exp_stat = None
     if sota_mle_score:  # sota exp's grade output
@@ -296,22 +283,13 @@ def get_summary_df(log_folders: list[str], hours: int | None = None) -> tuple[di
             else:
                 v["script_time"] = None
 
-            exp_gen_time = timedelta()
-            coding_time = timedelta()
-            running_time = timedelta()
-            all_time = timedelta()
-            times_info = load_times(Path(lf) / k)
-            for time_info in times_info.values():
-                all_time += sum((ti.end - ti.start for ti in time_info), timedelta())
-                exp_gen_time += time_info[0].end - time_info[0].start
-                if len(time_info) > 1:
-                    coding_time += time_info[1].end - time_info[1].start
-                if len(time_info) > 2:
-                    running_time += time_info[2].end - time_info[2].start
-            v["exec_time"] = str(all_time).split(".")[0]
-            v["exp_gen_time"] = str(exp_gen_time).split(".")[0]
-            v["coding_time"] = str(coding_time).split(".")[0]
-            v["running_time"] = str(running_time).split(".")[0]
+            # the step timings come from the per-loop summary records (the step boundaries recorded by the loop)
+            # instead of unpickling the session; `exec` is the sum of the running times of the steps
+            loops = TraceSummary.load(Path(lf) / k).loops.values()
+            steps = {"exec": None, "exp_gen": "direct_exp_gen", "coding": "coding", "running": "running"}
+            for name, step in steps.items():
+                step_time = sum((loop.duration(step) for loop in loops), timedelta())
+                v[f"{name}_time"] = str(step_time).split(".")[0]
 
             sota_exp, v["sota_loop_id_new"], sota_report, v["sota_exp_stat_new"] = get_sota_exp_stat(
                 Path(lf) / k, to_submit=True
@@ -461,9 +461,13 @@ class APIBackend(ABC):
             API_start_time = datetime.now()
             try:
                 if embedding:
-                    return self._create_embedding_with_cache(*args, **kwargs)
+                    resp = self._create_embedding_with_cache(*args, **kwargs)
+                    RD_Agent_TIMER_wrapper.record_api_call(datetime.now() - API_start_time)
+                    return resp
                 if chat_completion:
-                    return self._create_chat_completion_auto_continue(*args, **kwargs)
+                    resp = self._create_chat_completion_auto_continue(*args, **kwargs)
+                    RD_Agent_TIMER_wrapper.record_api_call(datetime.now() - API_start_time)
+                    return resp
             except Exception as e:  # noqa: BLE001
                 if hasattr(e, "message") and (
                     "'messages' must contain the word 'json' in some form" in e.message
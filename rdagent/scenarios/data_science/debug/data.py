@@ -3,12 +3,14 @@ import os
 import shutil
 from collections import Counter, defaultdict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+from rdagent.core.utils import multiprocessing_wrapper
+
 try:
     import bson  # pip install pymongo
 except:
@@ -21,6 +23,13 @@ class DataHandler:
     def load(self, path) -> pd.DataFrame:
         raise NotImplementedError
 
+    def iter_chunks(self, path, chunk_rows: int = 100_000) -> Iterator[pd.DataFrame] | None:
+        """
+        Read the file in chunks of at most `chunk_rows` rows.
+        Return None if it can not be read incrementally; the file is then loaded with `load`.
+        """
+        return None
+
     def dump(self, df: pd.DataFrame, path):
         raise NotImplementedError
 
@@ -62,6 +71,35 @@ class GenericDataHandler(DataHandler):
         else:
             raise ValueError(f"Unsupported file type: {suffix}")
 
+    def iter_chunks(self, path, chunk_rows: int = 100_000) -> Iterator[pd.DataFrame] | None:
+        """
+        Read the file in chunks of at most `chunk_rows` rows.
+        Return None if the file type can not be read incrementally.
+        """
+        path = Path(path)
+        suffix = path.suffix.lower()
+
+        if suffix == ".csv":
+            return self._iter_reader(pd.read_csv(path, encoding="utf-8", chunksize=chunk_rows))
+        elif suffix == ".jsonl":
+            return self._iter_reader(pd.read_json(path, lines=True, chunksize=chunk_rows))
+        elif suffix == ".parquet":
+            return self._iter_parquet(path, chunk_rows)
+        return None
+
+    @staticmethod
+    def _iter_reader(reader) -> Iterator[pd.DataFrame]:
+        with reader:
+            yield from reader
+
+    @staticmethod
+    def _iter_parquet(path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        import pyarrow.parquet as pq
+
+        # the batches are read row group by row group; the pandas metadata (e.g. the index) is kept
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+
     def dump(self, df: pd.DataFrame | dict, path):
         path = Path(path)
         suffix = path.suffix.lower()
@@ -101,6 +139,60 @@ class DataReducer:
     def reduce(self, df: pd.DataFrame) -> pd.DataFrame:
         raise NotImplementedError
 
+    def reduce_stream(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Reduce a table which is read in chunks.
+        Reducers without a streaming implementation load the whole table.
+        """
+        return self.reduce(pd.concat(list(chunks)))
+
+
+class RowReservoir:
+    """
+    Uniform sample of the rows of a table read in chunks, in a single pass.
+
+    Every row gets a random key; the sample of `n` rows is the `n` rows with the smallest keys. As the number of
+    rows is only known at the end, the rows whose key is below `1.25 * rate` are kept, plus the `n_spare` rows with
+    the smallest keys above it. So any sample of up to about `rate` of the rows can be taken at the end, while only
+    this fraction of the table is held in memory.
+    """
+
+    KEY = "__reservoir_key__"
+    ROW = "__reservoir_row__"
+
+    def __init__(self, rate: float, n_spare: int = 1000, seed: int = 1):
+        self.threshold = min(1.0, rate * 1.25)
+        self.n_spare = n_spare
+        self.rng = np.random.default_rng(seed)
+        self.n_rows = 0
+        self.kept: list[pd.DataFrame] = []
+        self.spare: pd.DataFrame | None = None
+
+    def add(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Add the rows of the chunk; return the chunk with the key and the row number of each row."""
+        chunk = chunk.assign(
+            **{self.KEY: self.rng.random(len(chunk)), self.ROW: np.arange(self.n_rows, self.n_rows + len(chunk))}
+        )
+        self.n_rows += len(chunk)
+        below = chunk[self.KEY] < self.threshold
+        self.kept.append(chunk[below])
+        rest = chunk[~below] if self.spare is None else pd.concat([self.spare, chunk[~below]])
+        self.spare = rest.nsmallest(self.n_spare, self.KEY)
+        return chunk
+
+    def take(self, n: int, exclude: Iterable[int] = ()) -> pd.DataFrame:
+        """The `n` rows with the smallest keys, except the rows numbered in `exclude`."""
+        if self.spare is None:  # no chunk was read
+            return pd.DataFrame(columns=[self.KEY, self.ROW])
+        rows = pd.concat(self.kept + [self.spare])
+        rows = rows[~rows[self.ROW].isin(list(exclude))]
+        return rows.nsmallest(n, self.KEY)
+
+    @classmethod
+    def finish(cls, rows: pd.DataFrame) -> pd.DataFrame:
+        """Restore the order of the rows in the table and drop the helper columns."""
+        return rows.sort_values(cls.ROW).drop(columns=[cls.KEY, cls.ROW])
+
 
 class RandDataReducer(DataReducer):
     """
@@ -115,6 +207,14 @@ class RandDataReducer(DataReducer):
             return df
         return df.sample(frac=frac, random_state=1)
 
+    def reduce_stream(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        reservoir = RowReservoir(self.min_frac, max(self.min_num, 1000))
+        for chunk in chunks:
+            reservoir.add(chunk)
+        n_rows = reservoir.n_rows
+        frac = max(self.min_frac, self.min_num / n_rows) if n_rows else 1
+        return RowReservoir.finish(reservoir.take(min(n_rows, round(frac * n_rows))))
+
 
 class FolderReducer(DataReducer):
     """
@@ -233,6 +333,77 @@ class UniqueIDDataReducer(DataReducer):
         result_df = pd.concat([sampled_rows, remaining_sampled]).sort_index()
         return result_df
 
+    @staticmethod
+    def _first_per_label(rows: pd.DataFrame, pos: int) -> pd.DataFrame:
+        """The row with the smallest reservoir key of each label in the column at `pos`."""
+        order = np.argsort(rows[RowReservoir.KEY].to_numpy())
+        labels = rows.iloc[order, pos]
+        return rows.iloc[order[(labels.notna() & ~labels.duplicated()).to_numpy()]]
+
+    def reduce_stream(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Same sampling as `reduce` in a single pass: one row with the smallest key per label is kept for both
+        candidate label columns, and the remaining rows are taken from a `RowReservoir`.
+        A candidate is dropped as soon as it has as many labels as half of the rows read so far.
+        """
+        reservoir = RowReservoir(self.min_frac, max(self.min_num, 1000))
+        candidates: dict[int, dict] = {}  # column position -> state
+        for chunk in chunks:
+            if not candidates:
+                positions = [chunk.shape[1] - 1] + ([1] if chunk.shape[1] > 2 else [])
+                candidates = {
+                    pos: {
+                        "valid": len(chunk) > 0
+                        and isinstance(
+                            chunk.iloc[0, pos], (int, float, str, tuple, frozenset, bytes, complex, type(None))
+                        ),
+                        "float_like": True,  # numeric and all values are floats, i.e. rather a target than a label
+                        "reps": None,
+                    }
+                    for pos in positions
+                }
+            keyed = reservoir.add(chunk)
+            for pos, state in candidates.items():
+                if not state["valid"]:
+                    continue
+                column = keyed.iloc[:, pos]
+                state["float_like"] &= pd.api.types.is_numeric_dtype(column) and (
+                    pd.api.types.is_float_dtype(column) or column.notna().sum() == 0
+                )
+                reps = self._first_per_label(keyed, pos)
+                if state["reps"] is not None:
+                    reps = self._first_per_label(pd.concat([state["reps"], reps]), pos)
+                state["reps"] = reps
+                if len(state["reps"]) >= reservoir.n_rows * 0.5:
+                    state.update(valid=False, reps=None)
+
+        n_rows = reservoir.n_rows
+        if not n_rows:
+            return RowReservoir.finish(reservoir.take(0))
+        reps = next(
+            (
+                state["reps"]
+                for state in candidates.values()
+                if state["valid"] and len(state["reps"]) > 0 and not state["float_like"]
+            ),
+            None,
+        )
+        frac = max(self.min_frac, self.min_num / n_rows)
+        if reps is None:
+            return RowReservoir.finish(reservoir.take(min(n_rows, round(frac * n_rows))))
+
+        unique_count = len(reps)
+        print(f"Unique labels: {unique_count} / {n_rows}")
+        if int(n_rows * frac) < unique_count:
+            return RowReservoir.finish(reps).reset_index(drop=True)
+
+        remaining_frac = frac - unique_count / n_rows
+        n_remaining = n_rows - unique_count
+        remaining_sampled = reservoir.take(
+            n_remaining if remaining_frac >= 1 else round(remaining_frac * n_remaining), exclude=reps[RowReservoir.ROW]
+        )
+        return RowReservoir.finish(pd.concat([reps, remaining_sampled]))
+
 
 class JsonReducer(DataReducer):
 
@@ -317,11 +488,43 @@ class DataSampler:
         raise NotImplementedError
 
 
+def sample_data_file(
+    data_handler: DataHandler,
+    data_reducer: DataReducer,
+    file_path: Path,
+    sampled_file_path: Path,
+    stream_min_bytes: int,
+) -> tuple[pd.DataFrame | None, Exception | None]:
+    """
+    Reduce a data file and dump the sample; files of at least `stream_min_bytes` are read in chunks when possible.
+    Return the sample (None if the file is not a table) and the exception raised when dumping it.
+    """
+    chunks = data_handler.iter_chunks(file_path) if file_path.stat().st_size >= stream_min_bytes else None
+    if chunks is not None:
+        df_sampled = data_reducer.reduce_stream(chunks)
+    else:
+        df = data_handler.load(file_path)
+        if df is None:
+            return None, None
+        df_sampled = data_reducer.reduce(df)
+        del df
+    try:
+        data_handler.dump(df_sampled, sampled_file_path)
+    except Exception as e:
+        return df_sampled, e
+    return df_sampled, None
+
+
 class DefaultSampler(DataSampler):
+    # data files at least this large are sampled while reading them in chunks instead of loading them
+    stream_min_bytes: int = 256 * 2**20
+    # number of data files sampled in parallel
+    n_jobs: int = 4
+
     def sample(self) -> None:
         # Traverse the folder and exclude specific file types, without json currently
 
-        files_to_process = [file for file in self.data_folder.rglob("*") if file.is_file()]
+        files_to_process = list(iter_files(self.data_folder))
         file_types_count = count_files_in_folder(files_to_process)
         sample_json = False
         if isinstance(self.data_reducer, JsonReducer):
@@ -336,8 +539,9 @@ class DefaultSampler(DataSampler):
         processed_files = []
         sample_used_file_names = set()
         has_id_col = False
+        data_files = []
 
-        for file_path in tqdm(files_to_process, desc="Processing data", unit="file"):
+        for file_path in files_to_process:
             sampled_file_path = self.sample_folder / file_path.relative_to(self.data_folder)
             if sampled_file_path.exists():
                 continue
@@ -358,29 +562,38 @@ class DefaultSampler(DataSampler):
                     sample_used_file_names = [file_path.parent / i for i in self.data_reducer.sampled_files]
                     print("sample_used_file_names", len(sample_used_file_names))
             else:
-                df = self.data_handler.load(file_path)
-                if df is None:
-                    continue
-
-                # Create a sampled subset
-                df_sampled = self.data_reducer.reduce(df)
-                processed_files.append(file_path)
-                # Dump the sampled data
-                try:
-                    self.data_handler.dump(df_sampled, sampled_file_path)
-                    # Extract possible file references from the sampled data
-                    if "submission" in file_path.stem:
-                        continue  # Skip submission files
-                    for col in df_sampled.columns:
-                        if "id" in col:
-                            has_id_col = True
-                            sample_used_file_names.extend([df_sampled[col].astype(str).unique()])
-                            continue
-                    for col in df_sampled.columns:
+                data_files.append((file_path, sampled_file_path))
+
+        # Create the sampled subsets of the data files in parallel and dump them
+        results = multiprocessing_wrapper(
+            [
+                (sample_data_file, (self.data_handler, self.data_reducer, fp, sfp, self.stream_min_bytes))
+                for fp, sfp in data_files
+            ],
+            n=self.n_jobs,
+        )
+        for (file_path, _), (df_sampled, error) in tqdm(
+            zip(data_files, results), total=len(data_files), desc="Processing data", unit="file"
+        ):
+            if df_sampled is None:
+                continue
+            processed_files.append(file_path)
+            try:
+                if error is not None:
+                    raise error
+                # Extract possible file references from the sampled data
+                if "submission" in file_path.stem:
+                    continue  # Skip submission files
+                for col in df_sampled.columns:
+                    if "id" in col:
+                        has_id_col = True
                         sample_used_file_names.extend([df_sampled[col].astype(str).unique()])
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
-                    continue
+                        continue
+                for col in df_sampled.columns:
+                    sample_used_file_names.extend([df_sampled[col].astype(str).unique()])
+            except Exception as e:
+                print(f"Error processing {file_path}: {e}")
+                continue
 
         # Process non-data files
         subfolder_dict = {}
@@ -555,6 +768,22 @@ class SingleFilePerFolderSampler(DataSampler):
         print(f"[INFO] SingleFilePerFolderSampler: copied {total} files to {sample_folder}")
 
 
+def iter_files(folder: Path) -> Iterator[Path]:
+    """
+    Recursively yield the files in a folder, like `folder.rglob("*")` filtered by `is_file()`.
+    The entry types are cached by `os.scandir`, so only symlinks need a stat call.
+    """
+    subfolders = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subfolders.append(entry.path)
+            elif entry.is_file():
+                yield Path(entry.path)
+    for subfolder in subfolders:
+        yield from iter_files(Path(subfolder))
+
+
 def copy_file(src_fp, target_folder, data_folder):
     """
     Construct the target file path based on the file's relative location from data_folder,
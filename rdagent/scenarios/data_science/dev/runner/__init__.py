@@ -1,3 +1,5 @@
+from dataclasses import asdict
+
 import pandas as pd
 
 from rdagent.app.data_science.conf import DS_RD_SETTING
@@ -14,14 +16,18 @@ from rdagent.components.coder.CoSTEER.evolving_strategy import (
     MultiProcessEvolvingStrategy,
 )
 from rdagent.components.coder.CoSTEER.task import CoSTEERTask
+from rdagent.components.coder.data_science.conf import get_ds_env
 from rdagent.components.coder.data_science.share.eval import ModelDumpEvaluator
 from rdagent.core.exception import RunnerError
 from rdagent.core.scenario import Scenario
 from rdagent.log import rdagent_logger as logger
+from rdagent.log.timer import RD_Agent_TIMER_wrapper
 from rdagent.oai.llm_utils import APIBackend, md5_hash
 from rdagent.scenarios.data_science.dev.runner.eval import DSCoSTEERCoSTEEREvaluator
+from rdagent.scenarios.data_science.dev.runtime_estimator import get_runtime_estimator
 from rdagent.utils.agent.ret import PythonBatchEditOut, PythonBatchPatchOut
 from rdagent.utils.agent.tpl import T
+from rdagent.utils.resource_scheduler import parse_memory_size
 from rdagent.utils.workflow import wait_retry
 
 
@@ -150,7 +156,44 @@ class DSCoSTEERRunner(CoSTEER):
             **kwargs,
         )
 
+    def check_budget(self, exp) -> None:
+        """
+        Estimate the full run of the experiment from its debug run and raise `RunnerError` instead of running it
+        when it is not expected to finish within the remaining budget.
+        """
+        workspace = exp.experiment_workspace
+        profile = workspace.running_info.debug_profile
+        if profile is None or profile.code_md5 != md5_hash(workspace.all_codes):
+            return
+        estimate = get_runtime_estimator(self.scen.competition).estimate(profile)
+        if estimate is None:
+            return
+        budget = DS_RD_SETTING.full_timeout
+        if (remain_time := RD_Agent_TIMER_wrapper.timer.remain_time()) is not None:
+            budget = min(budget, remain_time.total_seconds())
+        mem_limit_mb = parse_memory_size(getattr(get_ds_env().conf, "mem_limit", None))
+        logger.info(
+            f"Estimated full run: {estimate.time:.0f}s (budget {budget:.0f}s), "
+            f"{estimate.memory_mb}MiB (limit {mem_limit_mb}MiB)"
+        )
+        logger.log_object({**asdict(estimate), "budget": budget, "mem_limit_mb": mem_limit_mb}, tag="runtime_estimate")
+
+        if DS_RD_SETTING.runtime_reject_ratio is None:
+            return
+        if estimate.time > budget * DS_RD_SETTING.runtime_reject_ratio:
+            raise RunnerError(
+                f"The full run is estimated to take {estimate.time:.0f} seconds from the debug run, "
+                f"which exceeds the remaining budget of {budget:.0f} seconds. Reduce the cost of the training "
+                "(e.g. fewer epochs, a smaller model or a subset of the features)."
+            )
+        if estimate.memory_mb is not None and mem_limit_mb is not None and estimate.memory_mb > mem_limit_mb:
+            raise RunnerError(
+                f"The full run is estimated to use {estimate.memory_mb:.0f}MiB of memory from the debug run, "
+                f"which exceeds the limit of {mem_limit_mb:.0f}MiB. Reduce the memory usage of the pipeline."
+            )
+
     def develop(self, exp):
+        self.check_budget(exp)
         bak_sub_tasks = exp.sub_tasks
         exp.sub_tasks = [
             CoSTEERTask(
@@ -1,4 +1,3 @@
-import json
 import re
 from pathlib import Path
 
@@ -10,18 +9,29 @@ from rdagent.components.coder.CoSTEER.evaluators import (
     CoSTEERSingleFeedback,
 )
 from rdagent.components.coder.data_science.conf import get_clear_ws_cmd, get_ds_env
-from rdagent.components.coder.data_science.utils import remove_eda_part
+from rdagent.components.coder.data_science.utils import (
+    USAGE_TRACKER_FILE,
+    inject_stage_cache,
+    read_peak_memory_mb,
+    read_used_files,
+    remove_eda_part,
+    stage_cache_report,
+    usage_tracked_cmd,
+)
 from rdagent.core.evolving_framework import QueriedKnowledge
 from rdagent.core.experiment import FBWorkspace, Task
 from rdagent.log import rdagent_logger as logger
+from rdagent.scenarios.data_science.dev.runtime_estimator import get_runtime_estimator
 from rdagent.scenarios.data_science.test_eval import (
     MLETestEval,
     NoTestEvalError,
     get_test_eval,
 )
+from rdagent.utils import md5_hash
 from rdagent.utils.agent.tpl import T
 from rdagent.utils.agent.workflow import build_cls_from_json_with_retry
 from rdagent.utils.fmt import shrink_text
+from rdagent.utils.resource_scheduler import ResourceRequest
 
 DIRNAME = Path(__file__).absolute().resolve().parent
 
@@ -63,12 +73,32 @@ class DSCoSTEERCoSTEEREvaluator(CoSTEEREvaluator):
         stdout = implementation.execute(
             env=env, entry=get_clear_ws_cmd()
         )  # Remove previous submission and scores files generated by worklfow.
+        if DS_RD_SETTING.enable_stage_cache:
+            inject_stage_cache(implementation)
 
         # execute workflow
-        result = implementation.run(env=env, entry="python -m coverage run main.py")
+        # the usage tracker measures the peak memory; the used files are only checked when the workflow is composed
+        # of several components
+        # reserve the memory of the full run estimated from the debug run of the same code
+        profile = implementation.running_info.debug_profile
+        if profile is not None and profile.code_md5 == md5_hash(implementation.all_codes):
+            resources = ResourceRequest(memory_mb=profile.peak_memory_mb)
+        else:
+            profile, resources = None, None
+        result = implementation.run(env=env, entry=usage_tracked_cmd(implementation), resources=resources)
         stdout = result.stdout
         execute_ret_code = result.exit_code
         implementation.running_info.running_time = result.running_time
+        implementation.running_info.peak_memory_mb = read_peak_memory_mb(implementation.workspace_path)
+
+        # record the outcome of the first full run of the code profiled in debug mode to calibrate the estimates
+        if profile is not None:
+            timed_out = result.running_time >= env.conf.running_timeout_period
+            if execute_ret_code == 0 or timed_out:
+                get_runtime_estimator(self.scen.competition).record(
+                    profile, result.running_time, implementation.running_info.peak_memory_mb, timed_out
+                )
+            implementation.running_info.debug_profile = None
 
         match = re.search(r"(.*?)=== Start of EDA part ===(.*)=== End of EDA part ===", stdout, re.DOTALL)
         eda_output = match.groups()[1] if match else None
@@ -77,6 +107,9 @@ class DSCoSTEERCoSTEEREvaluator(CoSTEEREvaluator):
         implementation.inject_files(**{"EDA.md": eda_output})
         stdout = remove_eda_part(stdout)
         stdout += f"The code executed {'successfully' if execute_ret_code == 0 else 'failed'}. {'The EDA output is removed from the stdout. ' if eda_output else ''}"
+        if (cache_report := stage_cache_report(implementation.workspace_path)) is not None:
+            logger.info(cache_report)
+            stdout += f"\n{cache_report}"
 
         # Check score file
         score_fp = implementation.workspace_path / "scores.csv"
@@ -151,11 +184,8 @@ class DSCoSTEERCoSTEEREvaluator(CoSTEEREvaluator):
 
         if feedback and not DS_RD_SETTING.coder_on_whole_pipeline:
             # remove unused files
-            implementation.execute(env=env, entry="python -m coverage json -o coverage.json")
-            coverage_report_path = implementation.workspace_path / "coverage.json"
-            if coverage_report_path.exists():
-                used_files = set(json.loads(coverage_report_path.read_text())["files"].keys())
-                coverage_report_path.unlink()
+            used_files = read_used_files(implementation.workspace_path)
+            if used_files is not None:
                 logger.info(f"All used scripts: {used_files}")
 
                 use_one_model = False
@@ -175,7 +205,11 @@ class DSCoSTEERCoSTEEREvaluator(CoSTEEREvaluator):
                 unused_files = [
                     py_file.name
                     for py_file in all_python_files
-                    if not (py_file.name in used_files or py_file.name.endswith("test.py"))
+                    if not (
+                        py_file.name in used_files
+                        or py_file.name.endswith("test.py")
+                        or py_file.name == Path(USAGE_TRACKER_FILE).name
+                    )
                 ]
                 if unused_files:
                     logger.warning(f"Unused scripts: {unused_files}")
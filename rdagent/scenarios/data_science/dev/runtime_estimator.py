@@ -0,0 +1,180 @@
+"""
+Estimate the runtime and memory of a full run from the debug run of the same code.
+
+In debug mode (`DS_RD_SETTING.sample_data_by_LLM`), the pipeline loads the full data but trains on a sample for fewer
+epochs, and prints the time of its training part and its own estimate of that time in the full run:
+
+    === Start of Debug Information ===
+    debug_time: 10.0
+    estimated_time: 100.0
+    sample_fraction: 0.1    (optional)
+    debug_epochs: 1         (optional)
+    full_epochs: 10         (optional)
+    === End of Debug Information ===
+
+`DebugProfile` records them with the wall time and the peak memory of the debug run. `RuntimeEstimator` keeps the
+part of the run which is not training and scales the training part:
+
+    full time = (debug wall time - debug_time) + debug_time * scale
+
+where `scale` is `estimated_time / debug_time`, or derived from the sample fraction and the epochs when no estimate is
+printed. The peak memory of the debug run (which already loads the full data) is the estimate of the full run.
+Both are then corrected by the median ratio of the actual to the estimated values of the previous full runs of the
+competition, which are recorded in a JSON lines file.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import statistics
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.log import rdagent_logger as logger
+from rdagent.utils.archive import iter_tree
+
+
+@lru_cache(maxsize=None)
+def input_data_size(path: str) -> int:
+    """The total size of the input data in bytes; the data of a competition does not change during a session."""
+    return sum(p.stat().st_size for p in iter_tree(Path(path)) if p.is_file())
+
+
+@dataclass
+class DebugProfile:
+    code_md5: str  # the code which was run
+    wall_time: float
+    debug_time: float  # the time of the training part, printed by the pipeline
+    estimated_time: float | None = None  # the pipeline's estimate of the training part in the full run
+    sample_fraction: float | None = None
+    debug_epochs: float | None = None
+    full_epochs: float | None = None
+    data_size: int | None = None
+    peak_memory_mb: float | None = None
+
+    @classmethod
+    def parse(cls, stdout: str, **kwargs) -> DebugProfile | None:
+        """Build the profile from the debug information in `stdout`; None if it does not print the debug time."""
+        values = {}
+        for key in ["debug_time", "estimated_time", "sample_fraction", "debug_epochs", "full_epochs"]:
+            if match := re.search(rf"{key}:\s*(\d+(?:\.\d+)?)", stdout):
+                values[key] = float(match.group(1))
+        if "debug_time" not in values:
+            return None
+        return cls(**values, **kwargs)
+
+    @property
+    def scale(self) -> float | None:
+        """How many times longer the training part takes in the full run."""
+        if self.estimated_time is not None and self.debug_time > 0:
+            return max(self.estimated_time / self.debug_time, 1.0)
+        if self.sample_fraction is None and (self.debug_epochs is None or self.full_epochs is None):
+            return None
+        scale = 1 / self.sample_fraction if self.sample_fraction else 1.0
+        if self.debug_epochs and self.full_epochs:
+            scale *= self.full_epochs / self.debug_epochs
+        return max(scale, 1.0)
+
+
+@dataclass
+class RuntimeEstimate:
+    time: float
+    memory_mb: float | None
+    raw_time: float  # before the calibration
+    raw_memory_mb: float | None
+
+
+class RuntimeEstimator:
+    def __init__(self, history_path: str | Path, min_history: int = 3, max_correction: float = 5.0) -> None:
+        """
+        Parameters
+        ----------
+        history_path : str | Path
+            The JSON lines file recording the estimates and the outcomes of the full runs.
+        min_history : int
+            The estimates are only calibrated once this many outcomes are recorded.
+        max_correction : float
+            The calibration never changes an estimate by more than this factor.
+        """
+        self.history_path = Path(history_path)
+        self.min_history = min_history
+        self.max_correction = max_correction
+
+    def history(self) -> list[dict]:
+        if not self.history_path.exists():
+            return []
+        records = []
+        for line in self.history_path.read_text().splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # e.g. a line cut by an interrupted write
+        return records
+
+    def correction(self, key: str) -> float:
+        """
+        The median ratio of the actual to the raw estimated `key` ("time" or "memory_mb") of the recorded runs.
+        The runs which timed out are left out: they only tell a lower bound of what the full run would have taken.
+        """
+        ratios = [
+            r[f"actual_{key}"] / r[f"raw_{key}"]
+            for r in self.history()
+            if not r.get("timed_out") and r.get(f"actual_{key}") is not None and r.get(f"raw_{key}")
+        ]
+        if len(ratios) < self.min_history:
+            return 1.0
+        return min(max(statistics.median(ratios), 1 / self.max_correction), self.max_correction)
+
+    @staticmethod
+    def raw_estimate(profile: DebugProfile) -> tuple[float, float | None] | None:
+        if (scale := profile.scale) is None:
+            return None
+        training_time = min(profile.debug_time, profile.wall_time)
+        return profile.wall_time - training_time + training_time * scale, profile.peak_memory_mb
+
+    def estimate(self, profile: DebugProfile) -> RuntimeEstimate | None:
+        """Estimate the full run; None if the profile does not tell how the training part scales."""
+        if (raw := self.raw_estimate(profile)) is None:
+            return None
+        raw_time, raw_memory_mb = raw
+        return RuntimeEstimate(
+            time=raw_time * self.correction("time"),
+            memory_mb=raw_memory_mb * self.correction("memory_mb") if raw_memory_mb is not None else None,
+            raw_time=raw_time,
+            raw_memory_mb=raw_memory_mb,
+        )
+
+    def record(
+        self,
+        profile: DebugProfile,
+        actual_time: float,
+        actual_memory_mb: float | None = None,
+        timed_out: bool = False,
+    ) -> None:
+        """Record the outcome of the full run of the profiled code for the calibration."""
+        if (raw := self.raw_estimate(profile)) is None:
+            return
+        record = {
+            **asdict(profile),
+            "raw_time": raw[0],
+            "raw_memory_mb": raw[1],
+            "actual_time": actual_time,
+            "actual_memory_mb": actual_memory_mb,
+            "timed_out": timed_out,  # the actual time is only a lower bound
+        }
+        logger.info(
+            f"Full run took {actual_time:.0f}s{' (timed out)' if timed_out else ''} "
+            f"for a raw estimate of {raw[0]:.0f}s."
+        )
+        logger.log_object(record, tag="runtime_estimate_outcome")
+        self.history_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.history_path.open("a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def get_runtime_estimator(competition: str) -> RuntimeEstimator:
+    """The estimator of a competition, calibrated by the full runs of all sessions on this machine."""
+    return RuntimeEstimator(Path(RD_AGENT_SETTINGS.workspace_path) / "runtime_estimates" / f"{competition}.jsonl")
@@ -1,9 +1,8 @@
 import asyncio
 import shutil
-import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Iterator, Optional, Union
 
 from rdagent.app.data_science.conf import DS_RD_SETTING
 from rdagent.components.coder.data_science.ensemble import EnsembleCoSTEER
@@ -33,6 +32,7 @@ from rdagent.scenarios.data_science.experiment.experiment import DSExperiment
 from rdagent.scenarios.data_science.proposal.exp_gen import DSTrace
 from rdagent.scenarios.data_science.proposal.exp_gen.idea_pool import DSKnowledgeBase
 from rdagent.scenarios.data_science.proposal.exp_gen.proposal import DSProposalV2ExpGen
+from rdagent.utils.archive import IncrementalArchive
 from rdagent.utils.workflow.misc import wait_retry
 
 
@@ -52,28 +52,23 @@ def clean_workspace(workspace_root: Path) -> None:
             file_and_folder.unlink()
 
 
+def workspace_archive_files(workspace_root: Path) -> Iterator[Path]:
+    """The files of each workspace which are kept by `clean_workspace`."""
+    for workspace in workspace_root.iterdir():
+        if workspace.is_dir() and not workspace.is_symlink():
+            for file in workspace.iterdir():
+                if not file.is_dir() and file.suffix in [".py", ".md", ".csv"]:
+                    yield file
+
+
 @wait_retry()
-def backup_folder(path: str | Path) -> Path:
-    path = Path(path)
-    workspace_bak_path = path.with_name(path.name + ".bak")
-    if workspace_bak_path.exists():
-        shutil.rmtree(workspace_bak_path)
-
-    try:
-        # `cp` may raise error if the workspace is beiing modified.
-        # rsync is more robust choice, but it is not installed in some docker images.
-        # use shutil.copytree(..., symlinks=True) should be more elegant, but it has more changes to raise error.
-        subprocess.run(
-            ["cp", "-r", "-P", str(path), str(workspace_bak_path)],
-            check=True,
-            capture_output=True,
-        )
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error copying {path} to {workspace_bak_path}: {e}")
-        logger.error(f"Stdout: {e.stdout.decode() if e.stdout else ''}")
-        logger.error(f"Stderr: {e.stderr.decode() if e.stderr else ''}")
-        raise
-    return workspace_bak_path
+def archive_folder(path: Path, archive_path: Path, workspace: bool = False) -> int:
+    """
+    Append the new or changed files of the folder to its incremental archive.
+    Only the essential files of the workspaces are archived (see `clean_workspace`).
+    """
+    archive = IncrementalArchive(archive_path, temp_path=DS_RD_SETTING.log_archive_temp_path)
+    return archive.add(path, workspace_archive_files(path) if workspace else None)
 
 
 class DataScienceRDLoop(RDLoop):
@@ -272,24 +267,8 @@ class DataScienceRDLoop(RDLoop):
         ):
             start_archive_datetime = datetime.now()
             logger.info(f"Archiving log and workspace folder after loop {self.loop_idx}")
-            mid_log_tar_path = (
-                Path(
-                    DS_RD_SETTING.log_archive_temp_path
-                    if DS_RD_SETTING.log_archive_temp_path
-                    else DS_RD_SETTING.log_archive_path
-                )
-                / "mid_log.tar"
-            )
-            mid_workspace_tar_path = (
-                Path(
-                    DS_RD_SETTING.log_archive_temp_path
-                    if DS_RD_SETTING.log_archive_temp_path
-                    else DS_RD_SETTING.log_archive_path
-                )
-                / "mid_workspace.tar"
-            )
-            log_back_path = backup_folder(Path().cwd() / "log")
-            subprocess.run(["tar", "-cf", str(mid_log_tar_path), "-C", str(log_back_path), "."], check=True)
+            # The archives can be restored with `IncrementalArchive(<archive path>).restore(<target folder>)`
+            n_log = archive_folder(Path.cwd() / "log", Path(DS_RD_SETTING.log_archive_path) / "log")
 
             # only clean current workspace without affecting other loops.
             for k in "direct_exp_gen", "coding", "running":
@@ -297,32 +276,14 @@ class DataScienceRDLoop(RDLoop):
                     assert isinstance(prev_out[k], DSExperiment)
                     clean_workspace(prev_out[k].experiment_workspace.workspace_path)
 
-            # Backup the workspace (only necessary files are included)
-            # - Step 1: Copy the workspace to a .bak package
-            workspace_bak_path = backup_folder(RD_AGENT_SETTINGS.workspace_path)
-
-            # - Step 2: Clean .bak package
-            for bak_workspace in workspace_bak_path.iterdir():
-                clean_workspace(bak_workspace)
-
-            # - Step 3: Create tarball from the cleaned .bak workspace
-            subprocess.run(["tar", "-cf", str(mid_workspace_tar_path), "-C", str(workspace_bak_path), "."], check=True)
-
-            # - Step 4: Remove .bak package
-            shutil.rmtree(workspace_bak_path)
-
-            if DS_RD_SETTING.log_archive_temp_path is not None:
-                shutil.move(mid_log_tar_path, Path(DS_RD_SETTING.log_archive_path) / "mid_log.tar")
-                mid_log_tar_path = Path(DS_RD_SETTING.log_archive_path) / "mid_log.tar"
-                shutil.move(mid_workspace_tar_path, Path(DS_RD_SETTING.log_archive_path) / "mid_workspace.tar")
-                mid_workspace_tar_path = Path(DS_RD_SETTING.log_archive_path) / "mid_workspace.tar"
-            shutil.copy(
-                mid_log_tar_path, Path(DS_RD_SETTING.log_archive_path) / "mid_log_bak.tar"
-            )  # backup when upper code line is killed when running
-            shutil.copy(
-                mid_workspace_tar_path, Path(DS_RD_SETTING.log_archive_path) / "mid_workspace_bak.tar"
-            )  # backup when upper code line is killed when running
-            self.timer.add_duration(datetime.now() - start_archive_datetime)
+            n_workspace = archive_folder(
+                Path(RD_AGENT_SETTINGS.workspace_path),
+                Path(DS_RD_SETTING.log_archive_path) / "workspace",
+                workspace=True,
+            )
+            archive_duration = datetime.now() - start_archive_datetime
+            logger.info(f"Archived {n_log} log files and {n_workspace} workspace files in {archive_duration}")
+            self.timer.add_duration(archive_duration)
 
     def _check_exit_conditions_on_step(self, loop_id: Optional[int] = None, step_id: Optional[int] = None):
         if step_id not in [self.steps.index("running"), self.steps.index("feedback")]:
@@ -76,13 +76,8 @@ class DSTrace(Trace[DataScienceScen, KnowledgeBase]):
         # If we implement the most correct merging logic,  merge 2 traces, will result in a single trace(2 traces currently).
         # So user may get unexpected results when he want to know ho many branches are created.
 
-        # Build a set of all parent indices found in dag_parent (skip empty tuples which represent roots)
-        parent_indices = set(idx for parents in self.dag_parent for idx in parents)
-        # All node indices
-        all_indices = set(range(len(self.hist)))
         # The leaf nodes have no children, so they are not present as parents of any other node
-        leaves = list(sorted(all_indices - parent_indices))
-        return leaves
+        return sorted(self._get_index().leaves)
 
     def sync_dag_parent_and_hist(
         self,
@@ -138,6 +133,22 @@ class DSTrace(Trace[DataScienceScen, KnowledgeBase]):
         else:
             raise ValueError(f"Invalid search type: {search_type}")
 
+    def _last_accepted_exp_fb(
+        self,
+        search_type: Literal["all", "ancestors"] = "ancestors",
+        selection: tuple[int, ...] | None = None,
+    ) -> tuple[DSExperiment, ExperimentFeedback] | None:
+        """The last experiment with a positive decision in the search list (see `retrieve_search_list`)."""
+        if search_type == "all":
+            idx = self._get_index().last_accepted
+        elif search_type == "ancestors":
+            if selection is None:
+                selection = self.get_current_selection()
+            idx = None if self.is_selection_new_tree(selection) else self.get_best_ancestor(selection[0])
+        else:
+            raise ValueError(f"Invalid search type: {search_type}")
+        return None if idx is None else self.hist[idx]
+
     def next_incomplete_component(
         self,
         search_type: Literal["all", "ancestors"] = "ancestors",
@@ -217,13 +228,9 @@ class DSTrace(Trace[DataScienceScen, KnowledgeBase]):
         Experiment or None
             The experiment result if found, otherwise None.
         """
-        search_list = self.retrieve_search_list(search_type, selection=selection)
-
         if DS_RD_SETTING.coder_on_whole_pipeline or self.next_incomplete_component() is None:
-            for exp, ef in search_list[::-1]:
-                # the sota exp should be accepted decision and all required components are completed.
-                if ef.decision:
-                    return exp, ef
+            # the sota exp should be accepted decision and all required components are completed.
+            return self._last_accepted_exp_fb(search_type, selection)
         return None
 
     def sota_experiment(
@@ -244,11 +251,8 @@ class DSTrace(Trace[DataScienceScen, KnowledgeBase]):
         """
         Access the last successful experiment even part of the components are not completed.
         """
-        search_list = self.retrieve_search_list(search_type, selection=selection)
-
-        for exp, ef in search_list[::-1]:
-            if ef.decision:
-                return exp
+        if (exp_fb := self._last_accepted_exp_fb(search_type, selection)) is not None:
+            return exp_fb[0]
         return None
 
     def last_exp(
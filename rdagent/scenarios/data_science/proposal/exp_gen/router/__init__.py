@@ -1,11 +1,9 @@
 from __future__ import annotations
 
-import asyncio
 from datetime import timedelta
 from typing import TYPE_CHECKING
 
 from rdagent.app.data_science.conf import DS_RD_SETTING
-from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.proposal import ExpGen, ExpPlanner
 from rdagent.core.utils import import_class
 from rdagent.log import rdagent_logger as logger
@@ -20,10 +18,7 @@ from rdagent.scenarios.data_science.proposal.exp_gen.planner import (
     ExperimentPlan,
 )
 from rdagent.scenarios.data_science.proposal.exp_gen.proposal import DSProposalV2ExpGen
-from rdagent.scenarios.data_science.proposal.exp_gen.trace_scheduler import (
-    RoundRobinScheduler,
-    TraceScheduler,
-)
+from rdagent.scenarios.data_science.proposal.exp_gen.trace_scheduler import TraceScheduler
 
 if TYPE_CHECKING:
     from rdagent.scenarios.data_science.experiment.experiment import DSExperiment
@@ -46,7 +41,9 @@ class ParallelMultiTraceExpGen(ExpGen):
         self.exp_gen = DataScienceRDLoop.default_exp_gen(self.scen)
         self.draft_exp_gen = DSDraftV2ExpGen(self.scen)
         self.merge_exp_gen = ExpGen2Hypothesis(self.scen)
-        self.trace_scheduler: TraceScheduler = RoundRobinScheduler(DS_RD_SETTING.max_trace_num)
+        self.trace_scheduler: TraceScheduler = import_class(DS_RD_SETTING.trace_scheduler_name)(
+            DS_RD_SETTING.max_trace_num
+        )
         self.planner = import_class(DS_RD_SETTING.planner)(self.scen)
 
     def gen(
@@ -68,49 +65,46 @@ class ParallelMultiTraceExpGen(ExpGen):
         logger.info(f"Remain time: {timer.remain_time()}")
         local_selection: tuple[int, ...] = None
 
-        while True:
-            if loop.get_unfinished_loop_cnt(loop.loop_idx) < RD_AGENT_SETTINGS.get_max_parallel():
-                # set trace current selection
-                if not timer.started or timer.remain_time() >= timedelta(hours=DS_RD_SETTING.merge_hours):
-                    local_selection = await self.trace_scheduler.next(trace)
-
-                    # set the local selection as the global current selection for the trace
-                    trace.set_current_selection(local_selection)
-                else:
-                    leaves: list[int] = trace.get_leaves()
-                    if len(leaves) < 2:
-                        local_selection = (-1,)
-                        trace.set_current_selection(selection=local_selection)
-                    else:
-                        local_selection = (leaves[0],)
-                        if trace.sota_exp_to_submit is not None:
-                            for i in range(1, len(leaves)):
-                                if trace.is_parent(trace.exp2idx(trace.sota_exp_to_submit), leaves[i]):
-                                    local_selection = (leaves[i],)
-                                    break
-                        trace.set_current_selection(local_selection)
+        await loop.wait_for_free_slot()
+        # set trace current selection
+        if not timer.started or timer.remain_time() >= timedelta(hours=DS_RD_SETTING.merge_hours):
+            local_selection = await self.trace_scheduler.next(trace, loop)
 
-                ds_plan = self.planner.plan(trace) if DS_RD_SETTING.enable_planner else DSExperimentPlan()
-                if (
-                    (not timer.started or timer.remain_time() >= timedelta(hours=DS_RD_SETTING.merge_hours))
-                    and trace.sota_experiment(selection=local_selection) is None
-                    and DS_RD_SETTING.enable_draft_before_first_sota
-                ):
-                    exp = self.draft_exp_gen.gen(trace, plan=ds_plan)
-                elif (
-                    timer.started
-                    and timer.remain_time() < timedelta(hours=DS_RD_SETTING.merge_hours)
-                    and len(leaves) >= 2
-                ):
-                    DS_RD_SETTING.coding_fail_reanalyze_threshold = 100000
-                    DS_RD_SETTING.consecutive_errors = 100000
-                    exp = self.merge_exp_gen.gen(trace, plan=ds_plan)
-                else:
-                    # If there is a sota experiment in the sub-trace and not in merge time, we use default exp_gen
-                    exp = self.exp_gen.gen(trace, plan=ds_plan)
+            # set the local selection as the global current selection for the trace
+            trace.set_current_selection(local_selection)
+        else:
+            leaves: list[int] = trace.get_leaves()
+            if len(leaves) < 2:
+                local_selection = (-1,)
+                trace.set_current_selection(selection=local_selection)
+            else:
+                local_selection = (leaves[0],)
+                if trace.sota_exp_to_submit is not None:
+                    for i in range(1, len(leaves)):
+                        if trace.is_parent(trace.exp2idx(trace.sota_exp_to_submit), leaves[i]):
+                            local_selection = (leaves[i],)
+                            break
+                trace.set_current_selection(local_selection)
 
-                exp.set_local_selection(local_selection)
-                exp.plan = ds_plan
-                return exp
+        ds_plan = self.planner.plan(trace) if DS_RD_SETTING.enable_planner else DSExperimentPlan()
+        if (
+            (not timer.started or timer.remain_time() >= timedelta(hours=DS_RD_SETTING.merge_hours))
+            and trace.sota_experiment(selection=local_selection) is None
+            and DS_RD_SETTING.enable_draft_before_first_sota
+        ):
+            exp = self.draft_exp_gen.gen(trace, plan=ds_plan)
+        elif (
+            timer.started
+            and timer.remain_time() < timedelta(hours=DS_RD_SETTING.merge_hours)
+            and len(leaves) >= 2
+        ):
+            DS_RD_SETTING.coding_fail_reanalyze_threshold = 100000
+            DS_RD_SETTING.consecutive_errors = 100000
+            exp = self.merge_exp_gen.gen(trace, plan=ds_plan)
+        else:
+            # If there is a sota experiment in the sub-trace and not in merge time, we use default exp_gen
+            exp = self.exp_gen.gen(trace, plan=ds_plan)
 
-            await asyncio.sleep(1)
+        exp.set_local_selection(local_selection)
+        exp.plan = ds_plan
+        return exp
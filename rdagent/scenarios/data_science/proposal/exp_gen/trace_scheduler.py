@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-import asyncio
+import math
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from rdagent.scenarios.data_science.proposal.exp_gen.base import DSTrace
+    from rdagent.utils.workflow.loop import LoopBase
 
 
 class TraceScheduler(ABC):
@@ -16,7 +17,7 @@ class TraceScheduler(ABC):
     """
 
     @abstractmethod
-    async def next(self, trace: DSTrace) -> tuple[int, ...]:
+    async def next(self, trace: DSTrace, loop: LoopBase) -> tuple[int, ...]:
         """
         Selects the next trace to expand.
 
@@ -24,9 +25,11 @@ class TraceScheduler(ABC):
         - Suggest selection: suggest a selection that is suitable for the current trace.
         - Suggested should be garenteed to be recorded at last!!!
         - If no suitable selection is found, the function should async wait!!!!
+          (wait on the steps of `loop` with `loop.wait_until` instead of polling)
 
         Args:
             trace: The DSTrace object containing the full experiment history.
+            loop: The loop running the experiments; its steps change the trace.
 
         Returns:
             A tuple representing the selection of the parent node for the new experiment.
@@ -35,46 +38,111 @@ class TraceScheduler(ABC):
         raise NotImplementedError
 
 
-class RoundRobinScheduler(TraceScheduler):
+class LeafScheduler(TraceScheduler):
     """
-    A concurrency-safe scheduling strategy that cycles through active traces
-    in a round-robin fashion.
+    Starts new traces until there are `max_trace_num` of them, then expands the leaves which are not being
+    expanded yet. Which of these leaves is expanded is decided by the policy `pick`.
+
+    When all the leaves are being expanded, it waits until the loop records a new experiment.
 
     NOTE: we don't need to use asyncio.Lock here as the kickoff_loop ensures the ExpGen is always sequential, instead of parallel.
     """
 
     def __init__(self, max_trace_num: int):
         self.max_trace_num = max_trace_num
-        self._last_selected_leaf_id = -1
         self.rec_commit_idx = 0  # the node before rec_idx is already committed.
         self.uncommited_rec_status = defaultdict(int)  # the uncommited record status
 
-    async def next(self, trace: DSTrace) -> tuple[int, ...]:
-        """
-        Atomically selects the next leaf node from the trace in order.
-        """
-        while True:
-            # step 0: Commit the pending selections
-            for i in range(self.rec_commit_idx, len(trace.dag_parent)):
-
-                if trace.dag_parent[i] == trace.NEW_ROOT:
-                    self.uncommited_rec_status[trace.NEW_ROOT] -= 1
-                else:
-                    for p in trace.dag_parent[i]:
-                        self.uncommited_rec_status[p] -= 1
-
-            self.rec_commit_idx = len(trace.hist)
-
-            # step 1: select the parant trace to expand
-            # Policy: if we have fewer traces than our target, start a new one.
-            if trace.sub_trace_count + self.uncommited_rec_status[trace.NEW_ROOT] < self.max_trace_num:
-                self.uncommited_rec_status[trace.NEW_ROOT] += 1
-                return trace.NEW_ROOT
-
-            # Step2: suggest a selection to a not expanding leave
-            leaves = trace.get_leaves()
-            for leaf in leaves:
-                if self.uncommited_rec_status[leaf] == 0:
-                    self.uncommited_rec_status[leaf] += 1
-                    return (leaf,)
-            await asyncio.sleep(1)
+    def _commit(self, trace: DSTrace) -> None:
+        """Commit the pending selections which are recorded in the trace"""
+        for i in range(self.rec_commit_idx, len(trace.dag_parent)):
+
+            if trace.dag_parent[i] == trace.NEW_ROOT:
+                self.uncommited_rec_status[trace.NEW_ROOT] -= 1
+            else:
+                for p in trace.dag_parent[i]:
+                    self.uncommited_rec_status[p] -= 1
+
+        self.rec_commit_idx = len(trace.hist)
+
+    def select(self, trace: DSTrace) -> tuple[int, ...] | None:
+        """The selection to expand now; None if all the traces are being expanded"""
+        self._commit(trace)
+
+        # step 1: select the parant trace to expand
+        # Policy: if we have fewer traces than our target, start a new one.
+        if trace.sub_trace_count + self.uncommited_rec_status[trace.NEW_ROOT] < self.max_trace_num:
+            self.uncommited_rec_status[trace.NEW_ROOT] += 1
+            return trace.NEW_ROOT
+
+        # Step2: suggest a selection to a not expanding leave
+        leaves = [leaf for leaf in trace.get_leaves() if self.uncommited_rec_status[leaf] == 0]
+        if not leaves:
+            return None
+        leaf = self.pick(trace, leaves)
+        self.uncommited_rec_status[leaf] += 1
+        return (leaf,)
+
+    @abstractmethod
+    def pick(self, trace: DSTrace, leaves: list[int]) -> int:
+        """Pick the leaf to expand among the `leaves` which are not being expanded (sorted by index)"""
+
+    async def next(self, trace: DSTrace, loop: LoopBase) -> tuple[int, ...]:
+        selection = None
+
+        def selected() -> bool:
+            nonlocal selection
+            selection = self.select(trace)
+            return selection is not None
+
+        await loop.wait_until(selected)
+        return selection
+
+
+class RoundRobinScheduler(LeafScheduler):
+    """
+    A concurrency-safe scheduling strategy that cycles through active traces
+    in a round-robin fashion.
+    """
+
+    def pick(self, trace: DSTrace, leaves: list[int]) -> int:
+        return leaves[0]
+
+
+class UCBScheduler(LeafScheduler):
+    """
+    Expands the trace with the best upper confidence bound of its rate of improvements (the experiments of the trace
+    which are accepted as the new SOTA), so that the traces which improve often are expanded more.
+    """
+
+    def __init__(self, max_trace_num: int, exploration: float = 1.0):
+        super().__init__(max_trace_num)
+        self.exploration = exploration
+
+    def pick(self, trace: DSTrace, leaves: list[int]) -> int:
+        n_total = len(trace.hist)
+
+        def ucb(leaf: int) -> float:
+            path = trace.get_parents(leaf)
+            improvements = sum(bool(trace.hist[i][1]) for i in path)
+            return improvements / len(path) + self.exploration * math.sqrt(math.log(n_total) / len(path))
+
+        return max(leaves, key=ucb)
+
+
+class ShortestRuntimeScheduler(LeafScheduler):
+    """
+    Expands the trace whose experiments ran the fastest on average, so that the results come back sooner.
+    The traces without any running time are expanded first.
+    """
+
+    def pick(self, trace: DSTrace, leaves: list[int]) -> int:
+        def expected_runtime(leaf: int) -> float:
+            times = [
+                t
+                for i in trace.get_parents(leaf)
+                if (t := getattr(trace.hist[i][0].running_info, "running_time", None)) is not None
+            ]
+            return sum(times) / len(times) if times else 0.0
+
+        return min(leaves, key=expected_runtime)
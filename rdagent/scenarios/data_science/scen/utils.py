@@ -7,7 +7,7 @@ An example of the generated data folder description:
 ├── images/
 │   ├── Test_0.jpg (182.7 kB)
 │   ├── Test_1.jpg (362.4 kB)
-│   ├── ... (+1819 more files)
+│   ├── ... (+1819 more files: 1819 .jpg)
 ├── train.csv (30.1 kB)
 ├── description.md (5.3 kB)
 ├── sample_submission.csv (5.2 kB)
@@ -67,18 +67,24 @@ scab (int64) has 2 unique values: [0, 1]
 
 """
 
+import bisect
 import json
 import os
+import pickle
 import reprlib
-from collections import defaultdict
+from collections import Counter, defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import humanize
+import numpy as np
 import pandas as pd
 from pandas.api.types import is_numeric_dtype
 
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.utils import cache_with_pickle
 from rdagent.log import rdagent_logger as logger
+from rdagent.utils import md5_hash
 
 # these files are treated as code (e.g. markdown wrapped)
 code_files = {".py", ".sh", ".yaml", ".yml", ".md", ".html", ".xml", ".log", ".rst"}
@@ -86,6 +92,11 @@ code_files = {".py", ".sh", ".yaml", ".yml", ".md", ".html", ".xml", ".log", ".r
 plaintext_files = {".txt", ".csv", ".json", ".tsv"} | code_files
 # system-generated directories/files to filter out
 system_names = {"__MACOSX", ".DS_Store", "Thumbs.db"}
+# larger csv/parquet files are previewed from their first rows and their row count instead of being loaded
+preview_full_read_bytes = 32 * 2**20
+preview_sample_rows = 10_000
+# the lines of larger plaintext files are estimated from the first bytes
+count_lines_exact_bytes = 2**30
 
 
 class FileTreeGenerationError(Exception):
@@ -106,26 +117,86 @@ class DirectoryPermissionError(FileTreeGenerationError):
     pass
 
 
+def _file_hash_func(p: Path, *args, **kwargs) -> str | None:
+    """The previews of a file are cached until it is changed."""
+    try:
+        stat = Path(p).stat()
+    except OSError:
+        return None
+    return md5_hash(
+        f"{Path(p).resolve()}:{stat.st_size}:{stat.st_mtime_ns}:{args}:{kwargs}:"
+        f"{preview_full_read_bytes}:{preview_sample_rows}:{count_lines_exact_bytes}"
+    )
+
+
+def count_lines(f: Path, chunk_size: int = 8 * 2**20, quoted: bool = False) -> int:
+    """
+    Count the lines of a text file on its raw bytes.
+    With `quoted`, the newlines inside double-quoted fields are not counted, i.e. the records of a csv file are counted.
+    The lines of files larger than `count_lines_exact_bytes` are estimated from their first chunk (see
+    `is_line_count_estimated`).
+    """
+
+    def count(chunk: bytes, in_quotes: int) -> tuple[int, int]:
+        """The newlines of the chunk and whether it ends inside quotes; the quotes are counted modulo 256."""
+        if not quoted:
+            return chunk.count(b"\n"), 0
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        parity = (np.cumsum(data == ord('"'), dtype=np.uint8) + in_quotes) & 1
+        return int(np.count_nonzero((data == ord("\n")) & (parity == 0))), int(parity[-1])
+
+    size = f.stat().st_size
+    num_lines, in_quotes, last = 0, 0, b"\n"
+    with open(f, "rb") as fh:
+        if size > count_lines_exact_bytes:
+            sample = fh.read(chunk_size)
+            return round(count(sample, 0)[0] * size / len(sample))
+        while chunk := fh.read(chunk_size):
+            n, in_quotes = count(chunk, in_quotes)
+            num_lines += n
+            last = chunk[-1:]
+    # the last line may not end with a newline
+    return num_lines + (last != b"\n")
+
+
+def is_line_count_estimated(f: Path) -> bool:
+    return f.stat().st_size > count_lines_exact_bytes
+
+
+@cache_with_pickle(_file_hash_func, force=True)
 def get_file_len_size(f: Path) -> Tuple[int, str]:
     """
     Calculate the size of a file (#lines for plaintext files, otherwise #bytes)
     Also returns a human-readable string representation of the size.
     """
     if f.suffix in plaintext_files:
-        num_lines = sum(1 for _ in open(f))
-        return num_lines, f"{num_lines} lines"
+        num_lines = count_lines(f)
+        return num_lines, f"{'about ' if is_line_count_estimated(f) else ''}{num_lines} lines"
     else:
         s = f.stat().st_size
         return s, humanize.naturalsize(s)
 
 
-def preview_df(df: pd.DataFrame, file_name: str, simple=True, show_nan_columns=False) -> str:
-    """Generate a textual preview of a dataframe"""
+def preview_df(
+    df: pd.DataFrame,
+    file_name: str,
+    simple=True,
+    show_nan_columns=False,
+    num_rows: Optional[int] = None,
+    num_rows_estimated: bool = False,
+) -> str:
+    """
+    Generate a textual preview of a dataframe.
+    `num_rows` is the number of rows of the file when `df` only contains its first rows; `num_rows_estimated` tells
+    that it is an estimate.
+    """
     out = []
+    sampled = num_rows is not None and num_rows > len(df)
 
     out.append(f"### {file_name}: ")
     out.append(f"#### 1.DataFrame preview:")
-    out.append(f"It has {df.shape[0]} rows and {df.shape[1]} columns.")
+    about = "about " if sampled and num_rows_estimated else ""
+    out.append(f"It has {about}{num_rows if sampled else df.shape[0]} rows and {df.shape[1]} columns.")
 
     if simple:
         cols = df.columns.tolist()
@@ -136,7 +207,10 @@ def preview_df(df: pd.DataFrame, file_name: str, simple=True, show_nan_columns=F
             res += f"... and {len(cols)-sel_cols} more columns"
         out.append(res)
     else:
-        out.append("Here is some information about the columns:")
+        if sampled:
+            out.append(f"Here is some information about the columns (based on the first {len(df)} rows):")
+        else:
+            out.append("Here is some information about the columns:")
         for col in sorted(df.columns):
             dtype = df[col].dtype
             name = f"{col} ({dtype})"
@@ -174,18 +248,44 @@ def preview_df(df: pd.DataFrame, file_name: str, simple=True, show_nan_columns=F
     return "\n".join(out)
 
 
+@cache_with_pickle(_file_hash_func, force=True)
 def preview_csv(p: Path, file_name: str, simple=True, show_nan_columns=False) -> str:
     """Generate a textual preview of a csv file"""
-    df = pd.read_csv(p)
-    return preview_df(df, file_name, simple=simple, show_nan_columns=show_nan_columns)
+    num_rows, estimated = None, False
+    if p.stat().st_size <= preview_full_read_bytes:
+        df = pd.read_csv(p)
+    else:
+        df = pd.read_csv(p, nrows=preview_sample_rows)
+        num_rows = count_lines(p, quoted=True) - 1  # header
+        estimated = is_line_count_estimated(p)
+    return preview_df(
+        df,
+        file_name,
+        simple=simple,
+        show_nan_columns=show_nan_columns,
+        num_rows=num_rows,
+        num_rows_estimated=estimated,
+    )
 
 
+@cache_with_pickle(_file_hash_func, force=True)
 def preview_parquet(p: Path, file_name: str, simple=True, show_nan_columns=False) -> str:
     """Generate a textual preview of a parquet file"""
-    df = pd.read_parquet(p)
-    return preview_df(df, file_name, simple=simple, show_nan_columns=show_nan_columns)
+    num_rows = None
+    if p.stat().st_size <= preview_full_read_bytes:
+        df = pd.read_parquet(p)
+    else:
+        import pyarrow.parquet as pq
+
+        # the row count is in the footer; only the first row group(s) are read
+        pf = pq.ParquetFile(p)
+        num_rows = pf.metadata.num_rows
+        batch = next(pf.iter_batches(batch_size=preview_sample_rows), None)
+        df = (batch if batch is not None else pf.schema_arrow.empty_table()).to_pandas()
+    return preview_df(df, file_name, simple=simple, show_nan_columns=show_nan_columns, num_rows=num_rows)
 
 
+@cache_with_pickle(_file_hash_func, force=True)
 def preview_json(p: Path, file_name: str):
     """Generate a textual preview of a json file using reprlib for compact object display"""
     result = []
@@ -269,44 +369,73 @@ def preview_json(p: Path, file_name: str):
     return "\n".join(result)
 
 
-def _walk(path: Path):
-    """Recursively walk a directory (analogous to os.walk but for pathlib.Path)"""
-    for p in sorted(Path(path).iterdir()):
+def _walk(path: Path) -> Iterator[Path]:
+    """
+    Recursively walk a directory and yield its files, sorted by name in each directory.
+    The types of the entries come from `os.scandir`, so only symlinks need an extra stat call.
+    """
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
         # Filter out system-generated directories/files
-        if p.name in system_names:
+        if entry.name in system_names:
             continue
 
-        if p.is_dir():
+        p = Path(entry.path)
+        if entry.is_dir():
             # If this is a symlinked dir to a parent/ancestor, do not expand it
-            if p.is_symlink():
+            if entry.is_symlink():
                 target = p.resolve()
                 cur_path = p.parent.resolve()
                 if target == cur_path or str(cur_path).startswith(str(target)):
-                    yield p
                     continue
             yield from _walk(p)
-        else:
+        elif entry.is_file():
             yield p
 
 
+def _keep_smallest(items: list, item: tuple, k: int) -> None:
+    """Insert `item` into the sorted list `items`, which keeps only its `k` smallest items."""
+    if len(items) < k:
+        bisect.insort(items, item)
+    elif k > 0 and item < items[-1]:
+        bisect.insort(items, item)
+        items.pop()
+
+
+def _stat_key(p: Path) -> Tuple[int, int]:
+    stat = p.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
 class FileTreeGenerator:
     """
     Smart file tree generator with symlink handling and intelligent truncation.
     """
 
-    def __init__(self, max_lines: int = 200, priority_files: Set[str] = None, hide_base_name: bool = True):
+    def __init__(
+        self,
+        max_lines: int = 200,
+        priority_files: Set[str] = None,
+        hide_base_name: bool = True,
+        use_manifest: bool = False,
+    ):
         """
         Initialize the file tree generator.
 
         Args:
             max_lines: Maximum output lines to prevent overly long output
             priority_files: File extensions to prioritize for display
+            use_manifest: Persist the tree with the stats of the scanned directories and listed files,
+                and reuse it while they are unchanged
         """
         self.max_lines = max_lines
         self.priority_files = priority_files or {".csv", ".json", ".parquet", ".md", ".txt"}
         self.lines = []
         self.line_count = 0
         self.hide_base_name = hide_base_name
+        self.use_manifest = use_manifest
+        self.manifest: Dict[str, Tuple[int, int]] = {}  # path -> (size, mtime) of the scanned/listed entries
 
     def generate_tree(self, path: Union[str, Path]) -> str:
         """
@@ -321,11 +450,16 @@ class FileTreeGenerator:
         Raises:
             FileTreeGenerationError: If tree generation fails
         """
+        path = Path(path)
+        manifest_path = self._manifest_path(path) if self.use_manifest else None
+        if manifest_path is not None and (tree := self._load_manifest(manifest_path)) is not None:
+            return tree
+
         try:
-            path = Path(path)
             base_path = path.resolve()
             self.lines = []
             self.line_count = 0
+            self.manifest = {}
             self._add_line(f"{'.' if self.hide_base_name else path.name}/")
             self._process_directory(path, 0, "", base_path)
         except MaxLinesExceededError:
@@ -376,7 +510,36 @@ class FileTreeGenerator:
         ):
             self.lines.append("... (display limited, please increase max_lines parameter)")
 
-        return "\n".join(self.lines)
+        tree = "\n".join(self.lines)
+        if manifest_path is not None:
+            self._save_manifest(manifest_path, tree)
+        return tree
+
+    def _manifest_path(self, path: Path) -> Path:
+        key = f"{path.resolve()}:{self.max_lines}:{sorted(self.priority_files)}:{self.hide_base_name}"
+        return Path(RD_AGENT_SETTINGS.pickle_cache_folder_path_str) / "file_tree_manifest" / f"{md5_hash(key)}.pkl"
+
+    def _load_manifest(self, manifest_path: Path) -> Optional[str]:
+        """Return the persisted tree if none of the scanned directories and listed files changed."""
+        try:
+            with manifest_path.open("rb") as f:
+                manifest, tree = pickle.load(f)
+            for p, stat in manifest.items():
+                if _stat_key(Path(p)) != stat:
+                    return None
+        except Exception:
+            return None
+        return tree
+
+    def _save_manifest(self, manifest_path: Path, tree: str) -> None:
+        try:
+            manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = manifest_path.with_name(f"{manifest_path.name}.tmp-{os.getpid()}")
+            with tmp.open("wb") as f:
+                pickle.dump((self.manifest, tree), f)
+            os.replace(tmp, manifest_path)
+        except OSError as e:
+            logger.warning(f"Failed to persist the file tree manifest: {e}")
 
     def _add_line(self, text: str) -> None:
         """
@@ -408,20 +571,19 @@ class FileTreeGenerator:
             FileTreeGenerationError: If processing fails
             MaxLinesExceededError: Propagated when line limit is reached
         """
+        if self.line_count >= self.max_lines:
+            # Do not scan directories which can not be displayed anymore
+            raise MaxLinesExceededError(f"Exceeded maximum lines limit of {self.max_lines}")
         try:
-            # Get directory contents, filter out system files
-            items = [p for p in path.iterdir() if not p.name.startswith(".") and p.name not in system_names]
-            dirs = sorted([p for p in items if p.is_dir()])
-            files = sorted([p for p in items if p.is_file()])
-
-            # Categorize files
-            priority_files_list, other_files = self._categorize_files(files)
+            # The first level shows all entries (as many as the remaining lines), the other levels up to 8
+            limit = self.max_lines - self.line_count if depth == 0 else 8
+            dirs, num_dirs, files, num_files, extensions = self._scan_directory(path, limit)
 
             # Process subdirectories
-            self._process_subdirectories(dirs, depth, prefix, base_path)
+            self._process_subdirectories(dirs, num_dirs, depth, prefix, base_path)
 
             # Process files
-            self._process_files(priority_files_list + other_files, depth, prefix)
+            self._process_files(files, num_files, extensions, depth, prefix)
 
         except MaxLinesExceededError:
             # Propagate this up so generate_tree can handle it
@@ -434,10 +596,51 @@ class FileTreeGenerator:
             else:
                 raise FileTreeGenerationError(f"Error processing directory {path}: {str(e)}") from e
 
-    def _process_subdirectories(self, dirs: List[Path], depth: int, prefix: str, base_path: Path) -> None:
+    def _scan_directory(self, path: Path, limit: int) -> Tuple[List[Path], int, List[Path], int, Counter]:
+        """
+        Scan a directory in one pass without materializing its entries.
+
+        Returns:
+            The first `limit` subdirectories (sorted by name) and their total count, the first `limit` files (priority
+            files by decreasing size, then the other files by name) and their total count, and the count of the
+            files per extension.
+        """
+        dirs: List[Tuple[str, str]] = []
+        priority: List[Tuple[int, str, str]] = []
+        other: List[Tuple[str, str]] = []
+        num_dirs = num_files = 0
+        extensions: Counter = Counter()
+
+        with os.scandir(path) as it:
+            for entry in it:
+                # Filter out system files
+                if entry.name.startswith(".") or entry.name in system_names:
+                    continue
+                # The entry types are cached by scandir; only symlinks need a stat call
+                if entry.is_dir():
+                    num_dirs += 1
+                    _keep_smallest(dirs, (entry.name, entry.path), limit)
+                elif entry.is_file():
+                    num_files += 1
+                    suffix = os.path.splitext(entry.name)[1]
+                    extensions[suffix.lower() or "no extension"] += 1
+                    if suffix.lower() in self.priority_files:
+                        # Larger priority files first
+                        _keep_smallest(priority, (-entry.stat().st_size, entry.name, entry.path), limit)
+                    else:
+                        _keep_smallest(other, (entry.name, entry.path), limit)
+        if self.use_manifest:
+            self.manifest[str(path)] = _stat_key(path)
+
+        files = [Path(p) for *_, p in priority + other][:limit]
+        return [Path(p) for _, p in dirs], num_dirs, files, num_files, extensions
+
+    def _process_subdirectories(
+        self, dirs: List[Path], num_dirs: int, depth: int, prefix: str, base_path: Path
+    ) -> None:
         """Process subdirectories with proper truncation logic."""
         try:
-            if depth == 0 or len(dirs) <= 8:
+            if depth == 0 or num_dirs <= 8:
                 # First level or ≤8 items: show all
                 for d in dirs:
                     self._process_single_directory(d, depth, prefix, base_path)
@@ -448,7 +651,7 @@ class FileTreeGenerator:
                     self._process_single_directory(d, depth, prefix, base_path)
 
                 # Show remaining directory count
-                remaining = len(dirs) - show_count
+                remaining = num_dirs - show_count
                 self._add_line(f"{prefix}├── ... (+{remaining} more directories)")
         except MaxLinesExceededError:
             # If we hit the line limit, just stop processing
@@ -476,46 +679,37 @@ class FileTreeGenerator:
             # If we hit the line limit, just stop processing this directory
             pass
 
-    def _process_files(self, all_files: List[Path], depth: int, prefix: str) -> None:
+    def _process_files(
+        self, files: List[Path], num_files: int, extensions: Counter, depth: int, prefix: str
+    ) -> None:
         """Process files with proper truncation logic."""
         try:
-            if depth == 0 or len(all_files) <= 8:
+            if depth == 0 or num_files <= 8:
                 # First level or ≤8 items: show all
-                for f in all_files:
+                for f in files:
                     self._add_line(f"{prefix}├── {f.name} ({self._get_size_str(f)})")
             else:
                 # Not first level and >8 items: show first 2
                 show_count = 2
-                for f in all_files[:show_count]:
+                for f in files[:show_count]:
                     self._add_line(f"{prefix}├── {f.name} ({self._get_size_str(f)})")
+                    extensions[f.suffix.lower() or "no extension"] -= 1
 
-                # Show remaining file count
-                remaining = len(all_files) - show_count
-                self._add_line(f"{prefix}├── ... (+{remaining} more files)")
+                # Show remaining file count, by extension
+                remaining = num_files - show_count
+                counts = [f"{n} {ext}" for ext, n in extensions.most_common() if n > 0]
+                summary = ", ".join(counts[:3]) + (", ..." if len(counts) > 3 else "")
+                self._add_line(f"{prefix}├── ... (+{remaining} more files: {summary})")
         except MaxLinesExceededError:
             # If we hit the line limit, just stop processing files
             pass
 
-    def _categorize_files(self, files: List[Path]) -> Tuple[List[Path], List[Path]]:
-        """Categorize files into priority and other groups."""
-        priority = []
-        other = []
-
-        for f in files:
-            if f.suffix.lower() in self.priority_files:
-                priority.append(f)
-            else:
-                other.append(f)
-
-        # Sort priority files by size (larger files first)
-        priority.sort(key=lambda x: x.stat().st_size if x.exists() else 0, reverse=True)
-
-        return priority, other
-
     def _get_size_str(self, file_path: Path) -> str:
         """Get file size string."""
         try:
             size = file_path.stat().st_size
+            if self.use_manifest:
+                self.manifest[str(file_path)] = _stat_key(file_path)
             return humanize.naturalsize(size)
         except (OSError, FileNotFoundError):
             return "? B"
@@ -611,10 +805,14 @@ class DataFolderDescriptor:
         If a directory has more than `threshold` files of the same type, only `max_files_per_group` are selected.
         """
         # Group files by (parent_directory, file_extension)
+        # The files of a group come from the same directory and are walked in sorted order, so only the first
+        # `threshold + 2` files of each group are kept (enough to tell whether there are more than `threshold`
+        # files besides the root README.md).
         files_by_group = defaultdict(list)
         for p in _walk(base_path):
-            if p.is_file():
-                files_by_group[(p.parent, p.suffix)].append(p)
+            group = files_by_group[(p.parent, p.suffix)]
+            if len(group) < threshold + 2:
+                group.append(p)
 
         selected_files = []
 
@@ -659,7 +857,7 @@ def describe_data_folder_v2(
     max_length: int = 10000,
 ) -> str:
     """Generate a data folder description using DataFolderDescriptor."""
-    descriptor = DataFolderDescriptor()
+    descriptor = DataFolderDescriptor(FileTreeGenerator(use_manifest=True))
     return descriptor.describe_folder(
         base_path,
         include_file_details=include_file_details,
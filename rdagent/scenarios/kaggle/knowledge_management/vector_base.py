@@ -2,8 +2,6 @@ import json
 from pathlib import Path
 from typing import List, Union
 
-import pandas as pd
-
 from rdagent.components.knowledge_management.vector_base import Document, PDVectorBase
 from rdagent.log import rdagent_logger as logger
 from rdagent.oai.llm_utils import APIBackend
@@ -127,37 +125,21 @@ class KaggleExperienceBase(PDVectorBase):
 
     def add(self, document: Union[KGDocument, List[KGDocument]]):
         document.split_into_trunk()
-        docs = [
-            {
-                "id": document.id,
-                "label": document.label,
-                "content": document.content,
-                "competition_name": document.competition_name,
-                "task_category": document.task_category,
-                "field": document.field,
-                "ranking": document.ranking,
-                "score": document.score,
-                "embedding": document.embedding,
-            }
-        ]
+        row = {
+            "id": document.id,
+            "label": document.label,
+            "content": document.content,
+            "competition_name": document.competition_name,
+            "task_category": document.task_category,
+            "field": document.field,
+            "ranking": document.ranking,
+            "score": document.score,
+        }
+        rows, embeddings = [row], [document.embedding]
         if len(document.trunks) > 1:
-            docs.extend(
-                [
-                    {
-                        "id": document.id,
-                        "label": document.label,
-                        "content": document.content,
-                        "competition_name": document.competition_name,
-                        "task_category": document.task_category,
-                        "field": document.field,
-                        "ranking": document.ranking,
-                        "score": document.score,
-                        "embedding": trunk_embedding,
-                    }
-                    for trunk, trunk_embedding in zip(document.trunks, document.trunks_embedding)
-                ]
-            )
-        self.vector_df = pd.concat([self.vector_df, pd.DataFrame(docs)], ignore_index=True)
+            rows.extend([dict(row) for _ in document.trunks_embedding])
+            embeddings.extend(document.trunks_embedding)
+        self._append(rows, embeddings)
 
     def load_kaggle_experience(self, kaggle_experience_path: Union[str, Path]):
         """
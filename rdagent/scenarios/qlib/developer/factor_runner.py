@@ -181,5 +181,6 @@ class QlibFactorRunner(CachedRunner[QlibFactorExperiment]):
 
         exp.result = result
         exp.stdout = stdout
+        exp.running_info.cache_stats = exp.experiment_workspace.running_info.cache_stats
 
         return exp
@@ -100,6 +100,7 @@ class QlibModelRunner(CachedRunner[QlibModelExperiment]):
 
         exp.result = result
         exp.stdout = stdout
+        exp.running_info.cache_stats = exp.experiment_workspace.running_info.cache_stats
 
         if result is None:
             logger.error(f"Failed to run {exp.sub_tasks[0].name}, because {stdout}")
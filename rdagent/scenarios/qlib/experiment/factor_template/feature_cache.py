@@ -0,0 +1,153 @@
+"""
+Persistent cache of the raw features loaded by qlib data loaders.
+
+Consecutive experiments share the same instruments, date range and base features (e.g. Alpha158),
+so the loaded frame is stored on disk and memory-mapped by later runs instead of being recomputed.
+
+The cache key is built from (loader config, instruments, start time, end time, data version).
+The data version is derived from the calendar, instrument and feature folders of the qlib provider,
+so an updated dataset will not hit stale entries.
+
+Environment variables:
+- FEATURE_CACHE: set to 0 to disable the cache.
+- FEATURE_CACHE_DIR: where to store the cache (default: ~/.qlib/feature_cache, shared by all workspaces).
+
+Every lookup appends a record to `feature_cache_stats.jsonl` in the working directory,
+which RD-Agent collects into the running info of the experiment.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from qlib.config import C
+from qlib.contrib.data.handler import Alpha158
+from qlib.data.dataset.loader import DataLoader
+from qlib.utils import init_instance_by_config
+
+STATS_FILE = "feature_cache_stats.jsonl"
+
+
+def _enabled() -> bool:
+    return os.environ.get("FEATURE_CACHE", "1") not in ("0", "false", "False")
+
+
+def _cache_dir() -> Path:
+    return Path(os.environ.get("FEATURE_CACHE_DIR", "~/.qlib/feature_cache")).expanduser()
+
+
+def _data_version() -> str:
+    """Fingerprint of the provider data: the calendar and instrument files and the feature folder."""
+    try:
+        data_uri = Path(C.dpm.get_data_uri())
+    except Exception:
+        return "unknown"
+    parts = [str(data_uri)]
+    for sub in ["calendars", "instruments"]:
+        for f in sorted((data_uri / sub).glob("*")):
+            st = f.stat()
+            parts.append(f"{sub}/{f.name}:{st.st_size}:{st.st_mtime_ns}")
+    features = data_uri / "features"
+    if features.exists():
+        parts.append(f"features:{features.stat().st_mtime_ns}")
+    return "|".join(parts)
+
+
+def _describe(loader) -> str:
+    if isinstance(loader, dict):
+        return json.dumps(loader, sort_keys=True, default=repr)
+    return json.dumps({"class": type(loader).__name__, **vars(loader)}, sort_keys=True, default=repr)
+
+
+def _record(**stats) -> None:
+    with open(STATS_FILE, "a") as f:
+        f.write(json.dumps(stats) + "\n")
+
+
+class CachedDataLoader(DataLoader):
+    """
+    Wrap another data loader and cache its output on disk.
+
+    .. code-block:: yaml
+
+        - class: CachedDataLoader
+          module_path: feature_cache.py
+          kwargs:
+            loader:
+                class: qlib.contrib.data.loader.Alpha158DL
+                kwargs: ...
+    """
+
+    def __init__(self, loader) -> None:
+        self._loader_desc = _describe(loader)
+        self.loader = init_instance_by_config(loader, accept_types=DataLoader)
+
+    def cache_key(self, instruments, start_time, end_time) -> str:
+        content = json.dumps(
+            [self._loader_desc, instruments, str(start_time), str(end_time), _data_version()],
+            sort_keys=True,
+            default=repr,
+        )
+        return hashlib.md5(content.encode()).hexdigest()
+
+    def load(self, instruments, start_time=None, end_time=None) -> pd.DataFrame:
+        if not _enabled():
+            return self.loader.load(instruments, start_time, end_time)
+
+        key = self.cache_key(instruments, start_time, end_time)
+        entry = _cache_dir() / key
+        start = time.time()
+        if (entry / "values.npy").exists():
+            try:
+                df = self._read(entry)
+                _record(key=key, hit=True, seconds=time.time() - start, shape=list(df.shape))
+                return df
+            except Exception as e:
+                print(f"Failed to read feature cache {entry}: {e}, recomputing.")
+        df = self.loader.load(instruments, start_time, end_time)
+        load_seconds = time.time() - start
+        try:
+            self._write(entry, df)
+        except Exception as e:
+            print(f"Failed to write feature cache {entry}: {e}")
+        _record(key=key, hit=False, seconds=load_seconds, shape=list(df.shape))
+        return df
+
+    @staticmethod
+    def _read(entry: Path) -> pd.DataFrame:
+        with (entry / "meta.pkl").open("rb") as f:
+            meta = pickle.load(f)
+        # copy-on-write mapping: processors may modify the frame in place without touching the cache.
+        values = np.load(entry / "values.npy", mmap_mode="c")
+        return pd.DataFrame(values, index=meta["index"], columns=meta["columns"], copy=False)
+
+    @staticmethod
+    def _write(entry: Path, df: pd.DataFrame) -> None:
+        if df.empty or len(set(df.dtypes)) != 1:
+            # only homogeneous frames can be stored as one memory-mappable matrix
+            return
+        tmp = entry.with_name(f"{entry.name}.tmp-{os.getpid()}")
+        tmp.mkdir(parents=True, exist_ok=True)
+        np.save(tmp / "values.npy", df.to_numpy())
+        with (tmp / "meta.pkl").open("wb") as f:
+            pickle.dump({"index": df.index, "columns": df.columns}, f)
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            # another process has written the same entry
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+class CachedAlpha158(Alpha158):
+    """Alpha158 handler whose raw features are loaded through `CachedDataLoader`."""
+
+    def setup_data(self, *args, **kwargs):
+        if not isinstance(self.data_loader, CachedDataLoader):
+            self.data_loader = CachedDataLoader(loader=self.data_loader)
+        return super().setup_data(*args, **kwargs)
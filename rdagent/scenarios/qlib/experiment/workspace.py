@@ -1,3 +1,4 @@
+import json
 import re
 from pathlib import Path
 from typing import Any
@@ -15,6 +16,22 @@ class QlibFBWorkspace(FBWorkspace):
         super().__init__(*args, **kwargs)
         self.inject_code_from_folder(template_folder_path)
 
+    @staticmethod
+    def read_feature_cache_stats(stats_path: Path) -> dict | None:
+        """
+        Summarize the records written by `feature_cache.py` in the workspace during the backtest.
+        """
+        if not stats_path.exists():
+            return None
+        records = [json.loads(line) for line in stats_path.read_text().splitlines() if line.strip()]
+        stats = {
+            "feature_cache_hits": sum(r["hit"] for r in records),
+            "feature_cache_misses": sum(not r["hit"] for r in records),
+            "feature_load_seconds": sum(r["seconds"] for r in records),
+        }
+        logger.info(f"Feature cache: {stats}")
+        return stats
+
     def execute(self, qlib_config_name: str = "conf.yaml", run_env: dict = {}, *args, **kwargs) -> str:
         if MODEL_COSTEER_SETTINGS.env_type == "docker":
             qtde = QTDockerEnv()
@@ -25,6 +42,9 @@ class QlibFBWorkspace(FBWorkspace):
             return None, "Unknown environment type"
         qtde.prepare()
 
+        feature_cache_stats_path = self.workspace_path / "feature_cache_stats.jsonl"
+        feature_cache_stats_path.unlink(missing_ok=True)
+
         # Run the Qlib backtest
         execute_qlib_log = qtde.check_output(
             local_path=str(self.workspace_path),
@@ -32,6 +52,7 @@ class QlibFBWorkspace(FBWorkspace):
             env=run_env,
         )
         logger.log_object(execute_qlib_log, tag="Qlib_execute_log")
+        self.running_info.cache_stats = self.read_feature_cache_stats(feature_cache_stats_path)
 
         execute_log = qtde.check_output(
             local_path=str(self.workspace_path),
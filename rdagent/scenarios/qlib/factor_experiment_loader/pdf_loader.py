@@ -3,16 +3,16 @@ from __future__ import annotations
 import json
 from typing import Mapping
 
-import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import normalize
 from tqdm.auto import tqdm
 
 from rdagent.components.document_reader.document_reader import (
     load_and_process_pdfs_by_langchain,
 )
+from rdagent.components.knowledge_management.cluster import (
+    embed_contents,
+    kmeans_groups_with_max_size,
+)
 from rdagent.components.loader.experiment_loader import FactorExperimentLoader
 from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.utils import multiprocessing_wrapper
@@ -394,62 +394,6 @@ def __check_factor_duplication_simulate_json_mode(
     return generated_duplicated_groups
 
 
-def __kmeans_embeddings(embeddings: np.ndarray, k: int = 20) -> list[list[str]]:
-    x_normalized = normalize(embeddings)
-
-    np.random.seed(42)
-
-    kmeans = KMeans(
-        n_clusters=k,
-        init="random",
-        max_iter=100,
-        n_init=10,
-        random_state=42,
-    )
-
-    # KMeans algorithm uses Euclidean distance, and we need to customize a function to find the most similar cluster center
-    def find_closest_cluster_cosine_similarity(
-        data: np.ndarray,
-        centroids: np.ndarray,
-    ) -> np.ndarray:
-        similarity = cosine_similarity(data, centroids)
-        return np.argmax(similarity, axis=1)
-
-    # Initializes the cluster center
-    rng = np.random.default_rng(seed=42)
-    centroids = rng.choice(x_normalized, size=k, replace=False)
-
-    # Iterate until convergence or the maximum number of iterations is reached
-    for _ in range(kmeans.max_iter):
-        # Assign the sample to the nearest cluster center
-        closest_clusters = find_closest_cluster_cosine_similarity(
-            x_normalized,
-            centroids,
-        )
-
-        # update the cluster center
-        new_centroids = np.array(
-            [x_normalized[closest_clusters == i].mean(axis=0) for i in range(k)],
-        )
-        new_centroids = normalize(new_centroids)  # 归一化新的簇中心
-
-        # Check whether the cluster center has changed
-        if np.allclose(centroids, new_centroids):
-            break
-
-        centroids = new_centroids
-
-    clusters = find_closest_cluster_cosine_similarity(x_normalized, centroids)
-    cluster_to_index = {}
-    for index, cluster in enumerate(clusters):
-        cluster_to_index.setdefault(cluster, []).append(index)
-    return sorted(
-        cluster_to_index.values(),
-        key=lambda x: len(x),
-        reverse=True,
-    )
-
-
 def __deduplicate_factor_dict(factor_dict: dict[str, dict[str, str]]) -> list[list[str]]:
     if len(factor_dict) == 0:
         return []
@@ -472,22 +416,14 @@ Factor variables: {variables}
 """
 
     full_str_list = [factor_name_to_full_str[factor_name] for factor_name in factor_names]
-    embeddings = APIBackend.create_embedding(full_str_list)
-
-    target_k = None
-    if len(full_str_list) < RD_AGENT_SETTINGS.max_input_duplicate_factor_group:
-        kmeans_index_group = [list(range(len(full_str_list)))]
-        target_k = 1
-    else:
-        for k in range(
-            len(full_str_list) // RD_AGENT_SETTINGS.max_input_duplicate_factor_group,
-            RD_AGENT_SETTINGS.max_kmeans_group_number,
-        ):
-            kmeans_index_group = __kmeans_embeddings(embeddings=embeddings, k=k)
-            if len(kmeans_index_group[0]) < RD_AGENT_SETTINGS.max_input_duplicate_factor_group:
-                target_k = k
-                logger.info(f"K-means group number: {k}")
-                break
+    embeddings = embed_contents(full_str_list)
+
+    kmeans_index_group = kmeans_groups_with_max_size(
+        embeddings,
+        max_group_size=RD_AGENT_SETTINGS.max_input_duplicate_factor_group,
+        k_min=len(full_str_list) // RD_AGENT_SETTINGS.max_input_duplicate_factor_group,
+        k_max=RD_AGENT_SETTINGS.max_kmeans_group_number,
+    )
     factor_name_groups = [[factor_names[index] for index in index_group] for index_group in kmeans_index_group]
 
     duplication_names_list = []
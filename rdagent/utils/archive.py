@@ -0,0 +1,163 @@
+"""
+Incremental archives of folders which grow over time (e.g. the log and workspace folders of a running loop).
+
+An archive is a folder of numbered segments. Each call of `IncrementalArchive.add` writes one segment:
+- `<seq>.tar` contains the files which are new or changed since the previous segment;
+- `<seq>.json` records the (size, mtime, digest) of every file of the folder and the segment holding its content,
+  for the files changed in this segment, and the removed files.
+
+Unchanged files are recognized by their size and mtime, or by their digest if only their mtime changed, so they are
+neither copied nor hashed again. Both files of a segment are written under a temporary name and renamed, and a
+segment only counts once its index exists, so an interrupted `add` never corrupts the archive.
+`IncrementalArchive.restore` rebuilds the folder from the segments.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+
+class ArchivedFile(NamedTuple):
+    size: int
+    mtime_ns: int
+    digest: str
+    segment: int  # the segment holding the content of the file
+
+
+def file_digest(path: Path, chunk_size: int = 2**20) -> str:
+    if path.is_symlink():
+        return hashlib.sha1(os.readlink(path).encode()).hexdigest()
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def iter_tree(root: Path) -> Iterator[Path]:
+    """Recursively yield the files (and symlinks, which are not followed) under `root`."""
+    with os.scandir(root) as it:
+        entries = list(it)
+    for entry in entries:
+        path = Path(entry.path)
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_tree(path)
+        else:
+            yield path
+
+
+class IncrementalArchive:
+    SEGMENT_SUFFIX = ".tar"
+    INDEX_SUFFIX = ".json"
+
+    def __init__(self, path: str | Path, temp_path: str | Path | None = None) -> None:
+        """
+        Parameters
+        ----------
+        path : str | Path
+            The folder of the segments.
+        temp_path : str | Path | None
+            Where the segments are written before being moved into `path` (e.g. a local disk when `path` is a slow
+            network storage).
+        """
+        self.path = Path(path)
+        self.temp_path = Path(temp_path) if temp_path is not None else None
+
+    def _segments(self) -> list[int]:
+        if not self.path.is_dir():
+            return []
+        return sorted(int(p.stem) for p in self.path.glob(f"*{self.INDEX_SUFFIX}") if p.stem.isdigit())
+
+    def _segment_path(self, seq: int, suffix: str) -> Path:
+        return self.path / f"{seq:06d}{suffix}"
+
+    def state(self) -> dict[str, ArchivedFile]:
+        """The archived files by their path relative to the archived folder."""
+        files: dict[str, ArchivedFile] = {}
+        for seq in self._segments():
+            index = json.loads(self._segment_path(seq, self.INDEX_SUFFIX).read_text())
+            for rel, entry in index["files"].items():
+                files[rel] = ArchivedFile(*entry)
+            for rel in index["removed"]:
+                files.pop(rel, None)
+        return files
+
+    def add(self, root: str | Path, files: Iterable[Path] | None = None) -> int:
+        """
+        Archive the files under `root` (or the given ones) which are new or changed since the last call.
+        Files which are not given anymore are recorded as removed.
+        Return the number of files written into the new segment.
+        """
+        root = Path(root)
+        archived = self.state()
+        seq = max(self._segments(), default=0) + 1
+
+        updated: dict[str, ArchivedFile] = {}
+        to_write: list[tuple[str, Path]] = []
+        present = set()
+        for path in iter_tree(root) if files is None else files:
+            rel = path.relative_to(root).as_posix()
+            try:
+                stat = path.lstat()
+            except FileNotFoundError:
+                continue  # removed while walking
+            present.add(rel)
+            old = archived.get(rel)
+            if old is not None and (old.size, old.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                continue
+            digest = file_digest(path)
+            if old is not None and old.digest == digest:
+                # only touched: the content stays in its segment
+                updated[rel] = old._replace(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            else:
+                updated[rel] = ArchivedFile(stat.st_size, stat.st_mtime_ns, digest, seq)
+                to_write.append((rel, path))
+        removed = [rel for rel in archived if rel not in present]
+        if not updated and not removed:
+            return 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        if to_write:
+            tmp = (self.temp_path or self.path) / f".{seq:06d}{self.SEGMENT_SUFFIX}.tmp-{os.getpid()}"
+            tmp.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                with tarfile.open(tmp, "w") as tar:
+                    for rel, path in to_write:
+                        tar.add(path, arcname=rel, recursive=False)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+            self._move_atomic(tmp, self._segment_path(seq, self.SEGMENT_SUFFIX))
+
+        tmp = self.path / f".{seq:06d}{self.INDEX_SUFFIX}.tmp-{os.getpid()}"
+        tmp.write_text(json.dumps({"files": {rel: list(entry) for rel, entry in updated.items()}, "removed": removed}))
+        os.replace(tmp, self._segment_path(seq, self.INDEX_SUFFIX))
+        return len(to_write)
+
+    def _move_atomic(self, src: Path, dst: Path) -> None:
+        """Move `src` to `dst`; `dst` either does not exist or is complete."""
+        if src.parent != dst.parent:
+            # the temporary folder may be on another file system: copy next to the destination first
+            tmp = dst.with_name(src.name)
+            shutil.move(src, tmp)
+            src = tmp
+        os.replace(src, dst)
+
+    def restore(self, target: str | Path) -> int:
+        """Rebuild the archived folder in `target`; return the number of restored files."""
+        target = Path(target)
+        target.mkdir(parents=True, exist_ok=True)
+        by_segment: dict[int, set[str]] = {}
+        for rel, entry in self.state().items():
+            by_segment.setdefault(entry.segment, set()).add(rel)
+        for seq, rels in sorted(by_segment.items()):
+            with tarfile.open(self._segment_path(seq, self.SEGMENT_SUFFIX)) as tar:
+                members = [m for m in tar.getmembers() if m.name in rels]
+                tar.extractall(target, members=members)
+        return sum(len(rels) for rels in by_segment.values())
@@ -22,7 +22,7 @@ from abc import abstractmethod
 from dataclasses import dataclass
 from pathlib import Path
 from types import MappingProxyType
-from typing import Any, Generator, Generic, Mapping, Optional, TypeVar, cast
+from typing import Any, Generator, Generic, Literal, Mapping, Optional, TypeVar, cast
 
 import docker  # type: ignore[import-untyped]
 import docker.models  # type: ignore[import-untyped]
@@ -42,6 +42,13 @@ from rdagent.core.experiment import RD_AGENT_SETTINGS
 from rdagent.log import rdagent_logger as logger
 from rdagent.oai.llm_utils import md5_hash
 from rdagent.utils.agent.tpl import T
+from rdagent.utils.resource_scheduler import (
+    ResourceLease,
+    ResourceRequest,
+    ResourceScheduler,
+    get_resource_scheduler,
+    parse_memory_size,
+)
 from rdagent.utils.workflow import wait_retry
 
 
@@ -124,6 +131,16 @@ class EnvConf(ExtendedBaseSettings):
     enable_cache: bool = True
     retry_count: int = 5  # retry count for the docker run
     retry_wait_seconds: int = 10  # retry wait seconds for the docker run
+    # the request of a run to the resource scheduler (`RD_AGENT_SETTINGS.enable_resource_scheduler`)
+    cpu_request: int | None = None  # by default, the CPU cores are shared evenly by the parallel runs
+    mem_request: str | None = None  # e.g. "8g"; by default, only the memory estimated by the caller is reserved
+    permission_fix: Literal["chmod", "newer", "user", "none"] = "none"
+    """How the files written by a run are kept writable by the host user (e.g. when a container runs as root)
+    - "chmod": `chmod -R 777` the workspace (except the input and cache folders) after each run;
+    - "newer": only `chmod 777` the files created or modified by the run (found with `find -cnewer` and a marker);
+    - "user": run as the host user (docker only), so nothing has to be fixed;
+    - "none": nothing is done, e.g. for the local environments, where the files already belong to the host user.
+    """
 
     model_config = SettingsConfigDict(
         # TODO: add prefix ....
@@ -144,6 +161,7 @@ class EnvResult:
     stdout: str
     exit_code: int
     running_time: float
+    queue_wait_time: float = 0.0  # the time waiting for the resource scheduler, not included in the running time
 
 
 class Env(Generic[ASpecificEnvConf]):
@@ -211,30 +229,57 @@ class Env(Generic[ASpecificEnvConf]):
         result = self.run(entry=entry, local_path=local_path, env=env, **kwargs)
         return result.stdout
 
+    def _resource_request(self, scheduler: ResourceScheduler, resources: ResourceRequest | None) -> ResourceRequest:
+        """Complete the request of the caller with the configured or default resources."""
+        parallel = max(RD_AGENT_SETTINGS.get_max_parallel(), RD_AGENT_SETTINGS.multi_proc_n, 1)
+        resources = resources or ResourceRequest()
+        return ResourceRequest(
+            cpus=resources.cpus or self.conf.cpu_request or max(scheduler.total_cpus // parallel, 1),
+            memory_mb=resources.memory_mb or parse_memory_size(self.conf.mem_request) or 0.0,
+        )
+
     def __run_with_retry(
         self,
         entry: str | None = None,
         local_path: str = ".",
         env: dict | None = None,
         running_extra_volume: Mapping = MappingProxyType({}),
+        resources: ResourceRequest | None = None,
     ) -> EnvResult:
+        scheduler = get_resource_scheduler()
+        request = self._resource_request(scheduler, resources) if scheduler is not None else None
+        queue_wait_time = 0.0
         for retry_index in range(self.conf.retry_count + 1):
             try:
-                start = time.time()
-                log_output, return_code = self._run(
-                    entry,
-                    local_path,
-                    env,
-                    running_extra_volume=running_extra_volume,
-                )
-                end = time.time()
+                # the lease is taken for each attempt, so that a run waiting to retry does not hold the resources
+                with scheduler.acquire(request) if scheduler is not None else contextlib.nullcontext() as lease:
+                    if lease is not None:
+                        queue_wait_time += lease.queue_wait
+                        logger.info(
+                            f"Leased CPU cores {lease.cpus} and {lease.memory_mb:.0f}MiB of memory "
+                            f"after waiting {lease.queue_wait:.1f} seconds."
+                        )
+                    start = time.time()
+                    log_output, return_code = self._run(
+                        entry,
+                        local_path,
+                        env,
+                        running_extra_volume=running_extra_volume,
+                        lease=lease,
+                    )
+                    end = time.time()
                 logger.info(f"Running time: {end - start} seconds")
                 if self.conf.running_timeout_period is not None and end - start + 1 >= self.conf.running_timeout_period:
                     logger.warning(
                         f"The running time exceeds {self.conf.running_timeout_period} seconds, so the process is killed."
                     )
                     log_output += f"\n\nThe running time exceeds {self.conf.running_timeout_period} seconds, so the process is killed."
-                return EnvResult(log_output, return_code, end - start)
+                if queue_wait_time >= 1:
+                    log_output += (
+                        f"\n\nThe run waited {queue_wait_time:.0f} seconds for free CPU cores and memory before "
+                        "starting (not included in the running time)."
+                    )
+                return EnvResult(log_output, return_code, end - start, queue_wait_time)
             except Exception as e:
                 if retry_index == self.conf.retry_count:
                     raise
@@ -266,12 +311,15 @@ class Env(Generic[ASpecificEnvConf]):
             - simply run the image. The results are produced by output or network
         env : dict | None
             Run the code with your specific environment.
+        resources : ResourceRequest | None
+            The CPU cores and memory the run needs (e.g. the estimated memory), for the resource scheduler.
 
         Returns
         -------
             EnvResult: An object containing the stdout, the exit code, and the running time in seconds.
         """
         running_extra_volume = kwargs.get("running_extra_volume", {})
+        resources = cast(Optional[ResourceRequest], kwargs.get("resources"))
         if entry is None:
             entry = self.conf.default_entry
 
@@ -285,50 +333,69 @@ class Env(Generic[ASpecificEnvConf]):
         # FIXME: the input path and cache path is hard coded here.
         # We don't want to change the content in input and cache path.
         # Otherwise, it may produce large amount of warnings.
-        def _get_chmod_cmd(workspace_path: str) -> str:
-            def _get_path_stem(path: str) -> str | None:
-                # If the input path is relative, keep only the first component
-                p = Path(path)
-                if not p.is_absolute() and p.parts:
-                    return p.parts[0]
-                return None
+        def _get_path_stem(path: str) -> str | None:
+            # If the input path is relative, keep only the first component
+            p = Path(path)
+            if not p.is_absolute() and p.parts:
+                return p.parts[0]
+            return None
+
+        skipped_names = [
+            _get_path_stem(T("scenarios.data_science.share:scen.cache_path").r()),
+            _get_path_stem(T("scenarios.data_science.share:scen.input_path").r()),
+        ]
 
+        def _get_chmod_cmd(workspace_path: str) -> str:
             chmod_cmd = f"chmod -R 777 $(find {workspace_path} -mindepth 1 -maxdepth 1"
-            for name in [
-                _get_path_stem(T("scenarios.data_science.share:scen.cache_path").r()),
-                _get_path_stem(T("scenarios.data_science.share:scen.input_path").r()),
-            ]:
+            for name in skipped_names:
                 chmod_cmd += f" ! -name {name}"
             chmod_cmd += ")"
             return chmod_cmd
 
+        def _get_chmod_newer_cmd(workspace_path: str) -> str:
+            # only the files whose status changed since the marker, i.e. created or modified by this run; ctime can
+            # not be set back like mtime (e.g. by extracting an archive); symlinks are skipped to keep their targets
+            prune = " -o ".join(f"-path {workspace_path.rstrip('/')}/{name}" for name in skipped_names)
+            return (
+                f"find {workspace_path} -mindepth 1 \\( {prune} \\) -prune -o "
+                "! -type l -cnewer $run_start_marker -exec chmod 777 {} +; rm -f $run_start_marker"
+            )
+
+        workspace_path = self.conf.mount_path if isinstance(self.conf, DockerConf) else "."
+        permission_setup_cmd, permission_fix_cmd = {
+            "chmod": ("", f"{_get_chmod_cmd(workspace_path)}; "),
+            # backdated by a second so that files created within the same clock tick as the marker are included
+            "newer": (
+                'run_start_marker=$(mktemp); touch -d "1 second ago" $run_start_marker; ',
+                f"{_get_chmod_newer_cmd(workspace_path)}; ",
+            ),
+        }.get(self.conf.permission_fix, ("", ""))
+
         if self.conf.running_timeout_period is None:
             timeout_cmd = entry
         else:
             timeout_cmd = f"timeout --kill-after=10 {self.conf.running_timeout_period} {entry}"
         entry_add_timeout = (
             f"/bin/sh -c '"  # start of the sh command
+            + permission_setup_cmd
             + f"{timeout_cmd}; entry_exit_code=$?; "
-            + (
-                f"{_get_chmod_cmd(self.conf.mount_path)}; "
-                # We don't have to change the permission of the cache and input folder to remove it
-                # + f"if [ -d {self.conf.mount_path}/cache ]; then chmod 777 {self.conf.mount_path}/cache; fi; " +
-                #     f"if [ -d {self.conf.mount_path}/input ]; then chmod 777 {self.conf.mount_path}/input; fi; "
-                if isinstance(self.conf, DockerConf)
-                else ""
-            )
+            # We don't have to change the permission of the cache and input folder to remove it
+            # + f"if [ -d {self.conf.mount_path}/cache ]; then chmod 777 {self.conf.mount_path}/cache; fi; " +
+            #     f"if [ -d {self.conf.mount_path}/input ]; then chmod 777 {self.conf.mount_path}/input; fi; "
+            + permission_fix_cmd
             + "exit $entry_exit_code"
             + "'"  # end of the sh command
         )
 
         if self.conf.enable_cache:
-            result = self.cached_run(entry_add_timeout, local_path, env, running_extra_volume)
+            result = self.cached_run(entry_add_timeout, local_path, env, running_extra_volume, resources)
         else:
             result = self.__run_with_retry(
                 entry_add_timeout,
                 local_path,
                 env,
                 running_extra_volume,
+                resources,
             )
 
         return result
@@ -339,6 +406,7 @@ class Env(Generic[ASpecificEnvConf]):
         local_path: str = ".",
         env: dict | None = None,
         running_extra_volume: Mapping = MappingProxyType({}),
+        resources: ResourceRequest | None = None,
     ) -> EnvResult:
         """
         Run the folder under the environment.
@@ -375,7 +443,7 @@ class Env(Generic[ASpecificEnvConf]):
                 ret = pickle.load(f)
             self.unzip_a_file_into_a_folder(str(target_folder / f"{key}.zip"), local_path)
         else:
-            ret = self.__run_with_retry(entry, local_path, env, running_extra_volume)
+            ret = self.__run_with_retry(entry, local_path, env, running_extra_volume, resources)
             with open(target_folder / f"{key}.pkl", "wb") as f:
                 pickle.dump(ret, f)
             self.zip_a_folder_into_a_file(local_path, str(target_folder / f"{key}.zip"))
@@ -469,6 +537,7 @@ class LocalEnv(Env[ASpecificLocalConf]):
         local_path: str | None = None,
         env: dict | None = None,
         running_extra_volume: Mapping = MappingProxyType({}),
+        lease: ResourceLease | None = None,
         **kwargs: dict,
     ) -> tuple[str, int]:
 
@@ -531,10 +600,16 @@ class LocalEnv(Env[ASpecificLocalConf]):
             cwd = Path(local_path).resolve() if local_path else None
             env = {k: str(v) if isinstance(v, int) else v for k, v in env.items()}
 
+            def _pin_cpus() -> None:
+                # pin the process to the CPU cores leased by the resource scheduler
+                with contextlib.suppress(OSError):
+                    os.sched_setaffinity(0, lease.cpus)
+
             process = subprocess.Popen(
                 entry,
                 cwd=cwd,
                 env={**os.environ, **env},
+                preexec_fn=_pin_cpus if lease is not None and hasattr(os, "sched_setaffinity") else None,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -642,6 +717,7 @@ class DockerConf(EnvConf):
     enable_gpu: bool = True  # because we will automatically disable GPU if not available. So we enable it by default.
     mem_limit: str | None = "48g"  # Add memory limit attribute
     cpu_count: int | None = None  # Add CPU limit attribute
+    permission_fix: Literal["chmod", "newer", "user", "none"] = "newer"
 
     running_timeout_period: int | None = 3600  # 1 hour
 
@@ -867,6 +943,7 @@ class DockerEnv(Env[DockerConf]):
         local_path: str = ".",
         env: dict | None = None,
         running_extra_volume: Mapping = MappingProxyType({}),
+        lease: ResourceLease | None = None,
         **kwargs: Any,
     ) -> tuple[str, int]:
         if env is None:
@@ -874,6 +951,11 @@ class DockerEnv(Env[DockerConf]):
         env["PYTHONWARNINGS"] = "ignore"
         env["TF_CPP_MIN_LOG_LEVEL"] = "2"
         env["PYTHONUNBUFFERED"] = "1"
+        user = None
+        if self.conf.permission_fix == "user":
+            # the files written into the mounted folders belong to the host user; the host user has no home in the image
+            user = f"{os.getuid()}:{os.getgid()}"
+            env.setdefault("HOME", "/tmp")
         client = docker.from_env()
 
         volumes = {}
@@ -908,6 +990,9 @@ class DockerEnv(Env[DockerConf]):
                 shm_size=self.conf.shm_size,
                 mem_limit=self.conf.mem_limit,  # Set memory limit
                 cpu_count=self.conf.cpu_count,  # Set CPU limit
+                # pin the container to the CPU cores leased by the resource scheduler
+                cpuset_cpus=",".join(map(str, lease.cpus)) if lease is not None else None,
+                user=user,
                 **self._gpu_kwargs(client),
             )
             assert container is not None  # Ensure container was created successfully
@@ -0,0 +1,201 @@
+"""
+A resource scheduler shared by all the environments running on the host.
+
+Parallel loops, CoSTEER sub-tasks and other sessions on the same host may run workspaces at the same time. Without
+coordination they oversubscribe the CPU cores and the memory, so every run slows down and some are OOM killed.
+The scheduler admits a run only when its request (CPU cores and memory) fits into what the running ones leave, and
+queues it otherwise. The admitted run gets a set of CPU cores of its own, which the environment pins it to.
+
+The state is a JSON file guarded by a file lock, so that it is shared by all the processes of the host:
+
+    {"leases": {<id>: {"pid": 123, "cpus": [0, 1], "memory_mb": 4096}},
+     "queue": [{"id": <id>, "pid": 456, "cpus": 2, "memory_mb": 0, "bypassed": 1}]}
+
+The leases and the queued requests of dead processes are dropped, so a crashed run never holds resources. A queued
+request is admitted once it fits and none of the requests queued before it fits, i.e. earlier requests have priority
+and later, smaller ones fill the gaps. A queued request is bypassed this way at most `max_bypass` times: then the
+requests queued after it wait until it is admitted, so a large request does not starve on a busy host.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from filelock import FileLock
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+
+
+def parse_memory_size(size: str | None) -> float | None:
+    """Convert a docker memory size such as "48g" to MiB."""
+    if size is None or not (match := re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([bkmg]?)b?\s*", size.lower())):
+        return None
+    return float(match.group(1)) * {"b": 2**-20, "k": 2**-10, "": 2**-20, "m": 1, "g": 2**10}[match.group(2)]
+
+
+def host_memory_mb() -> float:
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # owned by another user
+    return True
+
+
+@dataclass
+class ResourceRequest:
+    cpus: int | None = None  # None: the default of the environment
+    memory_mb: float | None = None
+
+
+@dataclass
+class ResourceLease:
+    id: str
+    cpus: list[int]
+    memory_mb: float
+    queue_wait: float  # seconds spent in the queue
+
+
+class ResourceScheduler:
+    def __init__(
+        self,
+        state_path: str | Path,
+        total_cpus: int | None = None,
+        total_memory_mb: float | None = None,
+        poll_interval: float = 0.5,
+        max_bypass: int = 3,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        state_path : str | Path
+            The state file shared by the processes of the host; its lock file is next to it.
+        total_cpus : int | None
+            The CPU cores which may be leased (cores `0 .. total_cpus - 1`); all the cores of the host by default.
+        total_memory_mb : float | None
+            The memory which may be leased; the physical memory of the host by default.
+        poll_interval : float
+            How often a queued request checks whether it fits; the runs are long, so this is not worth a daemon.
+        max_bypass : int
+            How many later requests may be admitted before a queued request which does not fit yet.
+        """
+        self.state_path = Path(state_path)
+        self.total_cpus = total_cpus or os.cpu_count() or 1
+        self.total_memory_mb = total_memory_mb or host_memory_mb()
+        self.poll_interval = poll_interval
+        self.max_bypass = max_bypass
+
+    @contextlib.contextmanager
+    def _locked_state(self) -> Iterator[dict]:
+        """Read, modify and write the state while holding the lock of the host."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        # a new lock object for each call: its own file descriptor also excludes the other threads of this process
+        with FileLock(str(self.state_path) + ".lock", thread_local=False):
+            try:
+                state = json.loads(self.state_path.read_text())
+            except (FileNotFoundError, ValueError):
+                state = {}
+            state.setdefault("leases", {})
+            state.setdefault("queue", [])
+            state["leases"] = {k: v for k, v in state["leases"].items() if _is_alive(v["pid"])}
+            state["queue"] = [r for r in state["queue"] if _is_alive(r["pid"])]
+            yield state
+            tmp = self.state_path.with_name(f".{self.state_path.name}.tmp-{os.getpid()}")
+            tmp.write_text(json.dumps(state))
+            os.replace(tmp, self.state_path)
+
+    def _clamp(self, request: ResourceRequest) -> ResourceRequest:
+        """A request larger than the host would never be admitted."""
+        return ResourceRequest(
+            cpus=min(max(request.cpus or 1, 1), self.total_cpus),
+            memory_mb=min(max(request.memory_mb or 0.0, 0.0), self.total_memory_mb),
+        )
+
+    def _free(self, state: dict) -> tuple[list[int], float]:
+        used_cpus = {cpu for lease in state["leases"].values() for cpu in lease["cpus"]}
+        used_memory = sum(lease["memory_mb"] for lease in state["leases"].values())
+        return [cpu for cpu in range(self.total_cpus) if cpu not in used_cpus], self.total_memory_mb - used_memory
+
+    def _try_acquire(self, lease_id: str, request: ResourceRequest) -> list[int] | None:
+        """Lease the request if it may be admitted now, otherwise queue it; return the leased cores."""
+        with self._locked_state() as state:
+            free_cpus, free_memory = self._free(state)
+
+            def fits(cpus: int, memory_mb: float) -> bool:
+                return cpus <= len(free_cpus) and memory_mb <= free_memory
+
+            queued_ids = [r["id"] for r in state["queue"]]
+            earlier = state["queue"][: queued_ids.index(lease_id)] if lease_id in queued_ids else state["queue"]
+            if (
+                fits(request.cpus, request.memory_mb)
+                and not any(fits(r["cpus"], r["memory_mb"]) for r in earlier)
+                and all(r.get("bypassed", 0) < self.max_bypass for r in earlier)
+            ):
+                for r in earlier:
+                    r["bypassed"] = r.get("bypassed", 0) + 1
+                cpus = free_cpus[: request.cpus]
+                state["leases"][lease_id] = {"pid": os.getpid(), "cpus": cpus, "memory_mb": request.memory_mb}
+                state["queue"] = [r for r in state["queue"] if r["id"] != lease_id]
+                return cpus
+            if lease_id not in queued_ids:
+                state["queue"].append(
+                    {"id": lease_id, "pid": os.getpid(), "cpus": request.cpus, "memory_mb": request.memory_mb}
+                )
+            return None
+
+    def release(self, lease: ResourceLease) -> None:
+        with self._locked_state() as state:
+            state["leases"].pop(lease.id, None)
+
+    def _dequeue(self, lease_id: str) -> None:
+        with self._locked_state() as state:
+            state["queue"] = [r for r in state["queue"] if r["id"] != lease_id]
+
+    @contextlib.contextmanager
+    def acquire(self, request: ResourceRequest) -> Iterator[ResourceLease]:
+        """Wait until the request is admitted and hold the lease in the context."""
+        request = self._clamp(request)
+        lease_id = uuid.uuid4().hex
+        begin = time.monotonic()
+        try:
+            while (cpus := self._try_acquire(lease_id, request)) is None:
+                time.sleep(self.poll_interval)
+        except BaseException:
+            self._dequeue(lease_id)
+            raise
+        lease = ResourceLease(lease_id, cpus, request.memory_mb, time.monotonic() - begin)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+
+_scheduler: ResourceScheduler | None = None
+
+
+def get_resource_scheduler() -> ResourceScheduler | None:
+    """The scheduler of the host, or None if it is disabled (`RD_AGENT_SETTINGS.enable_resource_scheduler`)."""
+    global _scheduler
+    if not RD_AGENT_SETTINGS.enable_resource_scheduler:
+        return None
+    if _scheduler is None:
+        _scheduler = ResourceScheduler(
+            RD_AGENT_SETTINGS.resource_scheduler_path or Path(tempfile.gettempdir()) / "rdagent_resources.json",
+            total_cpus=RD_AGENT_SETTINGS.resource_scheduler_cpus,
+            total_memory_mb=parse_memory_size(RD_AGENT_SETTINGS.resource_scheduler_memory),
+        )
+    return _scheduler
@@ -128,6 +128,8 @@ class LoopBase:
         self.step_n: Optional[int] = None  # remain step count
 
         self.semaphores: dict[str, asyncio.Semaphore] = {}
+        # notified whenever a step of a loop is finished; the routines waiting for a state of the loops wait on it
+        self.step_done = asyncio.Condition()
 
     def get_unfinished_loop_cnt(self, next_loop: int) -> int:
         n = 0
@@ -136,6 +138,23 @@ class LoopBase:
                 n += 1
         return n
 
+    def has_free_slot(self) -> bool:
+        """Whether a new loop can be kicked off without exceeding the maximum number of parallel loops"""
+        return self.get_unfinished_loop_cnt(self.loop_idx) < RD_AGENT_SETTINGS.get_max_parallel()
+
+    async def wait_until(self, predicate: Callable[[], bool]) -> None:
+        """
+        Wait until `predicate()` is true.
+
+        The predicate is checked again each time a loop finishes a step (e.g. a loop is finished or a new
+        experiment is recorded into the trace) instead of polling.
+        """
+        async with self.step_done:
+            await self.step_done.wait_for(predicate)
+
+    async def wait_for_free_slot(self) -> None:
+        await self.wait_until(self.has_free_slot)
+
     def get_semaphore(self, step_name: str) -> asyncio.Semaphore:
         if isinstance(limit := RD_AGENT_SETTINGS.step_semaphore, dict):
             limit = limit.get(step_name, 1)  # default to 1 if not specified
@@ -238,6 +257,8 @@ class LoopBase:
                     # Record the trace
                     end = datetime.datetime.now(datetime.timezone.utc)
                     self.loop_trace[li].append(LoopTrace(start, end, step_idx=si))
+                    # the summaries of the trace read the step boundaries from the log instead of the session
+                    logger.log_object(self.loop_trace[li][-1], tag="step_trace")
                     # Save snapshot after completing the step
                     self.dump(self.session_folder / f"{li}" / f"{si}_{name}")
                 except Exception as e:
@@ -260,6 +281,8 @@ class LoopBase:
                     if step_forward:
                         # Increment step index
                         self.step_idx[li] = next_step_idx
+                        async with self.step_done:
+                            self.step_done.notify_all()
 
                         # Update progress bar
                         current_step = self.step_idx[li]
@@ -336,6 +359,7 @@ class LoopBase:
         # empty the queue when restarting
         while not self.queue.empty():
             self.queue.get_nowait()
+        self.step_done = asyncio.Condition()  # nobody is waiting; it may be bound to the event loop of a former run
         self.loop_idx = (
             0  # if we rerun the loop, we should revert the loop index to 0 to make sure every loop is correctly kicked
         )
@@ -473,7 +497,7 @@ class LoopBase:
     def __getstate__(self) -> dict[str, Any]:
         res = {}
         for k, v in self.__dict__.items():
-            if k not in ["queue", "semaphores", "_pbar"]:
+            if k not in ["queue", "semaphores", "_pbar", "step_done"]:
                 res[k] = v
         return res
 
@@ -481,3 +505,4 @@ class LoopBase:
         self.__dict__.update(state)
         self.queue = asyncio.Queue()
         self.semaphores = {}
+        self.step_done = asyncio.Condition()
@@ -0,0 +1,79 @@
+import os
+import tarfile
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.utils.archive import IncrementalArchive, iter_tree
+
+
+def snapshot(root: Path) -> dict[str, bytes]:
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in iter_tree(root)}
+
+
+@pytest.mark.offline
+class IncrementalArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        self.folder = self.path / "log"
+        self.folder.mkdir()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def simulate_loop(self, loop_id: int) -> None:
+        """Each loop logs a few new files and rewrites the common log file."""
+        loop_folder = self.folder / f"Loop_{loop_id}" / "coding"
+        loop_folder.mkdir(parents=True)
+        for i in range(10):
+            (loop_folder / f"{i}.pkl").write_bytes(os.urandom(2048))
+        with (self.folder / "common_logs.log").open("a") as f:
+            f.write(f"loop {loop_id} done\n" * 10)
+
+    def test_simulated_run(self):
+        archive = IncrementalArchive(self.path / "archive", temp_path=self.path / "archive_tmp")
+        incremental_time = full_time = 0.0
+        for loop_id in range(100):
+            self.simulate_loop(loop_id)
+            begin = time.perf_counter()
+            n_written = archive.add(self.folder)
+            incremental_time += time.perf_counter() - begin
+            self.assertEqual(n_written, 11)
+
+            begin = time.perf_counter()
+            with tarfile.open(self.path / "full.tar", "w") as tar:
+                tar.add(self.folder, arcname=".")
+            full_time += time.perf_counter() - begin
+        print(f"archive time per loop: incremental {incremental_time * 10:.1f}ms, full tar {full_time * 10:.1f}ms")
+        self.assertEqual(archive.add(self.folder), 0)
+        self.assertEqual(sorted(os.listdir(self.path / "archive_tmp")), [])
+
+        # touched files are not archived again; removed files are not restored
+        os.utime(self.folder / "Loop_0" / "coding" / "0.pkl")
+        (self.folder / "Loop_1" / "coding" / "0.pkl").unlink()
+        (self.folder / "Loop_2" / "coding" / "0.pkl").write_bytes(b"changed")
+        self.assertEqual(archive.add(self.folder), 1)
+
+        restored = self.path / "restored"
+        self.assertEqual(archive.restore(restored), 100 * 10)
+        self.assertEqual(snapshot(restored), snapshot(self.folder))
+
+    def test_given_files_and_interrupted_segments(self):
+        (self.folder / "a.py").write_text("a")
+        (self.folder / "b.csv").write_text("b")
+        archive = IncrementalArchive(self.path / "archive")
+        self.assertEqual(archive.add(self.folder, [self.folder / "a.py"]), 1)
+        # a segment without index is ignored
+        (self.path / "archive" / "000002.tar").write_bytes(b"partial")
+        self.assertEqual(archive.add(self.folder), 1)
+        self.assertEqual(set(archive.state()), {"a.py", "b.csv"})
+        self.assertEqual(archive.restore(self.path / "restored"), 2)
+        self.assertEqual((self.path / "restored" / "b.csv").read_text(), "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
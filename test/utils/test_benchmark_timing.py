@@ -0,0 +1,74 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from rdagent.app.benchmark.factor.analysis import PerformanceAnalyzer
+from rdagent.components.benchmark.eval_method import BaseEval
+
+
+class FakeWorkspace:
+    def execute(self):
+        time.sleep(0.1)
+
+
+class FakeEvaluator:
+    def evaluate(self, implementation, gt_implementation):
+        implementation.execute()
+        time.sleep(0.05)
+        return "ok"
+
+
+def timing_records(factors: dict[str, float]) -> list[dict]:
+    """Two rounds per factor; the second round takes twice as long."""
+    return [
+        {
+            "round": r,
+            "factor_name": name,
+            "generation_time": seconds * (r + 1),
+            "llm_latency": seconds / 2 * (r + 1),
+            "execution_time": 1.0,
+            "evaluation_time": 0.5,
+        }
+        for r in range(2)
+        for name, seconds in factors.items()
+    ]
+
+
+@pytest.mark.offline
+class BenchmarkTimingTest(unittest.TestCase):
+    def test_timed_eval_case(self):
+        workspace = FakeWorkspace()
+        res, timing = BaseEval([FakeEvaluator()], None, None).timed_eval_case(object(), workspace)
+        self.assertEqual(res[0][1], "ok")
+        self.assertEqual(timing["execute_calls"], 1)
+        # the generated code and the evaluator are timed separately
+        self.assertGreaterEqual(timing["execution_time"], 0.1)
+        self.assertGreaterEqual(timing["evaluation_time"], 0.05)
+        self.assertLess(timing["evaluation_time"], 0.1)
+        self.assertFalse(timing["gt_cache_hit"])
+        self.assertNotIn("execute", vars(workspace))  # the timing wrapper is removed
+
+    def test_compare_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {"base": Path(tmp) / "base.parquet", "new": Path(tmp) / "new.parquet"}
+            pd.DataFrame(timing_records({"f1": 10.0, "f2": 4.0})).to_parquet(paths["base"])
+            pd.DataFrame(timing_records({"f1": 5.0, "f2": 8.0})).to_parquet(paths["new"])
+            report = PerformanceAnalyzer(regression_threshold=1.2).compare(paths)
+
+        # the median of the rounds; the LLM latency is part of the generation time, so not in the total
+        self.assertEqual(report.loc["f1", ("base", "generation_time")], 15.0)
+        self.assertEqual(report.loc["f1", ("base", "llm_latency")], 7.5)
+        self.assertEqual(report.loc["f1", ("base", "total_time")], 16.5)
+        self.assertEqual(report.loc["f1", ("new", "speedup_generation_time")], 2.0)
+        self.assertEqual(report.loc["f2", ("new", "speedup_generation_time")], 0.5)
+        self.assertEqual(report.loc["f1", ("new", "speedup_execution_time")], 1.0)
+        regressions = report["new"].filter(like="regression_").any(axis=1)
+        self.assertEqual(regressions.to_dict(), {"f1": False, "f2": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
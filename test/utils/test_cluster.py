@@ -0,0 +1,84 @@
+import time
+import unittest
+
+import numpy as np
+import pytest
+
+from rdagent.components.knowledge_management.cluster import (
+    kmeans_groups_with_max_size,
+    normalize_rows,
+    sampled_silhouette_score,
+    select_k_by_silhouette,
+    spherical_minibatch_kmeans,
+    threshold_groups,
+)
+
+
+def make_duplicated_embeddings(n: int, dup_size: int = 4, dim: int = 64, noise: float = 0.02, seed: int = 0):
+    """Synthetic factor embeddings: `n // dup_size` distinct factors, each described `dup_size` times."""
+    rng = np.random.default_rng(seed)
+    n_base = n // dup_size
+    base = normalize_rows(rng.normal(size=(n_base, dim)))
+    truth = np.repeat(np.arange(n_base), dup_size)
+    x = normalize_rows(base[truth] + noise * rng.normal(size=(truth.size, dim)))
+    return x, truth
+
+
+def pair_precision_recall(groups: list[list[int]], truth: np.ndarray) -> tuple[float, float]:
+    pred = np.empty(truth.size, dtype=np.int64)
+    for gid, group in enumerate(groups):
+        pred[group] = gid
+
+    def n_pairs(labels: np.ndarray) -> int:
+        counts = np.bincount(labels)
+        return int((counts * (counts - 1) // 2).sum())
+
+    _, joint = np.unique(np.stack([pred, truth], axis=1), axis=0, return_inverse=True)
+    tp = n_pairs(joint.ravel())
+    pred_pairs, true_pairs = n_pairs(pred), n_pairs(truth)
+    return tp / max(pred_pairs, 1), tp / max(true_pairs, 1)
+
+
+@pytest.mark.offline
+class ClusterTest(unittest.TestCase):
+    def test_kmeans_recovers_clusters(self):
+        x, truth = make_duplicated_embeddings(400, dup_size=40)
+        _, labels = spherical_minibatch_kmeans(x, k=10)
+        precision, recall = pair_precision_recall([list(np.flatnonzero(labels == c)) for c in set(labels)], truth)
+        self.assertGreater(precision, 0.8)
+        self.assertGreater(recall, 0.5)
+
+    def test_kmeans_groups_with_max_size(self):
+        x, _ = make_duplicated_embeddings(1000, dup_size=50)
+        groups = kmeans_groups_with_max_size(x, max_group_size=100, k_min=10, k_max=40)
+        self.assertLess(len(groups[0]), 100)
+        self.assertEqual(sorted(i for g in groups for i in g), list(range(1000)))
+
+        self.assertEqual(kmeans_groups_with_max_size(x[:50], max_group_size=100), [list(range(50))])
+
+    def test_silhouette_prefers_true_k(self):
+        x, truth = make_duplicated_embeddings(600, dup_size=100)
+        self.assertGreater(sampled_silhouette_score(x, truth), sampled_silhouette_score(x, truth % 2))
+        best_k, _ = select_k_by_silhouette(x, candidate_ks=[2, 3, 6, 12])
+        self.assertEqual(best_k, 6)
+
+    def test_dedup_report(self):
+        for n in [100, 1000, 10000]:
+            x, truth = make_duplicated_embeddings(n)
+            start = time.perf_counter()
+            groups = threshold_groups(x, similarity_threshold=0.9, topk=8)
+            elapsed = time.perf_counter() - start
+            precision, recall = pair_precision_recall(groups, truth)
+            print(f"threshold dedup n={n}: precision={precision:.3f} recall={recall:.3f} time={elapsed:.3f}s")
+            self.assertGreater(precision, 0.95)
+            self.assertGreater(recall, 0.95)
+
+            start = time.perf_counter()
+            groups = kmeans_groups_with_max_size(x, max_group_size=max(n // 20, 5), k_min=10, k_max=60)
+            elapsed = time.perf_counter() - start
+            precision, recall = pair_precision_recall(groups, truth)
+            print(f"kmeans grouping n={n}: largest={len(groups[0])} recall={recall:.3f} time={elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    unittest.main()
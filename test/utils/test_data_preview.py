@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.scenarios.data_science.scen import utils
+from rdagent.scenarios.data_science.scen.utils import DataFolderDescriptor
+
+
+@pytest.mark.offline
+class DataPreviewTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        self.cache_patch = patch.object(RD_AGENT_SETTINGS, "pickle_cache_folder_path_str", str(self.path / "cache"))
+        self.cache_patch.start()
+        self.data = self.path / "data"
+        self.data.mkdir()
+        n = 50_000
+        df = pd.DataFrame({"id": np.arange(n), "label": np.arange(n) % 3, "text": ["a,b\nc"] * n})
+        df.to_csv(self.data / "train.csv", index=False)
+        df.to_parquet(self.data / "train.parquet")
+        (self.data / "notes.txt").write_text("first\nsecond\nthird")
+
+    def tearDown(self):
+        self.cache_patch.stop()
+        self.tmp.cleanup()
+
+    def test_metadata_first_previews_and_cache(self):
+        full = DataFolderDescriptor().describe_folder(self.data, max_length=100000)
+        self.assertIn("It has 50000 rows and 3 columns.", full)
+        self.assertIn("-> notes.txt has content", full)
+        self.assertEqual(utils.count_lines(self.data / "notes.txt"), 3)
+
+        # large files: only the first rows are read; the row count comes from the parquet footer / the line count
+        with patch.object(utils, "preview_full_read_bytes", 0), patch.object(utils, "preview_sample_rows", 100):
+            csv_preview = utils.preview_csv(self.data / "train.csv", "train.csv", simple=False)
+            parquet_preview = utils.preview_parquet(self.data / "train.parquet", "train.parquet", simple=False)
+        self.assertIn("It has 50000 rows and 3 columns.", parquet_preview)
+        self.assertIn("based on the first 100 rows", parquet_preview)
+        # the newlines inside the quoted fields are not counted as rows
+        self.assertIn("It has 50000 rows and 3 columns.", csv_preview)
+        self.assertEqual(utils.count_lines(self.data / "train.csv", chunk_size=1000, quoted=True), 50001)
+        with patch.object(utils, "preview_full_read_bytes", 0), patch.object(utils, "count_lines_exact_bytes", 0):
+            csv_preview = utils.preview_csv(self.data / "train.csv", "train.csv", simple=True)
+        self.assertIn("It has about 50000 rows and 3 columns.", csv_preview)
+
+        # unchanged files are not read again
+        with patch.object(pd, "read_csv", side_effect=AssertionError), patch.object(
+            pd, "read_parquet", side_effect=AssertionError
+        ):
+            self.assertEqual(DataFolderDescriptor().describe_folder(self.data, max_length=100000), full)
+
+        pd.DataFrame({"id": [1, 2]}).to_csv(self.data / "train.csv", index=False)
+        self.assertIn("It has 2 rows and 1 columns.", DataFolderDescriptor().describe_folder(self.data))
+
+    def test_tree_walker_and_manifest(self):
+        images = self.data / "images"
+        images.mkdir()
+        for i in range(30):
+            (images / f"{i:03}.{'png' if i % 10 else 'jpg'}").write_bytes(b"x" * i)
+        generator = utils.FileTreeGenerator(use_manifest=True)
+        tree = generator.generate_tree(self.data)
+        self.assertIn(
+            "│   ├── 000.jpg (0 Bytes)\n│   ├── 001.png (1 Byte)\n│   ├── ... (+28 more files: 26 .png, 2 .jpg)", tree
+        )
+        self.assertIn("├── train.parquet", tree)
+        self.assertEqual(utils.FileTreeGenerator(max_lines=3).generate_tree(self.data).count("\n"), 3)
+
+        # unchanged folders are not scanned again
+        with patch.object(utils.os, "scandir", side_effect=AssertionError):
+            self.assertEqual(utils.FileTreeGenerator(use_manifest=True).generate_tree(self.data), tree)
+        (images / "new.jpg").write_bytes(b"")
+        tree = utils.FileTreeGenerator(use_manifest=True).generate_tree(self.data)
+        self.assertIn("+29 more files: 26 .png, 3 .jpg", tree)
+
+
+if __name__ == "__main__":
+    unittest.main()
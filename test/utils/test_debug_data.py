@@ -0,0 +1,102 @@
+import tempfile
+import time
+import tracemalloc
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.scenarios.data_science.debug.data import (
+    DataHandler,
+    DefaultSampler,
+    GenericDataHandler,
+    RandDataReducer,
+    UniqueIDDataReducer,
+    sample_data_file,
+)
+
+
+def make_table(n_rows: int, n_labels: int = 20) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n_rows),
+            "text": rng.choice(["lorem ipsum dolor", "sit amet", "consectetur adipiscing elit"], n_rows),
+            "value": rng.random(n_rows),
+            "label": rng.choice([f"class_{i}" for i in range(n_labels)], n_rows),
+        }
+    )
+
+
+@pytest.mark.offline
+class StreamingSampleTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reducers_keep_labels_and_sizes(self):
+        df = make_table(200_000, n_labels=300)
+        handler = GenericDataHandler()
+        for suffix in [".csv", ".jsonl", ".parquet"]:
+            file = self.path / f"train{suffix}"
+            handler.dump(df, file)
+            sampled = UniqueIDDataReducer(min_frac=0.01).reduce_stream(handler.iter_chunks(file, chunk_rows=30_000))
+            self.assertEqual(set(sampled["label"]), set(df["label"]))
+            self.assertEqual(len(sampled), len(UniqueIDDataReducer(min_frac=0.01).reduce(df)))
+            self.assertTrue(sampled["id"].is_monotonic_increasing)
+            self.assertEqual(list(sampled.columns), list(df.columns))
+
+        # unique ids are no labels: plain random sample
+        chunks = (df[["id", "value"]].iloc[i : i + 30_000] for i in range(0, len(df), 30_000))
+        sampled = UniqueIDDataReducer(min_frac=0.01).reduce_stream(chunks)
+        self.assertEqual(len(sampled), 2000)
+        self.assertEqual(len(RandDataReducer(min_num=5).reduce_stream([df.iloc[:3], df.iloc[3:4]])), 4)
+
+    def test_handler_without_chunks(self):
+        class CsvHandler(DataHandler):
+            def load(self, path) -> pd.DataFrame:
+                return pd.read_csv(path)
+
+            def dump(self, df: pd.DataFrame, path):
+                df.to_csv(path, index=False)
+
+        # the handlers which can not read in chunks load the whole file
+        make_table(1000).to_csv(self.path / "train.csv", index=False)
+        sampled, error = sample_data_file(
+            CsvHandler(), RandDataReducer(min_frac=0.1), self.path / "train.csv", self.path / "sample.csv", 0
+        )
+        self.assertIsNone(error)
+        self.assertEqual(len(sampled), 100)
+        self.assertEqual(len(pd.read_csv(self.path / "sample.csv")), 100)
+
+    def test_memory_and_time_on_large_file(self):
+        data_folder, n_rows = self.path / "data", 1_000_000
+        data_folder.mkdir()
+        make_table(n_rows).to_csv(data_folder / "train.csv", index=False)
+        size = (data_folder / "train.csv").stat().st_size
+
+        for name, stream_min_bytes in [("eager", size + 1), ("streaming", 0)]:
+            sample_folder = self.path / name
+            sampler = DefaultSampler(data_folder, sample_folder, UniqueIDDataReducer(min_frac=0.01))
+            sampler.stream_min_bytes, sampler.n_jobs = stream_min_bytes, 1
+            tracemalloc.start()
+            begin = time.perf_counter()
+            sampler.sample()
+            elapsed = time.perf_counter() - begin
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name} sampling of {size / 2**20:.0f}MiB: {elapsed:.2f}s, peak memory {peak / 2**20:.0f}MiB")
+            sampled = pd.read_csv(sample_folder / "train.csv")
+            self.assertEqual(len(sampled), n_rows // 100)
+            if name == "eager":
+                eager_peak = peak
+        self.assertLess(peak, eager_peak / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import stat
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.utils.env import LocalConf, LocalEnv
+
+# like a container running as root with a strict umask: the new and the modified files are not writable by others
+ENTRY = (
+    f'{sys.executable} -c "import os; os.umask(0o077); open(\\"new.txt\\", \\"w\\").close(); '
+    'os.makedirs(\\"out/sub\\"); open(\\"out/sub/model.pkl\\", \\"w\\").close(); '
+    'os.chmod(\\"old_0.txt\\", 0o600); open(\\"old_0.txt\\", \\"a\\").write(\\"x\\")"'
+)
+
+
+def mode(path: Path) -> int:
+    return stat.S_IMODE(path.lstat().st_mode)
+
+
+@pytest.mark.offline
+class PermissionFixTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_entry(self, permission_fix: str, n_old_files: int) -> float:
+        workspace = self.path / permission_fix
+        (workspace / "old").mkdir(parents=True)
+        for i in range(n_old_files):
+            (workspace / "old" / f"{i}.txt").touch(mode=0o600)
+        (workspace / "old_0.txt").touch(mode=0o644)
+        time.sleep(1.1)  # the old files are older than the marker, which is backdated by a second
+        conf = LocalConf(default_entry="", enable_cache=False, live_output=False, permission_fix=permission_fix)
+        result = LocalEnv(conf).run(ENTRY, str(workspace))
+        self.assertEqual(result.exit_code, 0, result.stdout)
+        return result.running_time
+
+    def test_only_the_files_of_the_run_are_fixed(self):
+        timings = {name: self.run_entry(name, n_old_files=5000) for name in ["chmod", "newer", "none"]}
+        print(", ".join(f"{name}: {seconds:.2f}s" for name, seconds in timings.items()))
+
+        for name in ["chmod", "newer"]:
+            workspace = self.path / name
+            for rel in ["new.txt", "out", "out/sub", "out/sub/model.pkl", "old_0.txt"]:
+                self.assertEqual(mode(workspace / rel), 0o777, f"{name}: {rel}")
+        # the files which the run did not touch are left alone
+        self.assertEqual(mode(self.path / "newer" / "old" / "1.txt"), 0o600)
+        self.assertEqual(mode(self.path / "chmod" / "old" / "1.txt"), 0o777)
+        self.assertEqual(mode(self.path / "none" / "new.txt"), 0o600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+TEMPLATES = Path(__file__).parents[2] / "rdagent/scenarios/qlib/experiment"
+
+
+def load_template_module():
+    spec = importlib.util.spec_from_file_location("feature_cache", TEMPLATES / "factor_template" / "feature_cache.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.offline
+class FeatureCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        (self.path / "provider" / "calendars").mkdir(parents=True)
+        (self.path / "provider" / "calendars" / "day.txt").write_text("2020-01-01\n2020-01-02\n")
+        self.fc = load_template_module()
+        # the data version is read from the folders of this provider
+        config = SimpleNamespace(dpm=SimpleNamespace(get_data_uri=lambda: self.path / "provider"))
+        self.patches = [
+            patch.dict("os.environ", {"FEATURE_CACHE_DIR": str(self.path / "cache")}),
+            patch.object(self.fc, "C", config),
+            patch.object(self.fc, "STATS_FILE", str(self.path / "stats.jsonl")),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_hit_and_invalidation(self):
+        calls = []
+
+        class FeatureLoader(self.fc.DataLoader):
+            def load(self, instruments, start_time=None, end_time=None):
+                calls.append(instruments)
+                index = pd.MultiIndex.from_product([["A", "B"], pd.date_range("2020-01-01", periods=2)])
+                return pd.DataFrame(np.arange(8.0).reshape(4, 2), index=index, columns=["f1", "f2"])
+
+        def load() -> pd.DataFrame:
+            return self.fc.CachedDataLoader(loader=FeatureLoader()).load("csi300", "2020-01-01", "2020-01-02")
+
+        expected = load()
+        cached = load()
+        self.assertEqual(len(calls), 1)
+        pd.testing.assert_frame_equal(cached, expected)
+        # the frame maps the cache copy-on-write: changing it does not change the cache
+        cached.iloc[0, 0] = -1.0
+        pd.testing.assert_frame_equal(load(), expected)
+
+        # an update of the provider data is a new cache entry
+        (self.path / "provider" / "calendars" / "day.txt").write_text("2020-01-01\n2020-01-02\n2020-01-03\n")
+        load()
+        self.assertEqual(len(calls), 2)
+        stats = [json.loads(line) for line in (self.path / "stats.jsonl").read_text().splitlines()]
+        self.assertEqual([s["hit"] for s in stats], [False, True, True, False])
+
+        # the factor and the model templates ship the same module
+        self.assertEqual(
+            (TEMPLATES / "factor_template" / "feature_cache.py").read_text(),
+            (TEMPLATES / "model_template" / "feature_cache.py").read_text(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
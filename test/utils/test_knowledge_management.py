@@ -0,0 +1,451 @@
+import pickle
+import random
+import tempfile
+import time
+import unittest
+from collections import deque
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from scipy.spatial.distance import cosine
+
+from rdagent.components.coder.CoSTEER.knowledge_management import (
+    CoSTEERKnowledgeBaseV2,
+)
+from rdagent.components.knowledge_management.ann_index import IVFIndex
+from rdagent.components.knowledge_management.cluster import normalize_rows
+from rdagent.components.knowledge_management.graph import UndirectedGraph, UndirectedNode
+from rdagent.components.knowledge_management.vector_base import (
+    Document,
+    PDVectorBase,
+)
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.log import rdagent_logger as logger
+
+
+class FakeEmbeddingBackend:
+    """Deterministic embeddings so that the knowledge bases can be tested without an LLM service."""
+
+    dim = 16
+    n_calls = 0
+
+    def create_embedding(self, input_content):
+        FakeEmbeddingBackend.n_calls += 1
+        contents = [input_content] if isinstance(input_content, str) else input_content
+        embeddings = [
+            np.random.default_rng(abs(hash(c)) % (2**32)).normal(size=self.dim).tolist() for c in contents
+        ]
+        return embeddings[0] if isinstance(input_content, str) else embeddings
+
+
+@pytest.mark.offline
+@patch("rdagent.components.knowledge_management.vector_base.APIBackend", FakeEmbeddingBackend)
+class VectorBaseTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = FakeEmbeddingBackend()
+        self.contents = [f"content {i}" for i in range(200)]
+        self.docs = [
+            Document(content=c, label="even" if i % 2 == 0 else "odd", embedding=self.backend.create_embedding(c))
+            for i, c in enumerate(self.contents)
+        ]
+
+    def brute_force(self, query, labels=None, threshold=0.0, topk=None):
+        q = self.backend.create_embedding(query)
+        scored = [
+            (1 - cosine(d.embedding, q), d.id) for d in self.docs if labels is None or d.label in labels
+        ]
+        scored = sorted([s for s in scored if s[0] > threshold], key=lambda x: -x[0])
+        return [doc_id for _, doc_id in scored[:topk]]
+
+    def test_search_matches_brute_force(self):
+        vb = PDVectorBase()
+        for doc in self.docs[:50]:
+            vb.add(doc)
+        vb.add(self.docs[50:])
+        self.assertEqual(vb.shape()[0], 200)
+        for query, labels, threshold, topk in [
+            ("content 3", None, 0.0, 5),
+            ("something else", ["odd"], 0.1, 10),
+            ("content 8", ["even"], -1.0, None),
+        ]:
+            docs, scores = vb.search(query, topk_k=topk, similarity_threshold=threshold, constraint_labels=labels)
+            self.assertEqual([d.id for d in docs], self.brute_force(query, labels, threshold, topk))
+            self.assertTrue(all(a >= b for a, b in zip(scores, scores[1:])))
+        self.assertEqual(vb.search("content 3", topk_k=1)[0][0].content, "content 3")
+
+        batch = vb.batch_search(["content 3", "content 4"], topk_k=1)
+        self.assertEqual([res[0][0].content for res in batch], ["content 3", "content 4"])
+
+    def test_persistence_and_compatibility(self):
+        vb = PDVectorBase()
+        vb.add(self.docs)
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp) / "vb"
+            vb.path = folder
+            vb.dump()
+            loaded = PDVectorBase(folder)
+            self.assertEqual(loaded.shape(), vb.shape())
+            self.assertEqual(loaded.search("content 7", topk_k=1)[0][0].content, "content 7")
+
+            # pickles of the DataFrame-based implementation only contain `vector_df`
+            restored = PDVectorBase.__new__(PDVectorBase)
+            restored.__setstate__({"path": None, "vector_df": vb.vector_df})
+            self.assertEqual(restored.search("content 9", topk_k=1)[0][0].content, "content 9")
+            self.assertEqual(pickle.loads(pickle.dumps(restored)).shape(), vb.shape())
+
+            vb.vector_df.to_pickle(Path(tmp) / "vector_df.pkl")
+            self.assertEqual(len(PDVectorBase(Path(tmp) / "vector_df.pkl")), 200)
+
+    def test_approximate_search(self):
+        vb = PDVectorBase()
+        vb.add(self.docs)
+        with patch.object(RD_AGENT_SETTINGS, "knowledge_ann_min_size", 100), patch.object(
+            RD_AGENT_SETTINGS, "knowledge_ann_nprobe", 1000
+        ):
+            # probing every list makes the approximate search exact
+            docs, _ = vb.search("content 3", topk_k=5)
+            self.assertEqual([d.id for d in docs], self.brute_force("content 3", topk=5))
+            self.assertIsNotNone(vb._ann)
+            docs, _ = vb.search("content 8", topk_k=3, constraint_labels=["even"])
+            self.assertEqual([d.id for d in docs], self.brute_force("content 8", ["even"], topk=3))
+
+            vb.add(Document(content="new content", embedding=self.backend.create_embedding("new content")))
+            self.assertEqual(len(vb._ann), 201)
+            self.assertEqual(vb.search("new content", topk_k=1)[0][0].content, "new content")
+            with tempfile.TemporaryDirectory() as tmp:
+                vb.path = Path(tmp) / "vb"
+                vb.dump()
+                self.assertEqual(len(PDVectorBase(vb.path)._ann), 201)
+
+        # below the threshold the exact search is used
+        with patch.object(RD_AGENT_SETTINGS, "knowledge_ann_min_size", 1000):
+            small = PDVectorBase()
+            small.add(self.docs)
+            small.search("content 3", topk_k=5)
+            self.assertIsNone(small._ann)
+
+
+@pytest.mark.offline
+class IVFIndexTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        centers = normalize_rows(rng.normal(size=(200, 32)))
+        self.x = normalize_rows(centers[rng.integers(200, size=20000)] + 0.1 * rng.normal(size=(20000, 32)))
+        self.queries = normalize_rows(self.x[rng.choice(20000, 100)] + 0.05 * rng.normal(size=(100, 32)))
+        start = time.perf_counter()
+        self.truth = [np.argsort(-(self.x @ q))[:10] for q in self.queries]
+        self.exact_ms = (time.perf_counter() - start) / len(self.queries) * 1e3
+
+    def recall(self, index: IVFIndex, nprobe: int) -> float:
+        start = time.perf_counter()
+        results = [index.search(q, 10, nprobe=nprobe, vectors=self.x)[0] for q in self.queries]
+        elapsed_ms = (time.perf_counter() - start) / len(self.queries) * 1e3
+        recall = float(np.mean([len(set(r) & set(t)) / 10 for r, t in zip(results, self.truth)]))
+        print(
+            f"pq_m={index.pq_m} nprobe={nprobe}: recall@10={recall:.3f} "
+            f"{elapsed_ms:.3f}ms/query (exact {self.exact_ms:.3f}ms)"
+        )
+        return recall
+
+    def test_recall(self):
+        flat = IVFIndex()
+        flat.train(self.x)
+        recalls = [self.recall(flat, nprobe) for nprobe in [1, 4, 16]]
+        self.assertTrue(recalls[0] <= recalls[1] <= recalls[2])
+        self.assertGreater(recalls[2], 0.95)
+
+        pq = IVFIndex(pq_m=8)
+        pq.train(self.x)
+        self.assertGreater(self.recall(pq, 16), 0.8)
+
+    def test_incremental_add_and_persistence(self):
+        index = IVFIndex(pq_m=8)
+        index.train(self.x[:10000])
+        index.add(self.x[10000:])
+        self.assertEqual(len(index), 20000)
+        self.assertGreater(self.recall(index, 16), 0.8)
+        with tempfile.TemporaryDirectory() as tmp:
+            index.save(Path(tmp) / "index.npz")
+            loaded = IVFIndex.load(Path(tmp) / "index.npz")
+        for q in self.queries[:5]:
+            np.testing.assert_array_equal(index.search(q, 10)[0], loaded.search(q, 10)[0])
+
+
+def reference_nodes_within_steps(graph, start_node, steps, constraint_labels=None, block=False):
+    """The original BFS over the neighbor sets, used as the reference for the adjacency-based traversal."""
+    visited = set()
+    queue = deque([(start_node, 0)])
+    result = []
+    while queue:
+        node, current_steps = queue.popleft()
+        if current_steps > steps:
+            break
+        if node not in visited:
+            visited.add(node)
+            result.append(node)
+            for neighbor in sorted(graph.get_node(node.id).neighbors, key=lambda x: x.content):
+                if neighbor not in visited and not (block and neighbor.label not in constraint_labels):
+                    queue.append((neighbor, current_steps + 1))
+    if constraint_labels:
+        result = [node for node in result if node.label in constraint_labels]
+    if start_node in result:
+        result.remove(start_node)
+    return result
+
+
+def build_costeer_like_graph(n_tasks: int, n_components: int = 50, seed: int = 0) -> UndirectedGraph:
+    """
+    A graph shaped like the CoSTEER V2 knowledge graph: task descriptions linked to components, and chains of
+    task traces ending with a successful implementation, with error nodes shared between traces.
+    """
+    rng = random.Random(seed)
+    graph = UndirectedGraph()
+    components = [UndirectedNode(content=f"component {i}", label="component") for i in range(n_components)]
+    errors = [UndirectedNode(content=f"error {i}", label="error") for i in range(n_components)]
+    for t in range(n_tasks):
+        task = UndirectedNode(content=f"task {t}", label="task_description")
+        graph.add_nodes(task, rng.sample(components, 3))
+        previous = task
+        for step in range(rng.randint(1, 3)):
+            trace = UndirectedNode(content=f"trace {t}-{step}", label="task_trace")
+            graph.add_nodes(trace, [previous, rng.choice(errors)])
+            previous = trace
+        graph.add_node(UndirectedNode(content=f"success {t}", label="task_success_implement"), previous)
+    return graph
+
+
+@pytest.mark.offline
+@patch("rdagent.components.knowledge_management.vector_base.APIBackend", FakeEmbeddingBackend)
+@patch("rdagent.components.knowledge_management.graph.APIBackend", FakeEmbeddingBackend)
+class GraphTest(unittest.TestCase):
+    def build_graph(self) -> UndirectedGraph:
+        graph = UndirectedGraph()
+        for i in range(20):
+            component = UndirectedNode(content=f"component {i % 4}", label="component")
+            graph.add_nodes(node=UndirectedNode(content=f"task {i}", label="task"), neighbors=[component])
+        return graph
+
+    def test_deferred_embedding_and_indexes(self):
+        FakeEmbeddingBackend.n_calls = 0
+        graph = self.build_graph()
+        self.assertEqual(graph.size(), 24)
+        self.assertEqual(FakeEmbeddingBackend.n_calls, 0)
+        self.assertEqual(graph.find_node("component 1", "component").content, "component 1")
+        self.assertIsNone(graph.find_node("component 1", "task"))
+        self.assertEqual(graph.get_node_by_content("task 3").label, "task")
+        self.assertIsNone(graph.get_node_by_content("task 30"))
+        self.assertEqual(len(graph.get_all_nodes_by_label_list(["component"])), 4)
+        self.assertEqual(len(graph.get_all_nodes_by_label_list(["component", "task"])), 24)
+
+        # all the pending nodes are embedded in bulk (16 contents per call) before searching
+        self.assertEqual(graph.semantic_search("task 5", topk_k=1)[0].content, "task 5")
+        self.assertEqual(FakeEmbeddingBackend.n_calls, 2 + 1)
+        self.assertEqual(len(graph.vector_base), 24)
+
+    def test_load_rebuilds_indexes(self):
+        graph = self.build_graph()
+        with tempfile.TemporaryDirectory() as tmp:
+            graph.path = Path(tmp) / "graph.pkl"
+            graph.dump()
+            # pickles written before the indexes existed only contain the nodes and the vector base
+            state = pickle.loads(graph.path.read_bytes())
+            for key in ["_content_label_index", "_content_index", "_label_index", "_pending_nodes"]:
+                state.pop(key)
+            graph.path.write_bytes(pickle.dumps(state))
+            loaded = UndirectedGraph(graph.path)
+        self.assertEqual(loaded.find_node("task 7", "task").id, graph.find_node("task 7", "task").id)
+        self.assertEqual(len(loaded.get_all_nodes_by_label_list(["task"])), 20)
+        self.assertEqual(len(pickle.loads(pickle.dumps(loaded)).get_all_nodes_by_label_list(["task"])), 20)
+
+    def test_traversal_matches_reference(self):
+        graph = build_costeer_like_graph(300)
+        # the first traversal builds the adjacency, the next edges go to the delta buffer
+        graph.get_nodes_within_steps(graph.find_node("task 0", "task_description"))
+        for t in range(300, 330):
+            graph.add_node(
+                UndirectedNode(content=f"task {t}", label="task_description"),
+                graph.find_node(f"component {t % 50}", "component"),
+            )
+        rng = random.Random(1)
+        for start in rng.sample(graph.get_all_nodes(), 50):
+            for steps, labels, block in [
+                (1, None, False),
+                (2, ["task_description"], False),
+                (50, ["task_trace", "task_success_implement", "task_description"], True),
+                (50, ["task_success_implement"], True),
+            ]:
+                self.assertEqual(
+                    graph.get_nodes_within_steps(start, steps=steps, constraint_labels=labels, block=block),
+                    reference_nodes_within_steps(graph, start, steps, constraint_labels=labels, block=block),
+                )
+        components = graph.get_all_nodes_by_label_list(["component"])[:3]
+        reference = reference_nodes_within_steps(graph, components[0], 1, ["task_description"])
+        for component in components[1:]:
+            other = reference_nodes_within_steps(graph, component, 1, ["task_description"])
+            reference = [node for node in reference if node in other]
+        self.assertEqual(graph.get_nodes_intersection(components, constraint_labels=["task_description"]), reference)
+
+    def test_component_query_benchmark(self):
+        """Latency of the graph part of CoSTEER V2 `component_query`, against the original BFS."""
+
+        def component_query(graph, within_steps):
+            components = graph.get_all_nodes_by_label_list(["component"])[:3]
+            start = time.perf_counter()
+            first = within_steps(graph, components[0], 1, ["task_description"])
+            second = set(within_steps(graph, components[1], 1, ["task_description"]))
+            task_nodes = [node for node in first if node in second]
+            for component in components:
+                task_nodes += within_steps(graph, component, 1, ["task_description"], True)[::-1][:5]
+            for node in task_nodes:
+                within_steps(graph, node, 50, ["task_success_implement"], True)
+            return time.perf_counter() - start
+
+        def indexed(graph, node, steps, labels, block=False):
+            return graph.get_nodes_within_steps(node, steps=steps, constraint_labels=labels, block=block)
+
+        for n_tasks in [2000, 20000]:
+            graph = build_costeer_like_graph(n_tasks)
+            component_query(graph, indexed)  # build the adjacency
+            print(
+                f"component_query graph part: {graph.size()} nodes, "
+                f"{component_query(graph, indexed) * 1e3:.1f}ms "
+                f"(neighbor set BFS {component_query(graph, reference_nodes_within_steps) * 1e3:.1f}ms)"
+            )
+
+@pytest.mark.offline
+@patch("rdagent.components.coder.CoSTEER.knowledge_management.APIBackend", FakeEmbeddingBackend)
+@patch("rdagent.components.knowledge_management.vector_base.APIBackend", FakeEmbeddingBackend)
+@patch("rdagent.components.knowledge_management.graph.APIBackend", FakeEmbeddingBackend)
+class CoSTEERRetrievalCacheTest(unittest.TestCase):
+    def test_similar_success_tasks(self):
+        kb = CoSTEERKnowledgeBaseV2()
+        backend = FakeEmbeddingBackend()
+        for i in range(30):
+            kb.success_task_to_knowledge_dict[f"task {i}"] = i
+        FakeEmbeddingBackend.n_calls = 0
+        similar = kb.similar_success_tasks("task 3")
+        query = backend.create_embedding("task 3")
+        expected = sorted(kb.success_task_to_knowledge_dict, key=lambda t: cosine(backend.create_embedding(t), query))
+        self.assertEqual(similar, expected)
+
+        # only the new successful task and the new query are embedded, in one call
+        kb.success_task_to_knowledge_dict["task 30"] = 30
+        FakeEmbeddingBackend.n_calls = 0
+        self.assertEqual(kb.similar_success_tasks("task 30")[0], "task 30")
+        self.assertEqual(FakeEmbeddingBackend.n_calls, 1)
+        self.assertEqual(kb.similar_success_tasks("task 30")[0], "task 30")
+        self.assertEqual(FakeEmbeddingBackend.n_calls, 1)
+
+    def test_graph_query_invalidation(self):
+        kb = CoSTEERKnowledgeBaseV2()
+        component = UndirectedNode(content="component", label="component")
+        kb.graph.add_nodes(UndirectedNode(content="task 0", label="task_description"), [component])
+        query = {"node": component, "step": 1, "constraint_labels": ["task_description"], "block": True}
+        self.assertEqual(len(kb.graph_query_by_node(**query)), 1)
+        kb.graph_query_by_node(**query).append(component)  # callers may modify the returned list
+        self.assertEqual(len(kb.graph_query_by_node(**query)), 1)
+        self.assertEqual((kb.retrieval_cache.hits, kb.retrieval_cache.misses), (2, 1))
+
+        kb.graph.add_nodes(UndirectedNode(content="task 1", label="task_description"), [component])
+        self.assertEqual(len(kb.graph_query_by_node(**query)), 2)
+        self.assertEqual(kb.retrieval_cache.misses, 2)
+
+        restored = pickle.loads(pickle.dumps(kb))
+        del restored.__dict__["retrieval_cache"]
+        restored.__setstate__(restored.__dict__.copy())
+        self.assertEqual(len(restored.graph_query_by_node(**query)), 2)
+
+
+@pytest.mark.offline
+@patch("rdagent.components.coder.CoSTEER.knowledge_management.APIBackend", FakeEmbeddingBackend)
+@patch("rdagent.components.knowledge_management.vector_base.APIBackend", FakeEmbeddingBackend)
+@patch("rdagent.components.knowledge_management.graph.APIBackend", FakeEmbeddingBackend)
+class GraphStoreTest(unittest.TestCase):
+    def assert_same_graph(self, graph: UndirectedGraph, loaded: UndirectedGraph) -> None:
+        self.assertEqual(loaded.size(), graph.size())
+        self.assertEqual(loaded.version, graph.version)
+        for node_id, node in graph.nodes.items():
+            other = loaded.get_node(node_id)
+            self.assertEqual((other.content, other.label), (node.content, node.label))
+            self.assertEqual({n.id for n in other.neighbors}, {n.id for n in node.neighbors})
+        self.assertEqual(
+            [n.id for n in loaded.semantic_search("task 5", topk_k=3)],
+            [n.id for n in graph.semantic_search("task 5", topk_k=3)],
+        )
+
+    def test_incremental_save_and_migration(self):
+        # whole-object pickles recurse through the neighbor sets, so the pickled graph is kept small
+        graph = build_costeer_like_graph(10)
+        with tempfile.TemporaryDirectory() as tmp:
+            # migrate a pickled graph to the folder format
+            graph.path = Path(tmp) / "graph.pkl"
+            graph.dump()
+            migrated = UndirectedGraph(graph.path)
+            migrated.path = Path(tmp) / "graph"
+            migrated.dump()
+            loaded = UndirectedGraph(migrated.path)
+            self.assert_same_graph(graph, loaded)
+
+            loaded.add_node(
+                UndirectedNode(content="task 100", label="task_description"),
+                loaded.find_node("component 0", "component"),
+            )
+            loaded.dump()
+            self.assertEqual(len(list((migrated.path / "nodes").iterdir())), 2)
+            reloaded = UndirectedGraph(migrated.path)
+            self.assert_same_graph(loaded, reloaded)
+            self.assertIsInstance(reloaded.vector_base._matrix, np.memmap)
+
+    def test_costeer_knowledge_base(self):
+        kb = CoSTEERKnowledgeBaseV2()
+        component = UndirectedNode(content="component", label="component")
+        kb.graph.add_nodes(UndirectedNode(content="task 0", label="task_description"), [component])
+        kb.task_to_component_nodes["task 0"] = [component]
+        kb.success_task_to_knowledge_dict["task 0"] = "knowledge"
+        with tempfile.TemporaryDirectory() as tmp:
+            kb.path = Path(tmp) / "kb"
+            kb.dump()
+            loaded = CoSTEERKnowledgeBaseV2(path=kb.path)
+        self.assertEqual(loaded.success_task_to_knowledge_dict, {"task 0": "knowledge"})
+        # the nodes referenced by the knowledge base are the nodes of the loaded graph
+        self.assertIs(loaded.task_to_component_nodes["task 0"][0], loaded.graph.get_node(component.id))
+
+    def test_store_benchmark(self):
+        # the graphs of long runs are too deep to be dill-pickled; the store saves them incrementally
+        timings = {}
+        for n_tasks in [30, 300, 3000]:
+            with patch.object(FakeEmbeddingBackend, "dim", 256):
+                graph = build_costeer_like_graph(n_tasks)
+                graph.flush()
+            with tempfile.TemporaryDirectory() as tmp, self.subTest(n_tasks=n_tasks):
+                graph.path = Path(tmp) / "graph"
+                start = time.perf_counter()
+                graph.dump()
+                full_save = time.perf_counter() - start
+                with patch.object(FakeEmbeddingBackend, "dim", 256):
+                    for t in range(10):
+                        graph.add_node(UndirectedNode(content=f"new task {t}", label="task_description"))
+                    graph.flush()
+                start = time.perf_counter()
+                graph.dump()
+                incremental_save = time.perf_counter() - start
+                start = time.perf_counter()
+                loaded = UndirectedGraph(graph.path)
+                load = time.perf_counter() - start
+                timings[graph.size()] = {"full save": full_save, "incremental save": incremental_save, "load": load}
+
+                # the second save only appended the new nodes
+                parts = sorted(p.name for p in (graph.path / "nodes").iterdir())
+                self.assertEqual(parts, ["00000.parquet", "00001.parquet"])
+                self.assertEqual(loaded._id_list, graph._id_list)
+                self.assertEqual(loaded.vector_base._matrix.shape, (graph.size(), 256))
+        logger.info(f"Graph store timings (seconds) by number of nodes: {timings}")
+        # appending 10 nodes does not rewrite the 12000 stored ones (about 50 times faster here)
+        largest = timings[max(timings)]
+        self.assertLess(largest["incremental save"], largest["full save"] / 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
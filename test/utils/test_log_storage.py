@@ -0,0 +1,148 @@
+import json
+import pickle
+import tempfile
+import time
+import tracemalloc
+import unittest
+import unittest.mock
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from rdagent.log.storage import (
+    FileStorage,
+    SegmentStorage,
+    convert_file_storage,
+    open_storage,
+)
+
+
+def fill(storage, n: int = 20) -> list[datetime]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    times = [start + timedelta(seconds=i) for i in range(n)]
+    for i, t in enumerate(times):
+        storage.log({"i": i, "data": "x" * 1000}, tag=f"Loop_{i % 3}.running.123-456", timestamp=t)
+    storage.log("plain text", tag="Loop_0.running.123-456", timestamp=start, save_type="text")
+    return times
+
+
+def eager_iter_msg(path: Path) -> list[tuple]:
+    """The previous `FileStorage.iter_msg`: unpickle every message, then sort."""
+    msgs = []
+    for file in path.glob("**/*.pkl"):
+        with file.open("rb") as f:
+            content = pickle.load(f)
+        timestamp = datetime.strptime(file.stem, "%Y-%m-%d_%H-%M-%S-%f").replace(tzinfo=timezone.utc)
+        msgs.append((".".join(file.relative_to(path).parent.parts[:-1]), file.parent.name, timestamp, content))
+    msgs.sort(key=lambda x: x[2])
+    return msgs
+
+
+def summary(storage, **kwargs) -> list[tuple]:
+    return [(m.tag, m.pid_trace, m.timestamp, m.content) for m in storage.iter_msg(**kwargs)]
+
+
+@pytest.mark.offline
+class SegmentStorageTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_same_messages_as_file_storage(self):
+        file_storage, seg_storage = FileStorage(self.path / "file"), SegmentStorage(self.path / "seg")
+        times = fill(file_storage)
+        fill(seg_storage)
+        self.assertIsInstance(open_storage(self.path / "seg"), SegmentStorage)
+        self.assertIsInstance(open_storage(self.path / "file"), FileStorage)
+        for kwargs in [{}, {"tag": "Loop_1"}, {"tag": "running"}, {"pattern": "**/Loop_2/running/*/*.pkl"}]:
+            expected = summary(file_storage, **kwargs)
+            self.assertTrue(expected)
+            self.assertEqual(summary(seg_storage, **kwargs), expected)
+
+        converted = self.path / "converted"
+        self.assertEqual(convert_file_storage(self.path / "file", converted), 21)
+        self.assertEqual(summary(open_storage(converted)), summary(file_storage))
+
+        file_storage.truncate(times[9])
+        seg_storage.truncate(times[9])
+        self.assertEqual(len(summary(seg_storage)), 10)
+        self.assertEqual(summary(seg_storage), summary(file_storage))
+
+    def test_torn_tail_and_rotation(self):
+        storage = SegmentStorage(self.path)
+        fill(storage)
+        storage.close()
+        (segment,) = storage._segments()
+        index = segment.with_suffix(SegmentStorage.INDEX_SUFFIX)
+        lines = index.read_bytes().splitlines(keepends=True)
+        # the last index lines were lost and the last record was partially written
+        index.write_bytes(b"".join(lines[:5]) + lines[5][:10])
+        with segment.open("r+b") as f:
+            f.truncate(json.loads(lines[19])["off"] + 10)
+        self.assertEqual([m.content["i"] for m in storage.iter_msg()], list(range(19)))
+
+        # new records go to a new segment, which is rotated once it is full
+        storage.log({"i": 19}, tag="Loop_1.running.123-456", timestamp=datetime(2026, 1, 1, tzinfo=timezone.utc))
+        with unittest.mock.patch.object(SegmentStorage, "_max_bytes", return_value=1):
+            storage.log("a", tag="a.1")
+            storage.log("b", tag="a.1")
+        self.assertEqual(len(storage._segments()), 4)
+        self.assertEqual([m.content["i"] for m in storage.iter_msg(tag="Loop_1")], [1, 4, 7, 10, 13, 16, 19])
+
+
+@pytest.mark.offline
+class IterMsgTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_filters_and_incremental_index(self):
+        for storage in [FileStorage(self.path / "file"), SegmentStorage(self.path / "seg")]:
+            times = fill(storage)
+            if isinstance(storage, FileStorage):
+                self.assertEqual(summary(storage), eager_iter_msg(storage.path))
+            msgs = list(storage.iter_msg(loop_id=1, start=times[4], end=times[13]))
+            self.assertEqual([m.content["i"] for m in msgs], [4, 7, 10])
+            self.assertEqual(msgs[0].tag, "Loop_1.running")
+
+            storage.log({"i": 20}, tag="Loop_1.coding.123-456", timestamp=times[-1] + timedelta(seconds=1))
+            self.assertEqual([m.content["i"] for m in storage.iter_msg(loop_id=1)][-2:], [19, 20])
+
+    def test_time_to_first_message(self):
+        n = 10000
+        storage = FileStorage(self.path)
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for i in range(n):
+            storage.log(
+                {"i": i, "data": "x" * 500},
+                tag=f"Loop_{i // 100}.{['direct_exp_gen', 'coding', 'running'][i % 3]}.{i % 7}",
+                timestamp=start + timedelta(milliseconds=i),
+            )
+
+        for name, run in [
+            ("eager", lambda: eager_iter_msg(self.path)[0]),
+            ("streaming", lambda: next(FileStorage(self.path).iter_msg()).content),
+        ]:
+            tracemalloc.start()
+            begin = time.perf_counter()
+            first = run()
+            elapsed = time.perf_counter() - begin
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name} iter_msg over {n} messages: first message {elapsed:.3f}s, peak memory {peak / 2**20:.1f}MiB")
+        self.assertEqual(first["i"], 0)
+
+        begin = time.perf_counter()
+        self.assertEqual(len(list(storage.iter_msg(loop_id=42))), 100)
+        print(f"indexed loop filter: {time.perf_counter() - begin:.3f}s")
+
+
+if __name__ == "__main__":
+    unittest.main()
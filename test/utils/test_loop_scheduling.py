@@ -0,0 +1,119 @@
+import asyncio
+import random
+import time
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.experiment import RunningInfo
+from rdagent.core.proposal import ExperimentFeedback
+from rdagent.scenarios.data_science.proposal.exp_gen.base import DSTrace
+from rdagent.scenarios.data_science.proposal.exp_gen.trace_scheduler import (
+    RoundRobinScheduler,
+    ShortestRuntimeScheduler,
+    UCBScheduler,
+)
+from rdagent.utils.workflow.loop import LoopBase, LoopMeta
+
+
+class FakeExp:
+    hypothesis = None
+
+    def __init__(self, running_time: float | None = None):
+        self.running_info = RunningInfo(running_time=running_time)
+
+
+class SimulatedLoop(LoopBase, metaclass=LoopMeta):
+    """The experiments of a trace are generated when a slot is free and the parent leaf is recorded."""
+
+    def __init__(self, scheduler, durations: list[float]):
+        super().__init__()
+        self.trace = DSTrace(scen=None)
+        self.scheduler = scheduler
+        self.durations = durations
+        self.dispatched: dict[int, float] = {}  # loop id -> time the experiment is generated
+        self.recorded: dict[int, float] = {}  # loop id -> time the experiment is recorded
+
+    async def direct_exp_gen(self, prev_out):
+        await self.wait_for_free_slot()
+        selection = await self.scheduler.next(self.trace, self)
+        self.dispatched[prev_out[self.LOOP_IDX_KEY]] = time.perf_counter()
+        return selection
+
+    async def running(self, prev_out):
+        await asyncio.sleep(self.durations[prev_out[self.LOOP_IDX_KEY]])
+
+    def record(self, prev_out):
+        li = prev_out[self.LOOP_IDX_KEY]
+        self.trace.set_current_selection(prev_out["direct_exp_gen"])
+        self.trace.sync_dag_parent_and_hist((FakeExp(), ExperimentFeedback("", decision=True)), li)
+        self.recorded[li] = time.perf_counter()
+
+    def dump(self, path):
+        pass
+
+
+@pytest.mark.offline
+class LoopSchedulingTest(unittest.TestCase):
+    def test_dispatch_latency(self):
+        rng = random.Random(0)
+        durations = [rng.uniform(0.05, 0.2) for _ in range(12)]
+        # 3 parallel loops, but only 2 traces: the 3rd slot waits until a leaf is recorded
+        loop = SimulatedLoop(RoundRobinScheduler(max_trace_num=2), durations)
+        with patch.object(RD_AGENT_SETTINGS, "step_semaphore", {"running": 3}), patch.object(
+            type(RD_AGENT_SETTINGS), "is_force_subproc", return_value=False
+        ), patch("rdagent.utils.workflow.loop.logger"):
+            begin = time.perf_counter()
+            asyncio.run(loop.run(loop_n=len(durations)))
+            elapsed = time.perf_counter() - begin
+
+        # the loops started after the first record wait for a leaf: they are dispatched as soon as one is recorded
+        latencies = [
+            dispatched - max(t for t in loop.recorded.values() if t <= dispatched)
+            for dispatched in loop.dispatched.values()
+            if dispatched >= min(loop.recorded.values())
+        ]
+        self.assertEqual(len(latencies), len(durations) - 2)
+        self.assertLess(max(latencies), 0.05)
+        self.assertEqual(len(loop.trace.hist), len(durations))
+        self.assertEqual(loop.trace.sub_trace_count, 2)
+        self.assertLess(elapsed, sum(durations) / 2 + 0.5)  # the 2 traces run in parallel
+
+    def test_policies(self):
+        trace = DSTrace(scen=None)
+        # trace 0: slow, 1 improvement out of 3; trace 1: fast, 2 improvements out of 2
+        for selection, running_time, decision in [
+            ((), 100, True),
+            ((), 10, True),
+            ((0,), 100, False),
+            ((1,), 10, True),
+            ((2,), 100, False),
+        ]:
+            trace.set_current_selection(selection)
+            trace.sync_dag_parent_and_hist((FakeExp(running_time), ExperimentFeedback("", decision=decision)), 0)
+        self.assertEqual(trace.get_leaves(), [3, 4])
+
+        def scheduler(cls):
+            """A scheduler which selected all the recorded nodes"""
+            scheduler = cls(2)
+            scheduler.rec_commit_idx = len(trace.hist)
+            return scheduler
+
+        self.assertEqual(scheduler(RoundRobinScheduler).select(trace), (3,))
+        self.assertEqual(scheduler(UCBScheduler).select(trace), (3,))
+        self.assertEqual(scheduler(ShortestRuntimeScheduler).select(trace), (3,))
+        trace.hist[3][0].running_info.running_time = 1000
+        self.assertEqual(scheduler(ShortestRuntimeScheduler).select(trace), (4,))
+
+        # the leaves being expanded are not selected again until they are recorded
+        scheduler = scheduler(RoundRobinScheduler)
+        self.assertEqual([scheduler.select(trace) for _ in range(3)], [(3,), (4,), None])
+        trace.set_current_selection((3,))
+        trace.sync_dag_parent_and_hist((FakeExp(), ExperimentFeedback("", decision=True)), 0)
+        self.assertEqual(scheduler.select(trace), (5,))
+
+
+if __name__ == "__main__":
+    unittest.main()
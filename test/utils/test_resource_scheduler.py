@@ -0,0 +1,159 @@
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from rdagent.utils.env import LocalConf, LocalEnv
+from rdagent.utils.resource_scheduler import (
+    ResourceLease,
+    ResourceRequest,
+    ResourceScheduler,
+    parse_memory_size,
+)
+
+
+class SimulatedHost:
+    """Record the peaks of the cores and of the memory used by the jobs running at the same time."""
+
+    def __init__(self) -> None:
+        self.running: dict[int, tuple[list[int], float]] = {}  # the cores and the memory of the running jobs
+        self.peak_cpus, self.peak_memory_mb, self.shared_cores = 0, 0.0, False
+        self.lock = threading.Lock()
+
+    def run(self, job: int, cpus: list[int], memory_mb: float, work: float, barrier=None) -> None:
+        with self.lock:
+            self.shared_cores |= any(set(cpus) & set(c) for c, _ in self.running.values())
+            self.running[job] = (cpus, memory_mb)
+            self.peak_cpus = max(self.peak_cpus, sum(len(c) for c, _ in self.running.values()))
+            self.peak_memory_mb = max(self.peak_memory_mb, sum(m for _, m in self.running.values()))
+        if barrier is not None:
+            barrier.wait()
+        time.sleep(work)
+        with self.lock:
+            del self.running[job]
+
+
+@pytest.mark.offline
+class ResourceSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def scheduler(self, **kwargs) -> ResourceScheduler:
+        kwargs = {"total_cpus": 4, "total_memory_mb": 8000, "poll_interval": 0.005, **kwargs}
+        return ResourceScheduler(self.path / "state.json", **kwargs)
+
+    def test_no_oversubscription(self):
+        n_jobs, request, work = 8, ResourceRequest(cpus=2, memory_mb=3000), 0.05
+        scheduler, errors = self.scheduler(), []
+        unscheduled, scheduled = SimulatedHost(), SimulatedHost()
+        barrier = threading.Barrier(n_jobs)
+
+        def job(i: int) -> None:
+            try:
+                # without the scheduler all the jobs run at once on the same cores
+                unscheduled.run(i, list(range(request.cpus)), request.memory_mb, 0, barrier=barrier)
+                with scheduler.acquire(request) as lease:
+                    self.assertEqual(len(lease.cpus), request.cpus)
+                    scheduled.run(i, lease.cpus, lease.memory_mb, work)
+            except BaseException as e:  # the exceptions of the threads would not fail the test
+                errors.append(e)
+
+        threads = [threading.Thread(target=job, args=(i,)) for i in range(n_jobs)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual((unscheduled.peak_cpus, unscheduled.peak_memory_mb), (16, 24000))
+        self.assertTrue(unscheduled.shared_cores)
+        # the admitted jobs never use more than the host has (at most 2 of them fit into the memory) nor share cores
+        self.assertLessEqual(scheduled.peak_cpus, 4)
+        self.assertLessEqual(scheduled.peak_memory_mb, 8000)
+        self.assertFalse(scheduled.shared_cores)
+
+    def test_large_request_is_not_starved(self):
+        scheduler = self.scheduler(max_bypass=2)
+        small = ResourceRequest(cpus=1)
+        with scheduler.acquire(small):  # the host is never idle, so the large request never fits while bypassed
+            admitted = []
+
+            def large() -> None:
+                with scheduler.acquire(ResourceRequest(cpus=4)):
+                    admitted.append("large")
+
+            thread = threading.Thread(target=large)
+            thread.start()
+            while not json.loads((self.path / "state.json").read_text())["queue"]:
+                time.sleep(0.005)
+            queued_small = []
+            for i in range(4):
+                # the small requests fit, but only the first `max_bypass` of them may go ahead of the large one
+                if scheduler._try_acquire(f"small-{i}", scheduler._clamp(small)) is not None:
+                    admitted.append(f"small-{i}")
+                else:
+                    queued_small.append(f"small-{i}")
+            self.assertEqual(admitted, ["small-0", "small-1"])
+            self.assertEqual(queued_small, ["small-2", "small-3"])
+            for lease_id in ["small-0", "small-1"]:
+                scheduler.release(ResourceLease(lease_id, [], 0, 0))
+        thread.join(timeout=10)
+        self.assertEqual(admitted[-1], "large")
+        for lease_id in queued_small:
+            scheduler._dequeue(lease_id)
+
+    def test_lease_is_released_between_retries(self):
+        scheduler = self.scheduler()
+        env = LocalEnv(LocalConf(default_entry="", enable_cache=False, retry_count=1, retry_wait_seconds=0))
+        held_while_waiting = []
+
+        def sleep(seconds: float) -> None:
+            held_while_waiting.append(json.loads((self.path / "state.json").read_text())["leases"])
+
+        with patch("rdagent.utils.env.get_resource_scheduler", return_value=scheduler), patch.object(
+            LocalEnv, "_run", side_effect=[RuntimeError("container failed"), ("done", 0)]
+        ), patch("rdagent.utils.env.time.sleep", side_effect=sleep):
+            result = env.run("entry", str(self.path))
+        self.assertEqual((result.stdout, held_while_waiting), ("done", [{}]))
+
+    def test_dead_leases_and_env_pinning(self):
+        scheduler = self.scheduler(total_cpus=2)
+        # a process which died while holding all the cores does not block the others
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        lease = {"pid": dead.pid, "cpus": [0, 1], "memory_mb": 0}
+        (self.path / "state.json").write_text(json.dumps({"leases": {"x": lease}}))
+        with scheduler.acquire(ResourceRequest(cpus=8, memory_mb=10**9)) as lease:
+            self.assertEqual((lease.cpus, lease.memory_mb), ([0, 1], 8000))
+
+        # the environment pins the run to its leased core: the last one, while the others are held
+        n_cpus = len(os.sched_getaffinity(0))
+        scheduler = self.scheduler(total_cpus=n_cpus)
+        env = LocalEnv(LocalConf(default_entry="", enable_cache=False, live_output=False, cpu_request=1))
+        entry = f'{sys.executable} -c "import os; print(sorted(os.sched_getaffinity(0)))"'
+        with patch("rdagent.utils.env.get_resource_scheduler", return_value=scheduler), contextlib.ExitStack() as stack:
+            if n_cpus > 1:
+                stack.enter_context(scheduler.acquire(ResourceRequest(cpus=n_cpus - 1)))
+            result = env.run(entry, str(self.path))
+        self.assertIn(f"[{n_cpus - 1}]", result.stdout)
+        self.assertGreaterEqual(result.queue_wait_time, 0)
+
+        self.assertEqual(parse_memory_size("48g"), 48 * 1024)
+        self.assertEqual(parse_memory_size("512m"), 512)
+        self.assertIsNone(parse_memory_size(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
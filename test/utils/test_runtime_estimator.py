@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.scenarios.data_science.dev.runtime_estimator import (
+    DebugProfile,
+    RuntimeEstimator,
+)
+
+STDOUT = """
+loading data...
+=== Start of Debug Information ===
+debug_time: 20.0
+estimated_time: 400.0
+sample_fraction: 0.1
+debug_epochs: 1
+full_epochs: 2
+=== End of Debug Information ===
+"""
+
+
+@pytest.mark.offline
+class RuntimeEstimatorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.estimator = RuntimeEstimator(Path(self.tmp.name) / "history.jsonl", min_history=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_scaling_and_calibration(self):
+        profile = DebugProfile.parse(STDOUT, code_md5="abc", wall_time=50.0, peak_memory_mb=1000.0)
+        self.assertEqual((profile.debug_time, profile.full_epochs), (20.0, 2.0))
+        self.assertIsNone(DebugProfile.parse("no debug information", code_md5="abc", wall_time=1.0))
+
+        # the 30s spent outside of training are kept, the training part is scaled by estimated_time / debug_time
+        estimate = self.estimator.estimate(profile)
+        self.assertEqual((estimate.time, estimate.memory_mb), (430.0, 1000.0))
+        # without an estimate printed: 1 / sample_fraction * full_epochs / debug_epochs
+        profile.estimated_time = None
+        self.assertEqual(self.estimator.estimate(profile).time, 430.0)
+        profile.sample_fraction = profile.debug_epochs = None
+        self.assertIsNone(self.estimator.estimate(profile))
+
+        # the estimates are corrected by the outcomes once enough runs are recorded
+        profile = DebugProfile.parse(STDOUT, code_md5="abc", wall_time=50.0, peak_memory_mb=1000.0)
+        self.estimator.record(profile, actual_time=860.0, actual_memory_mb=1500.0)
+        self.assertEqual(self.estimator.estimate(profile).time, 430.0)
+        # the runs which timed out do not count
+        self.estimator.record(profile, actual_time=430.0 * 100, actual_memory_mb=100.0, timed_out=True)
+        self.assertEqual(self.estimator.estimate(profile).time, 430.0)
+        self.estimator.record(profile, actual_time=860.0, actual_memory_mb=1500.0)
+        estimate = self.estimator.estimate(profile)
+        self.assertEqual((estimate.time, estimate.memory_mb, estimate.raw_time), (860.0, 1500.0, 430.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.components.coder.data_science.utils import (
+    STAGE_CACHE_FILE,
+    inject_stage_cache,
+    stage_cache_report,
+)
+from rdagent.core.experiment import FBWorkspace
+
+LOAD_DATA = '''
+import time
+import pandas as pd
+from stage_cache import cached_stage
+
+N_ROWS = 1000
+
+@cached_stage
+def load_data():
+    df = pd.read_csv("./workspace_input/train.csv")
+    return df[["x"]], df["y"], df[["x"]].iloc[:N_ROWS], list(range(3))
+'''
+
+FEATURE = """
+def scale(X):
+    return X * {factor}
+
+@cached_stage
+def feat_eng(X, y, X_test):
+    return scale(X), y, scale(X_test)
+"""
+
+MAIN = """
+X, y, X_test, test_ids = load_data()
+X, y, X_test = feat_eng(X, y, X_test)
+print("sum:", X["x"].sum())
+"""
+
+
+@pytest.mark.offline
+class StageCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        (self.path / "data").mkdir()
+        (self.path / "data" / "train.csv").write_text("x,y\n1,0\n2,1\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_pipeline(self, name: str, factor: int = 2) -> tuple[str, list[tuple[str, bool]]]:
+        """Run the pipeline in a new workspace sharing the input data and the cache folder."""
+        workspace = FBWorkspace()
+        workspace.workspace_path = ws = self.path / name
+        workspace.inject_files(**{"main.py": LOAD_DATA + FEATURE.format(factor=factor) + MAIN})
+        inject_stage_cache(workspace)
+        # the library is not part of the code of the pipeline
+        self.assertTrue((ws / STAGE_CACHE_FILE).exists())
+        self.assertEqual(list(workspace.file_dict), ["main.py"])
+        for link, target in [("workspace_input", "data"), ("workspace_cache", "cache")]:
+            (self.path / target).mkdir(exist_ok=True)
+            if not (ws / link).exists():
+                (ws / link).symlink_to(self.path / target)
+        (ws / "stage_cache.json").unlink(missing_ok=True)
+        out = subprocess.run([sys.executable, "main.py"], cwd=ws, capture_output=True, text=True, check=True).stdout
+        records = json.loads((ws / "stage_cache.json").read_text())
+        return out, [(r["stage"], r["hit"]) for r in records]
+
+    def test_hits_and_invalidation(self):
+        out, records = self.run_pipeline("ws_1")
+        self.assertIn("sum: 6", out)
+        self.assertEqual(records, [("load_data", False), ("feat_eng", False)])
+
+        # another workspace of the same competition reuses the outputs
+        out, records = self.run_pipeline("ws_2")
+        self.assertIn("sum: 6", out)
+        self.assertEqual(records, [("load_data", True), ("feat_eng", True)])
+        self.assertRegex(stage_cache_report(self.path / "ws_2"), r"^Stage cache: load_data hit \(loaded in .*s, saved ")
+
+        # a change of a helper of the feature engineering only recomputes the features
+        out, records = self.run_pipeline("ws_2", factor=3)
+        self.assertIn("sum: 9", out)
+        self.assertEqual(records, [("load_data", True), ("feat_eng", False)])
+
+        # a change of the input data recomputes everything
+        (self.path / "data" / "train.csv").write_text("x,y\n1,0\n2,1\n3,0\n")
+        out, records = self.run_pipeline("ws_1", factor=3)
+        self.assertIn("sum: 18", out)
+        self.assertEqual(records, [("load_data", False), ("feat_eng", False)])
+        self.assertIsNone(stage_cache_report(self.path / "missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from rdagent.core.proposal import ExperimentFeedback
+from rdagent.log.storage import FileStorage
+from rdagent.log.summary_index import TraceSummary
+from rdagent.utils.workflow.loop import LoopTrace
+
+
+def make_exp(code: str, score: float) -> SimpleNamespace:
+    return SimpleNamespace(
+        experiment_workspace=SimpleNamespace(all_codes=code),
+        hypothesis="h",
+        result=pd.DataFrame({"score": [score]}, index=["ensemble"]),
+    )
+
+
+@pytest.mark.offline
+class TraceSummaryTest(unittest.TestCase):
+    def test_incremental_summary(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = FileStorage(tmp)
+            start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+            storage.log("comp", tag="competition.1", timestamp=start)
+            for i in range(4):
+                t = start + timedelta(minutes=10 * i + 1)
+                storage.log("h", tag=f"Loop_{i}.direct_exp_gen.1", timestamp=t)
+                storage.log(make_exp(f"code{i % 2}", i), tag=f"Loop_{i}.running.1", timestamp=t + timedelta(minutes=5))
+                storage.log(
+                    ExperimentFeedback(reason="", decision=i % 2 == 1),
+                    tag=f"Loop_{i}.feedback.1",
+                    timestamp=t + timedelta(minutes=6),
+                )
+            storage.log(make_exp("code1", 0), tag="Loop_3.record.sota_exp_to_submit.1", timestamp=start + timedelta(1))
+            # the step boundaries recorded by the loop: the step ran before and after its only message
+            t = start + timedelta(minutes=21)
+            for step, (begin, end) in [("direct_exp_gen", (-1, 2)), ("running", (3, 5))]:
+                trace = LoopTrace(t + timedelta(minutes=begin), t + timedelta(minutes=end), 0)
+                storage.log(trace, tag=f"Loop_2.{step}.step_trace.1", timestamp=trace.end)
+
+            summary = TraceSummary.load(tmp)
+            self.assertEqual(summary.competition, "comp")
+            self.assertEqual(summary.sota_loop_id(), 3)
+            self.assertEqual([summary.loops[i].decision for i in range(4)], [False, True, False, True])
+            self.assertEqual(summary.loops[2].valid_score, 2)
+            self.assertEqual(summary.loops[1].duration("running"), timedelta())
+            self.assertEqual(summary.loops[1].duration(), timedelta(minutes=6))
+            self.assertEqual(summary.loops[2].duration("direct_exp_gen"), timedelta(minutes=3))
+            # the sum of the steps: the time between them is not included
+            self.assertEqual(summary.loops[2].duration(), timedelta(minutes=5))
+            self.assertFalse(summary.loops[3].graded)
+            self.assertFalse(summary.update(tmp))
+
+            # grading adds messages with the (old) timestamp of the running experiment
+            storage.log('{"score": 0.5}', tag="Loop_3.running.mle_score.1", timestamp=start + timedelta(minutes=36))
+            summary = TraceSummary.load(tmp)
+            self.assertEqual(summary.loops[3].mle_score, {"score": 0.5})
+            records = summary.records()
+            self.assertEqual(records["sota"].tolist(), [False, False, False, True])
+            self.assertEqual(records["test_score"].iloc[3], 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from rdagent.log.server.trace_cache import TraceCache
+from rdagent.log.storage import FileStorage
+from rdagent.log.ui.conf import UI_SETTING
+
+
+@pytest.mark.offline
+class TraceCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_trace(self, name: str) -> FileStorage:
+        (self.path / name / "__session__").mkdir(parents=True)
+        return FileStorage(self.path / name)
+
+    def test_lazy_load_and_tail(self):
+        storage = self.make_trace("a")
+        now = datetime.now(timezone.utc)
+        for i in range(3):
+            t = now + timedelta(seconds=i)
+            storage.log(SimpleNamespace(experiment_setting=i), tag=f"Loop_{i}.scenario.1", timestamp=t)
+            storage.log("not shown", tag=f"Loop_{i}.coding.1", timestamp=t)
+
+        with patch.object(UI_SETTING, "server_poll_min", 0.0), patch.object(UI_SETTING, "server_max_traces", 1):
+            traces = TraceCache()
+            self.assertEqual(list(traces), [])
+            trace_id = str(self.path / "a")
+            msgs = traces.messages(trace_id)
+            self.assertEqual([m["content"]["config"] for m in msgs], [0, 1, 2])
+
+            # the same timestamp as the cursor, and a later one
+            for i, t in [(3, now + timedelta(seconds=2)), (4, now + timedelta(seconds=3))]:
+                storage.log(SimpleNamespace(experiment_setting=i), tag=f"Loop_{i}.scenario.1", timestamp=t)
+            self.assertEqual([m["content"]["config"] for m in traces.messages(trace_id)], [0, 1, 2, 3, 4])
+            self.assertEqual(len(traces.messages(trace_id)), 5)
+
+            traces.push(trace_id, {"tag": "END"})
+            self.assertEqual(traces.messages(trace_id)[-1], {"tag": "END"})
+
+            # the least recently used trace is evicted and read again on request
+            self.make_trace("b")
+            traces.messages(str(self.path / "b"))
+            self.assertEqual(list(traces), [str(self.path / "b")])
+            self.assertEqual(len(traces.messages(trace_id)), 5)
+
+    def test_poll_backoff(self):
+        self.make_trace("a")
+        traces = TraceCache()
+        trace_id = str(self.path / "a")
+        traces.messages(trace_id)
+        intervals = [traces._traces[trace_id].poll_interval]
+        for _ in range(10):
+            traces._traces[trace_id].next_poll = 0.0
+            traces.messages(trace_id)
+            intervals.append(traces._traces[trace_id].poll_interval)
+        self.assertEqual(intervals[:3], [UI_SETTING.server_poll_min * 2**i for i in range(3)])
+        self.assertEqual(intervals[-1], UI_SETTING.server_poll_max)
+
+
+if __name__ == "__main__":
+    unittest.main()
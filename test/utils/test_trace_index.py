@@ -0,0 +1,109 @@
+import pickle
+import random
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from rdagent.app.data_science.conf import DS_RD_SETTING
+from rdagent.core.proposal import ExperimentFeedback, Trace
+from rdagent.scenarios.data_science.proposal.exp_gen.base import DSTrace
+
+
+class FakeExp:
+    hypothesis = None
+
+
+def scan_parents(trace: Trace, child_idx: int) -> list[int]:
+    """The previous `Trace.get_parents`."""
+    if trace.is_selection_new_tree((child_idx,)):
+        return []
+    ancestors = []
+    curr = child_idx
+    while True:
+        ancestors.insert(0, curr)
+        parent_tuple = trace.dag_parent[curr]
+        if not parent_tuple or parent_tuple[0] == curr:
+            break
+        curr = parent_tuple[0]
+    return ancestors
+
+
+def scan_leaves(trace: Trace) -> list[int]:
+    parent_indices = set(idx for parents in trace.dag_parent for idx in parents)
+    return sorted(set(range(len(trace.hist))) - parent_indices)
+
+
+def scan_sota(trace: Trace, search_type: str, selection: tuple[int, ...]):
+    if search_type == "all":
+        search_list = trace.hist
+    elif trace.is_selection_new_tree(selection):
+        search_list = []
+    else:
+        search_list = [trace.hist[i] for i in scan_parents(trace, selection[0])]
+    for exp, ef in search_list[::-1]:
+        if ef.decision:
+            return exp
+    return None
+
+
+def random_trace(rng: random.Random, n: int) -> DSTrace:
+    trace = DSTrace(scen=None)
+    for loop_id in range(n):
+        if trace.hist:
+            trace.set_current_selection(rng.choice([(), (-1,), (rng.randrange(len(trace.hist)),)]))
+        trace.sync_dag_parent_and_hist((FakeExp(), ExperimentFeedback("", decision=rng.random() < 0.3)), loop_id)
+        yield trace
+
+
+@pytest.mark.offline
+class TraceIndexTest(unittest.TestCase):
+    def assert_same_as_scans(self, trace: DSTrace, rng: random.Random) -> None:
+        self.assertEqual(trace.get_leaves(), scan_leaves(trace))
+        for idx in [rng.randrange(len(trace.hist)), -1, len(trace.hist) - 1]:
+            self.assertEqual(trace.get_parents(idx), scan_parents(trace, idx))
+            self.assertEqual(trace.exp2idx(trace.hist[idx][0]), idx % len(trace.hist))
+            for search_type in ["all", "ancestors"]:
+                for selection in [(idx,), ()]:
+                    self.assertIs(
+                        trace.sota_experiment(search_type, selection), scan_sota(trace, search_type, selection)
+                    )
+                    self.assertIs(
+                        trace.last_successful_exp(search_type, selection), scan_sota(trace, search_type, selection)
+                    )
+        self.assertEqual(trace.exp2idx([trace.hist[-1][0], trace.hist[0][0]]), [len(trace.hist) - 1, 0])
+        self.assertIsNone(trace.exp2idx(FakeExp()))
+
+    def test_random_traces_match_scans(self):
+        with patch.object(DS_RD_SETTING, "coder_on_whole_pipeline", True):
+            for seed in range(30):
+                rng = random.Random(seed)
+                for trace in random_trace(rng, rng.randrange(1, 60)):
+                    if rng.random() < 0.3:
+                        self.assert_same_as_scans(trace, rng)
+                self.assert_same_as_scans(trace, rng)
+
+                restored = pickle.loads(pickle.dumps(trace))
+                self.assertNotIn("_index", restored.__dict__)
+                self.assertEqual(restored.get_leaves(), trace.get_leaves())
+                self.assertEqual(restored.exp2idx(restored.hist[-1][0]), len(trace.hist) - 1)
+
+    def test_changed_history_rebuilds_the_index(self):
+        trace = Trace(scen=None)
+        exps = [FakeExp() for _ in range(4)]
+        for i, exp in enumerate(exps[:3]):
+            trace.hist.append((exp, ExperimentFeedback("", decision=i == 1)))
+        self.assertEqual(trace.exp2idx(exps[2]), 2)
+        self.assertIs(trace.get_sota_hypothesis_and_experiment()[1], exps[1])
+
+        trace.hist.insert(0, (exps[3], ExperimentFeedback("", decision=True)))
+        self.assertEqual(trace.exp2idx(exps[2]), 3)
+        self.assertEqual(trace.exp2idx(exps[3]), 0)
+        self.assertIs(trace.get_sota_hypothesis_and_experiment()[1], exps[1])
+        del trace.hist[1:]
+        self.assertIs(trace.get_sota_hypothesis_and_experiment()[1], exps[3])
+        self.assertIsNone(trace.exp2idx(exps[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import importlib.util
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.components.coder.data_science.utils import (
+    USAGE_TRACKER_FILE,
+    read_peak_memory_mb,
+    read_used_files,
+)
+
+WORKSPACE = {
+    "main.py": """
+import runpy
+import sys
+from load_data import load_data
+
+data = load_data()
+model = __import__("model_used")
+runpy.run_path("ensemble.py")
+print("result:", model.fit(data))
+if len(sys.argv) > 1:
+    raise ValueError(sys.argv[1])
+""",
+    "load_data.py": "def load_data():\n    return list(range(200_000))\n",
+    # CPU-bound pure python code, where a line tracer is the slowest
+    "model_used.py": """
+def fit(data):
+    total = 0
+    for _ in range(10):
+        for x in data:
+            total = (total + x * x) % 1_000_003
+    return total
+""",
+    "model_unused.py": "def fit(data):\n    return 0\n",
+    "ensemble.py": "ENSEMBLE = True\n",
+}
+
+
+@pytest.mark.offline
+class UsageTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        for name, code in WORKSPACE.items():
+            (self.path / name).write_text(code)
+        tracker = Path(__file__).parents[2] / "rdagent/components/coder/data_science/share/usage_tracker.py"
+        (self.path / USAGE_TRACKER_FILE).parent.mkdir()
+        (self.path / USAGE_TRACKER_FILE).write_text(tracker.read_text())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_script(self, cmd: str) -> tuple[subprocess.CompletedProcess, float]:
+        begin = time.perf_counter()
+        result = subprocess.run(cmd.split(), cwd=self.path, capture_output=True, text=True)
+        return result, time.perf_counter() - begin
+
+    def test_used_files_and_overhead(self):
+        timings = {}
+        commands = {"plain": "main.py", "tracker": f"{USAGE_TRACKER_FILE} main.py"}
+        if importlib.util.find_spec("coverage") is not None:
+            commands["coverage"] = "-m coverage run main.py"
+        for name, cmd in commands.items():
+            result, timings[name] = self.run_script(f"{sys.executable} {cmd}")
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn("result:", result.stdout)
+        print(", ".join(f"{name}: {seconds:.2f}s" for name, seconds in timings.items()))
+
+        expected = {"main.py", "load_data.py", "model_used.py", "ensemble.py"}
+        self.assertGreater(read_peak_memory_mb(self.path), 1)
+        self.assertEqual(read_used_files(self.path), expected)
+        self.assertIsNone(read_used_files(self.path))  # the manifest is consumed
+
+        # the manifest is written when the script fails too
+        result, _ = self.run_script(f"{sys.executable} {USAGE_TRACKER_FILE} main.py failed")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("ValueError: failed", result.stderr)
+        self.assertEqual(read_used_files(self.path), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
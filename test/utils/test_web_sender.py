@@ -0,0 +1,141 @@
+import gzip
+import json
+import os
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from rdagent.log.ui.conf import UI_SETTING
+from rdagent.log.ui.sender import WebSender
+
+
+class StubUIServer:
+    """A local stand-in for the `/receive` endpoint of the UI server, recording every received message."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        received, batches = [], []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                data = json.loads(body)
+                time.sleep(delay)
+                batches.append((len(data), self.headers.get("Content-Encoding")))
+                received.extend(data)
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        self.received, self.batches = received, batches
+        self.server = ThreadingHTTPServer(("localhost", 0), Handler)
+        self.url = f"http://localhost:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.offline
+class WebSenderTest(unittest.TestCase):
+    def test_order_and_throughput(self):
+        server = StubUIServer()
+        sender = WebSender(server.url)
+        n = 5000
+        start = time.perf_counter()
+        for i in range(n):
+            sender.send({"id": "trace", "msg": {"i": i, "content": "x" * (20000 if i == 10 else 10)}})
+        enqueue_time = time.perf_counter() - start
+        self.assertTrue(sender.flush(timeout=30))
+        elapsed = time.perf_counter() - start
+        sender.close()
+        server.close()
+        print(f"{n} messages: enqueued in {enqueue_time:.3f}s, delivered in {elapsed:.3f}s, {sender.stats()}")
+
+        self.assertEqual([m["msg"]["i"] for m in server.received], list(range(n)))
+        self.assertLessEqual(max(size for size, _ in server.batches), UI_SETTING.web_batch_size)
+        self.assertIn("gzip", [encoding for _, encoding in server.batches])
+        self.assertEqual(sender.stats()["dropped"], 0)
+
+    def test_spill_keeps_order_with_a_slow_server(self):
+        server = StubUIServer(delay=0.02)
+        with patch.object(UI_SETTING, "web_queue_size", 10), patch.object(UI_SETTING, "web_batch_size", 8):
+            sender = WebSender(server.url)
+            for i in range(300):
+                sender.send({"id": "trace", "msg": {"i": i}})
+            self.assertTrue(sender.spill_path.exists())
+            self.assertTrue(sender.flush(timeout=30))
+            sender.close()
+        server.close()
+        self.assertEqual([m["msg"]["i"] for m in server.received], list(range(300)))
+        self.assertFalse(sender.spill_path.exists())
+
+    def test_lost_spill_file_does_not_stop_the_sender(self):
+        server = StubUIServer(delay=0.02)
+        with patch.object(UI_SETTING, "web_queue_size", 10), patch.object(UI_SETTING, "web_batch_size", 8):
+            sender = WebSender(server.url)
+            for i in range(100):
+                sender.send({"id": "trace", "msg": {"i": i}})
+            sender.spill_path.unlink()
+            self.assertTrue(sender.flush(timeout=30))
+            sender.send({"id": "trace", "msg": {"i": 100}})
+            self.assertTrue(sender.flush(timeout=30))
+            sender.close()
+        server.close()
+        self.assertEqual(server.received[-1]["msg"]["i"], 100)
+        self.assertEqual(sender.stats()["sent"] + sender.stats()["dropped"], 101)
+        self.assertGreater(sender.stats()["dropped"], 0)
+
+    def test_forked_child_has_its_own_spill_file(self):
+        server = StubUIServer(delay=0.02)
+        with patch.object(UI_SETTING, "web_queue_size", 10), patch.object(UI_SETTING, "web_batch_size", 8):
+            sender = WebSender(server.url)
+            for i in range(100):
+                sender.send({"id": "parent", "msg": {"i": i}})
+            parent_spill = sender.spill_path
+            pid = os.fork()
+            if pid == 0:  # the child sends its own messages and must leave the spill file of the parent alone
+                for i in range(100):
+                    sender.send({"id": "child", "msg": {"i": i}})
+                ok = sender.spill_path != parent_spill and sender.flush(timeout=30)
+                os._exit(0 if ok else 1)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            self.assertTrue(sender.flush(timeout=30))
+            sender.close()
+        server.close()
+        for name in ["parent", "child"]:
+            self.assertEqual([m["msg"]["i"] for m in server.received if m["id"] == name], list(range(100)))
+        self.assertEqual(sender.stats()["dropped"], 0)
+
+    def test_unreachable_server_does_not_block(self):
+        with patch.object(UI_SETTING, "web_max_retries", 1), patch.object(UI_SETTING, "web_retry_backoff", 0.01):
+            sender = WebSender(f"http://localhost:{free_port()}")
+            start = time.perf_counter()
+            for i in range(1000):
+                sender.send({"id": "trace", "msg": {"i": i}})
+            self.assertLess(time.perf_counter() - start, 1.0)
+            self.assertTrue(sender.flush(timeout=30))
+            sender.close()
+        self.assertEqual(sender.stats()["dropped"], 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()